@@ -0,0 +1,142 @@
+"""
+Async read path for the busiest GET endpoints.
+
+Under ASGI, middleware.async_read_path routes requests through
+feedback_project.urls_async, which serves the board list, feedback list,
+board stats and comment list with these coroutine views and the async ORM,
+so a slow query waits without holding a worker. They return the same JSON
+as the DRF views; every other method on the same URLs goes to the regular
+DRF view. Under WSGI nothing changes.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import realtime
+from .authentication import aget_token
+from .conditional import aboard_etag, aboard_list_etag, afeedback_list_etag, not_modified, with_etag
+from .fieldsets import COMMENT_FIELDS, FEEDBACK_FIELDS, compact_rows, compact_values, parse_fields
+from .models import Comment, Feedback
+from .pagination import FeedbackCursorPagination
+from .serializers import BoardSerializer
+from .stats_cache import aget_board_stats
+from .upvote_buffer import amerge_pending, read_generation
+from .views import (BoardViewSet, CommentViewSet, FeedbackViewSet, filter_comment_list,
+                    filter_feedback_list, visible_boards)
+
+
+async def authenticate(request):
+    """The token's user, or None. Mirrors CachedTokenAuthentication without blocking the event loop."""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Token '):
+        return None
+    token = await aget_token(header[len('Token '):].strip())
+    if token is None or not token.user.is_active:
+        return None
+    return token.user
+
+
+async def authenticate_stream(request, board_id):
+    # EventSource can't send headers, so browsers pass a stream token (see realtime.py) instead
+    if 'stream_token' not in request.GET:
+        return await authenticate(request)
+    user_id = realtime.read_stream_token(request.GET['stream_token'], board_id)
+    if user_id is None:
+        return None
+    return await User.objects.select_related('userprofile').filter(id=user_id, is_active=True).afirst()
+
+
+def render(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def not_authenticated():
+    return render({"detail": "Authentication credentials were not provided."}, status=401)
+
+
+def read_path(sync_view):
+    """Serves GET with the decorated coroutine and hands every other method to `sync_view`."""
+    sync_view = sync_to_async(sync_view)
+
+    def decorator(async_view):
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await sync_view(request, *args, **kwargs)
+            user = await authenticate(request)
+            if user is None:
+                return not_authenticated()
+            try:
+                return await async_view(request, user, *args, **kwargs)
+            except APIException as e:
+                detail = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+                return render(detail, status=e.status_code)
+        return csrf_exempt(view)
+    return decorator
+
+
+@read_path(BoardViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def board_list(request, user):
+    etag = await aboard_list_etag(user)
+    if response := not_modified(request, etag):
+        return response
+    boards = [board async for board in visible_boards(user)]
+    return with_etag(render(BoardSerializer(boards, many=True).data), etag)
+
+
+@read_path(BoardViewSet.as_view({'get': 'get_stats'}))
+async def board_stats(request, user, pk):
+    etag = await aboard_etag(user, pk, 'stats')
+    if response := not_modified(request, etag):
+        return response
+    board = await visible_boards(user).filter(pk=pk).afirst()
+    if board is None:
+        return render({"detail": "No Board matches the given query."}, status=404)
+    return with_etag(render(await aget_board_stats(board)), etag)
+
+
+@read_path(FeedbackViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def feedback_list(request, user):
+    etag = await afeedback_list_etag(user, request.GET)
+    if response := not_modified(request, etag):
+        return response
+    queryset = Feedback.objects.select_related('user').annotate(has_upvoted=Feedback.upvoted_by_user(user))
+    names = parse_fields(request.GET, FEEDBACK_FIELDS)
+    paginator = FeedbackCursorPagination()
+    queryset = compact_values(filter_feedback_list(queryset, request.GET), FEEDBACK_FIELDS, names,
+                              extra=paginator.position_columns)
+    since = read_generation()
+    page = await paginator.apaginate_queryset(queryset, Request(request))
+    results = await amerge_pending(compact_rows(page, FEEDBACK_FIELDS, names), user, since)
+    return with_etag(render({
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': results,
+    }), etag)
+
+
+@read_path(CommentViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def comment_list(request, user):
+    names = parse_fields(request.GET, COMMENT_FIELDS)
+    queryset = compact_values(filter_comment_list(Comment.objects.all(), request.GET), COMMENT_FIELDS, names)
+    rows = [row async for row in queryset]
+    return render(compact_rows(rows, COMMENT_FIELDS, names))
+
+
+async def board_events(request, board_id):
+    # A long-lived server-sent event stream, so a plain async view rather than DRF.
+    # Only routed under ASGI; WSGI requests get views.board_events_unavailable.
+    user = await authenticate_stream(request, board_id)
+    if user is None:
+        return JsonResponse({"detail": "Authentication required."}, status=401)
+    board = await visible_boards(user).filter(id=board_id).afirst()
+    if board is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    response = StreamingHttpResponse(realtime.event_stream(board.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
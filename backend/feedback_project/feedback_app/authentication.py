@@ -0,0 +1,74 @@
+"""
+Token authentication with a cache in front of the token lookup.
+
+A token is resolved to its user and profile in one query
+(select_related('user__userprofile')), and the result is kept in the
+'auth_tokens' cache alias for AUTH_TOKEN_CACHE_TTL seconds. Later requests
+with that token run no auth queries, and role checks read the cached
+profile. The signal handlers in signals.py drop the entry when the token is
+deleted (logout) or its user or profile changes.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+CACHE_ALIAS = 'auth_tokens'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(token_key):
+    return f'auth-token:{token_key}'
+
+
+def _lookup(token_key):
+    return Token.objects.select_related('user__userprofile').filter(key=token_key)
+
+
+def get_token(token_key):
+    """The Token with its user and profile loaded, or None if it doesn't exist."""
+    token = _cache().get(_key(token_key))
+    if token is None:
+        token = _lookup(token_key).first()
+        if token is not None:
+            _cache().set(_key(token_key), token, timeout=settings.AUTH_TOKEN_CACHE_TTL)
+    return token
+
+
+async def aget_token(token_key):
+    token = await _cache().aget(_key(token_key))
+    if token is None:
+        token = await _lookup(token_key).afirst()
+        if token is not None:
+            await _cache().aset(_key(token_key), token, timeout=settings.AUTH_TOKEN_CACHE_TTL)
+    return token
+
+
+def invalidate_token(token_key):
+    _cache().delete(_key(token_key))
+
+    # Same as the stats cache: a concurrent request could re-cache the old row before commit
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _cache().delete(_key(token_key)))
+
+
+def invalidate_user_tokens(user_id):
+    for token_key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        invalidate_token(token_key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        token = get_token(key)
+        if token is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return (token.user, token)
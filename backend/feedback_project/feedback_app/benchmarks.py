@@ -0,0 +1,359 @@
+"""
+In-process API benchmarks.
+
+`generate` fills the configured database with synthetic boards, users,
+feedbacks, comments and upvotes using bulk_create. It can go up to millions
+of rows, so point SQLITE_PATH or POSTGRES_DB at a scratch database first.
+`run_scenario` then drives one of SCENARIOS through Django's test client
+from one or more threads. For each request it records latency and SQL query
+count, and it reports throughput and p50/p95/p99.
+
+The seed_benchmark_data and bench_api management commands wrap both, and
+bench_api saves results as JSON that later runs can be compared against.
+`bench_serialization` (and the command of the same name) compares
+FeedbackSerializer with the values() list path of fieldsets.py on one
+large page.
+"""
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import duplicates, fieldsets, rollups, search
+from .models import Board, Comment, Feedback, UserProfile
+from .ranking import hot_score
+from .serializers import FeedbackSerializer
+from .stats_cache import invalidate_board_stats
+
+BOARD_NAME_PREFIX = 'Benchmark'
+USERNAME_PREFIX = 'bench-'
+MODERATOR_EVERY = 100  # every 100th generated user is a moderator
+STATUS_WEIGHTS = {'Open': 6, 'In Progress': 3, 'Completed': 1}
+WORDS = (
+    'dark mode export csv search filter mobile app login password reset email notifications '
+    'slack integration api webhook dashboard chart kanban board comments upvote sorting tags '
+    'labels calendar sync offline attachments upload performance slow page loading timeout '
+    'keyboard shortcuts accessibility translation language billing invoice team permissions'
+).split()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+# Synthetic data
+
+def _sentence(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize()
+
+
+def _batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield range(start, min(start + batch_size, total))
+
+
+def generate(boards=5, users=1000, feedbacks=10000, comments=50000, upvotes=100000,
+             days=90, batch_size=5000, seed=0, index=False, log=print):
+    """
+    Creates the given numbers of rows and returns their counts and the board
+    ids. Timestamps are spread over the last `days` days. Duplicate votes
+    drawn at random are dropped, so there can be slightly fewer upvotes than
+    asked for. Counters, hot scores and activity rollups are computed at the
+    end. The search and duplicate indexes are only built with index=True
+    because they take longest.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    run = uuid.uuid4().hex[:6]  # lets several datasets live side by side
+    Vote = Feedback.upvoted_by.through
+
+    def moment():
+        return now - timedelta(seconds=rng.uniform(0, days * 86400))
+
+    board_ids = [
+        board.id for board in Board.objects.bulk_create([
+            # The last board is private so visibility filtering is part of the workload
+            Board(name=f'{BOARD_NAME_PREFIX} {run} #{i}', is_public=i < boards - 1 or boards == 1)
+            for i in range(boards)
+        ])
+    ]
+
+    user_ids = []
+    for batch in _batches(users, batch_size):
+        created = User.objects.bulk_create([User(username=f'{USERNAME_PREFIX}{run}-{i}', password='!') for i in batch])
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, role='moderator' if i % MODERATOR_EVERY == 0 else 'contributor')
+            for i, user in zip(batch, created)
+        ])
+        user_ids += [user.id for user in created]
+    log(f"users: {len(user_ids)}")
+
+    statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    feedback_ids = []
+    for batch in _batches(feedbacks, batch_size):
+        rows = []
+        for _ in batch:
+            created_at = moment()
+            rows.append(Feedback(
+                board_id=rng.choice(board_ids), user_id=rng.choice(user_ids),
+                title=_sentence(rng, 3, 7), description=_sentence(rng, 10, 40),
+                status=rng.choices(statuses, weights)[0], created_at=created_at,
+                hot_score=hot_score(0, 0, created_at, now),
+            ))
+        feedback_ids += [feedback.id for feedback in Feedback.objects.bulk_create(rows)]
+    log(f"feedbacks: {len(feedback_ids)}")
+
+    for batch in _batches(comments, batch_size):
+        created = Comment.objects.bulk_create([
+            Comment(feedback_id=rng.choice(feedback_ids), user_id=rng.choice(user_ids), text=_sentence(rng, 5, 25))
+            for _ in batch
+        ])
+        # auto_now_add stamps bulk_create rows with "now"; spread them out like the feedback
+        for comment in created:
+            comment.created_at = moment()
+        Comment.objects.bulk_update(created, ['created_at'], batch_size=batch_size)
+    log(f"comments: {comments}")
+
+    for batch in _batches(upvotes, batch_size):
+        Vote.objects.bulk_create(
+            [Vote(feedback_id=rng.choice(feedback_ids), user_id=rng.choice(user_ids)) for _ in batch],
+            ignore_conflicts=True,
+        )
+    log(f"upvotes: {Vote.objects.filter(feedback__board_id__in=board_ids).count()}")
+
+    counters = Feedback.actual_counters()
+    for start in range(0, len(feedback_ids), batch_size):
+        Feedback.objects.filter(id__in=feedback_ids[start:start + batch_size]).update(**counters)
+    Feedback.refresh_hot_scores(feedback_ids, batch_size=batch_size)
+    rollups.backfill(board_ids, batch_size=batch_size)
+    if index:
+        search.index_feedback_ids(feedback_ids, batch_size=batch_size)
+        duplicates.index_feedback_ids(feedback_ids, batch_size=batch_size)
+    for board_id in board_ids:
+        invalidate_board_stats(board_id)
+    log("counters, hot scores and activity rollups updated")
+
+    return {
+        'run': run,
+        'boards': board_ids,
+        'users': len(user_ids),
+        'feedbacks': len(feedback_ids),
+        'comments': comments,
+        'upvotes': Vote.objects.filter(feedback__board_id__in=board_ids).count(),
+    }
+
+
+# Scenarios
+
+class Context:
+    """What the scenarios need to know about the dataset: the board under test and the clients' tokens."""
+
+    def __init__(self, board_id, workers):
+        self.board_id = board_id
+        feedbacks = Feedback.objects.filter(board_id=board_id)
+        self.feedback_ids = list(feedbacks.order_by('-hot_score', '-id').values_list('id', flat=True)[:200])
+        if not self.feedback_ids:
+            raise ValueError(f"Board {board_id} has no feedback to benchmark.")
+        self.hottest_id = self.feedback_ids[0]
+
+        users = User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id')
+        contributors = list(users.filter(userprofile__role='contributor')[:workers])
+        moderators = list(users.filter(userprofile__role='moderator')[:workers])
+        if len(contributors) < workers or not moderators:
+            raise ValueError("Not enough generated users for that many workers; run seed_benchmark_data first.")
+        self.contributor_tokens = [Token.objects.get_or_create(user=user)[0].key for user in contributors]
+        self.moderator_tokens = [Token.objects.get_or_create(user=user)[0].key for user in moderators]
+
+    def client(self, worker, moderator=False):
+        tokens = self.moderator_tokens if moderator else self.contributor_tokens
+        return Client(raise_request_exception=False, HTTP_AUTHORIZATION=f'Token {tokens[worker % len(tokens)]}')
+
+
+def board_load(context, client, rng):
+    # What a board page fetches on mount: boards, the first feedback page and its latest comments
+    yield client.get('/api/boards/')
+    response = client.get('/api/feedbacks/', {'board': context.board_id, 'ordering': 'hot'})
+    yield response
+    ids = [str(feedback['id']) for feedback in response.json().get('results', [])] if response.status_code == 200 else []
+    yield client.get(f'/api/boards/{context.board_id}/comments/', {'feedback__in': ','.join(ids), 'limit': 3})
+
+
+def get_stats(context, client, rng):
+    yield client.get(f'/api/boards/{context.board_id}/get_stats/')
+
+
+def toggle_upvote(context, client, rng):
+    # Every worker votes on the same feedback, the worst case for counter contention
+    yield client.post(f'/api/feedbacks/{context.hottest_id}/toggle_upvote/')
+
+
+def comment_post(context, client, rng):
+    yield client.post('/api/comments/', {'feedback': rng.choice(context.feedback_ids), 'text': _sentence(rng, 5, 20)},
+                      content_type='application/json')
+
+
+def get_users(context, client, rng):
+    yield client.get('/api/users/')
+
+
+SCENARIOS = {
+    'board_load': (board_load, False),
+    'get_stats': (get_stats, False),
+    'toggle_upvote': (toggle_upvote, False),
+    'comment_post': (comment_post, False),
+    'get_users': (get_users, True),  # moderators only
+}
+
+
+def run_scenario(name, context, requests=200, concurrency=1, seed=0):
+    """Runs `requests` iterations of the scenario split over `concurrency` threads and returns the measurements."""
+    scenario, moderator = SCENARIOS[name]
+    latencies, query_counts, errors = [], [], []
+    lock = threading.Lock()
+
+    def worker(index, iterations):
+        client = context.client(index, moderator=moderator)
+        rng = random.Random(seed * 1000 + index)
+        own_latencies, own_queries, own_errors = [], [], 0
+        queries = [0]
+
+        def count_query(execute, sql, params, many, query_context):
+            queries[0] += 1
+            return execute(sql, params, many, query_context)
+
+        try:
+            with connection.execute_wrapper(count_query):
+                for _ in range(iterations):
+                    responses = scenario(context, client, rng)
+                    while True:
+                        queries[0] = 0
+                        started = time.perf_counter()
+                        response = next(responses, None)
+                        if response is None:
+                            break
+                        own_latencies.append(time.perf_counter() - started)
+                        own_queries.append(queries[0])
+                        own_errors += response.status_code >= 400
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
+        with lock:
+            latencies.extend(own_latencies)
+            query_counts.extend(own_queries)
+            errors.append(own_errors)
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    if concurrency == 1:
+        worker(0, shares[0])
+    else:
+        threads = [threading.Thread(target=worker, args=(i, share)) for i, share in enumerate(shares)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'scenario': name,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'queries_per_request': sum(query_counts) / len(query_counts) if query_counts else 0.0,
+        'max_queries': max(query_counts, default=0),
+    }
+
+
+# Serialization
+
+def bench_serialization(feedbacks, user, items=10000, fields=None, repeat=5):
+    """
+    Times one page of `items` feedbacks rendered by FeedbackSerializer from
+    model instances and by the fieldsets.py values() path, each with and
+    without its query. `fields` is a ?fields= list; None means every field.
+    Both paths render the same fields, so the speedup is the values() path's
+    alone. Returns the best of `repeat` runs in milliseconds.
+    """
+    names = fieldsets.parse_fields({} if fields is None else {'fields': fields}, fieldsets.FEEDBACK_FIELDS)
+    queryset = feedbacks.annotate(has_upvoted=Feedback.upvoted_by_user(user)).order_by('-created_at', 'id')
+    instances = sparse_instances(queryset, names)[:items]
+    queryset = queryset.select_related('user')[:items]
+
+    serializer_class = sparse_serializer(names)
+
+    def serializer(instances):
+        return serializer_class(instances, many=True).data
+
+    def compact(rows):
+        return fieldsets.compact_rows(rows, fieldsets.FEEDBACK_FIELDS, names)
+
+    paths = {
+        'serializer': (lambda: list(instances.all()), serializer),
+        'values': (lambda: list(fieldsets.compact_values(queryset, fieldsets.FEEDBACK_FIELDS, names)), compact),
+    }
+    results = {'items': 0, 'fields': names}
+    for path, (fetch, render) in paths.items():
+        best_total = best_render = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = fetch()
+            fetched = time.perf_counter()
+            render(rows)
+            finished = time.perf_counter()
+            best_total = min(best_total, finished - started)
+            best_render = min(best_render, finished - fetched)
+        results['items'] = len(rows)
+        results[f'{path}_ms'] = best_render * 1000
+        results[f'{path}_with_query_ms'] = best_total * 1000
+    return results
+
+
+def sparse_instances(queryset, names):
+    """`queryset` loading only the columns behind `names`, as the values() path does."""
+    columns = []
+    for name in names:
+        source = fieldsets.FEEDBACK_FIELDS[name]
+        if isinstance(source, dict):
+            columns += ['user', *source.values()]
+        elif name != 'has_upvoted':  # an annotation, not a column
+            columns.append(name)
+    queryset = queryset.select_related('user') if 'user' in names else queryset
+    return queryset.only(*columns)
+
+
+def sparse_serializer(names):
+    """FeedbackSerializer rendering just `names`, in that order."""
+    class SparseFeedbackSerializer(FeedbackSerializer):
+        def get_fields(self):
+            fields = super().get_fields()
+            return {name: fields[name] for name in names}
+
+    return SparseFeedbackSerializer
+
+
+def compare(baseline, current):
+    """Rows of (key, metric, before, after, change) for results present in both runs."""
+    rows = []
+    before = {f"{result['scenario']}@{result['concurrency']}": result for result in baseline['results']}
+    for result in current['results']:
+        key = f"{result['scenario']}@{result['concurrency']}"
+        if key not in before:
+            continue
+        for metric in ('throughput', 'p95_ms', 'queries_per_request'):
+            old, new = before[key][metric], result[metric]
+            rows.append((key, metric, old, new, (new - old) / old if old else None))
+    return rows
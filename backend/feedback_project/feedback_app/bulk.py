@@ -0,0 +1,362 @@
+"""
+Bulk import and export of boards, feedbacks, comments and upvotes.
+
+Both directions use one record per line (NDJSON) or per row (CSV), each with
+a `type` of board, feedback, comment or upvote. Records reference each other
+by the source system's ids and users by username, and parents must come
+before their children in the stream, which is the order `export_records`
+writes them in:
+
+    {"type": "board", "id": 1, "name": "Ideas", "is_public": true}
+    {"type": "feedback", "id": 7, "board": 1, "user": "alice", "title": "...", "description": "...", "status": "Open", "created_at": "..."}
+    {"type": "comment", "id": 3, "feedback": 7, "user": "bob", "text": "...", "created_at": "..."}
+    {"type": "upvote", "feedback": 7, "user": "carol"}
+
+Imports are validated and written chunk by chunk with bulk_create, one
+transaction per chunk, and the denormalized counters are recomputed once at
+the end instead of per row.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Board, Comment, Feedback, UserProfile
+from . import duplicates, rollups
+from .search import index_feedback_ids
+from .stats_cache import invalidate_board_list, invalidate_board_stats
+
+RECORD_TYPES = ('board', 'feedback', 'comment', 'upvote')
+CSV_FIELDS = ['type', 'id', 'name', 'is_public', 'board', 'user', 'title',
+              'description', 'status', 'created_at', 'feedback', 'text']
+FEEDBACK_STATUSES = {value for value, _ in Feedback.STATUS_CHOICES}
+MAX_REPORTED_ERRORS = 100
+
+
+class RecordError(ValueError):
+    pass
+
+
+# Parsing
+
+def parse_ndjson(lines):
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            yield None
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield RecordError(f"Invalid JSON: {e.msg}")
+
+
+def parse_csv(lines):
+    decoded = (line.decode('utf-8') if isinstance(line, bytes) else line for line in lines)
+    for row in csv.DictReader(decoded):
+        # Empty cells mean "not set" so one header can carry every record type
+        yield {key: value for key, value in row.items() if key and value not in ('', None)}
+
+
+def parse_records(lines, fmt):
+    if fmt == 'ndjson':
+        return parse_ndjson(lines)
+    if fmt == 'csv':
+        return parse_csv(lines)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+# Validation
+
+def _required_text(record, field, max_length=None):
+    value = record.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise RecordError(f"'{field}' is required.")
+    if max_length and len(value) > max_length:
+        raise RecordError(f"'{field}' is longer than {max_length} characters.")
+    return value
+
+
+def _source_id(record, field):
+    value = record.get(field)
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        return int(value)
+    raise RecordError(f"'{field}' must be an integer id.")
+
+
+def _created_at(record):
+    value = record.get('created_at')
+    if not value:
+        return None
+    moment = parse_datetime(value) if isinstance(value, str) else None
+    if moment is None:
+        raise RecordError("'created_at' must be an ISO 8601 datetime.")
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _is_public(record):
+    value = record.get('is_public', True)
+    if isinstance(value, str):
+        value = value.strip().lower() not in ('false', '0', 'no')
+    return bool(value)
+
+
+class Importer:
+    """
+    Streams records into the database. Only the source-id → new-id maps for
+    boards and feedbacks are kept in memory between chunks.
+    """
+
+    def __init__(self, chunk_size=1000, create_users=False):
+        self.chunk_size = chunk_size
+        self.create_users = create_users
+        self.board_ids = {}
+        self.feedback_ids = {}
+        self.touched_boards = set()
+        self.created = {f'{record_type}s': 0 for record_type in RECORD_TYPES}
+        self.errors = []
+        self.error_count = 0
+
+    def run(self, records):
+        numbered = enumerate(records, start=1)
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        self.finish()
+        return self.result()
+
+    def result(self):
+        return {'created': self.created, 'error_count': self.error_count, 'errors': self.errors}
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def import_chunk(self, chunk):
+        by_type = {record_type: [] for record_type in RECORD_TYPES}
+        for line, record in chunk:
+            if record is None:
+                continue
+            if isinstance(record, RecordError):
+                self.error(line, str(record))
+            elif not isinstance(record, dict) or record.get('type') not in RECORD_TYPES:
+                self.error(line, f"'type' must be one of {', '.join(RECORD_TYPES)}.")
+            else:
+                by_type[record['type']].append((line, record))
+
+        # Parents before children so records can reference others in the same chunk
+        with transaction.atomic():
+            users = self.resolve_users(
+                record['user'] for records in by_type.values() for _, record in records
+                if isinstance(record.get('user'), str)
+            )
+            self.import_boards(by_type['board'])
+            self.import_feedbacks(by_type['feedback'], users)
+            self.import_comments(by_type['comment'], users)
+            self.import_upvotes(by_type['upvote'], users)
+
+    def resolve_users(self, usernames):
+        usernames = set(usernames)
+        users = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        missing = usernames - users.keys()
+        if missing and self.create_users:
+            new_users = User.objects.bulk_create(
+                [User(username=username, password='!') for username in missing if len(username) <= 150]
+            )
+            UserProfile.objects.bulk_create([UserProfile(user=user) for user in new_users])
+            users.update((user.username, user.id) for user in new_users)
+        return users
+
+    def _user_id(self, record, users):
+        user_id = users.get(record.get('user'))
+        if user_id is None:
+            raise RecordError(f"Unknown user {record.get('user')!r}.")
+        return user_id
+
+    def _parent_id(self, record, field, id_map):
+        source_id = _source_id(record, field)
+        if source_id not in id_map:
+            raise RecordError(f"'{field}' {source_id} does not match an imported {field}.")
+        return id_map[source_id]
+
+    def _build(self, records, build):
+        valid = []
+        for line, record in records:
+            try:
+                valid.append((record, build(record)))
+            except RecordError as e:
+                self.error(line, str(e))
+        return valid
+
+    def import_boards(self, records):
+        valid = self._build(records, lambda record: (
+            _source_id(record, 'id'),
+            Board(name=_required_text(record, 'name', 255), is_public=_is_public(record)),
+        ))
+        Board.objects.bulk_create([board for _, (_, board) in valid])
+        for _, (source_id, board) in valid:
+            self.board_ids[source_id] = board.id
+        self.created['boards'] += len(valid)
+
+    def import_feedbacks(self, records, users):
+        def build(record):
+            feedback_status = record.get('status', 'Open')
+            if feedback_status not in FEEDBACK_STATUSES:
+                raise RecordError(f"'status' must be one of {', '.join(sorted(FEEDBACK_STATUSES))}.")
+            return _source_id(record, 'id'), Feedback(
+                board_id=self._parent_id(record, 'board', self.board_ids),
+                user_id=self._user_id(record, users),
+                title=_required_text(record, 'title', 255),
+                description=record.get('description') or '',
+                status=feedback_status,
+                created_at=_created_at(record) or timezone.now(),
+            )
+
+        valid = self._build(records, build)
+        Feedback.objects.bulk_create([feedback for _, (_, feedback) in valid])
+        for _, (source_id, feedback) in valid:
+            self.feedback_ids[source_id] = feedback.id
+            self.touched_boards.add(feedback.board_id)
+        self.created['feedbacks'] += len(valid)
+
+    def import_comments(self, records, users):
+        valid = self._build(records, lambda record: (
+            _created_at(record),
+            Comment(
+                feedback_id=self._parent_id(record, 'feedback', self.feedback_ids),
+                user_id=self._user_id(record, users),
+                text=_required_text(record, 'text'),
+            ),
+        ))
+        comments = Comment.objects.bulk_create([comment for _, (_, comment) in valid])
+
+        # auto_now_add stamps bulk_create rows with "now"; restore source timestamps
+        dated = []
+        for _, (created_at, comment) in valid:
+            if created_at is not None:
+                comment.created_at = created_at
+                dated.append(comment)
+        Comment.objects.bulk_update(dated, ['created_at'], batch_size=self.chunk_size)
+        self.created['comments'] += len(comments)
+
+    def import_upvotes(self, records, users):
+        Vote = Feedback.upvoted_by.through
+        valid = self._build(records, lambda record: Vote(
+            feedback_id=self._parent_id(record, 'feedback', self.feedback_ids),
+            user_id=self._user_id(record, users),
+        ))
+        # Duplicate (feedback, user) pairs are ignored by the table's unique constraint
+        Vote.objects.bulk_create([vote for _, vote in valid], ignore_conflicts=True)
+        self.created['upvotes'] += len(valid)
+
+    def finish(self):
+        # Counters, scores, search documents, duplicate fingerprints and activity rollups are derived once per imported feedback rather than per row
+        feedback_ids = list(self.feedback_ids.values())
+        counters = Feedback.actual_counters()
+        for start in range(0, len(feedback_ids), self.chunk_size):
+            Feedback.objects.filter(id__in=feedback_ids[start:start + self.chunk_size]).update(**counters)
+        Feedback.refresh_hot_scores(feedback_ids, batch_size=self.chunk_size)
+        index_feedback_ids(feedback_ids, batch_size=self.chunk_size)
+        duplicates.index_feedback_ids(feedback_ids, batch_size=self.chunk_size)
+        rollups.add_feedbacks(feedback_ids, batch_size=self.chunk_size)
+        for board_id in self.touched_boards:
+            invalidate_board_stats(board_id)
+        # bulk_create skips board_changed, which would otherwise rotate the board list's ETag
+        if self.created['boards']:
+            invalidate_board_list()
+
+
+def import_records(lines, fmt='ndjson', chunk_size=1000, create_users=False):
+    importer = Importer(chunk_size=chunk_size, create_users=create_users)
+    return importer.run(parse_records(lines, fmt))
+
+
+# Export
+
+def export_records(board_ids=None, chunk_size=2000):
+    """Yields export records parent-first, reading each table with a server-side iterator."""
+    boards = Board.objects.order_by('id')
+    feedbacks = Feedback.objects.order_by('id')
+    comments = Comment.objects.order_by('id')
+    upvotes = Feedback.upvoted_by.through.objects.order_by('id')
+    if board_ids is not None:
+        boards = boards.filter(id__in=board_ids)
+        feedbacks = feedbacks.filter(board_id__in=board_ids)
+        comments = comments.filter(feedback__board_id__in=board_ids)
+        upvotes = upvotes.filter(feedback__board_id__in=board_ids)
+
+    for row in boards.values('id', 'name', 'is_public').iterator(chunk_size=chunk_size):
+        yield {'type': 'board', **row}
+    for row in feedbacks.values(
+        'id', 'board', 'user__username', 'title', 'description', 'status', 'created_at'
+    ).iterator(chunk_size=chunk_size):
+        row['user'] = row.pop('user__username')
+        yield {'type': 'feedback', **row}
+    for row in comments.values('id', 'feedback', 'user__username', 'text', 'created_at').iterator(chunk_size=chunk_size):
+        row['user'] = row.pop('user__username')
+        yield {'type': 'comment', **row}
+    for row in upvotes.values('feedback', 'user__username').iterator(chunk_size=chunk_size):
+        yield {'type': 'upvote', 'feedback': row['feedback'], 'user': row['user__username']}
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def csv_lines(rows, fieldnames):
+    # csv.writer needs a file; reuse one buffer and hand back each line as it is written
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+
+    def flush():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writeheader()
+    yield flush()
+    for row in rows:
+        writer.writerow({
+            key: value.isoformat() if hasattr(value, 'isoformat') else value
+            for key, value in row.items()
+        })
+        yield flush()
+
+
+def export_lines(fmt='ndjson', board_ids=None):
+    records = export_records(board_ids)
+    if fmt == 'ndjson':
+        return ndjson_lines(records)
+    if fmt == 'csv':
+        return csv_lines(records, CSV_FIELDS)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+async def aiter_lines(lines, batch_size=200):
+    """
+    Streams a sync line iterator from an ASGI response. Given a sync iterator,
+    Django would read the whole export into a list before sending a byte.
+    This reads `batch_size` lines per trip to the request's sync thread,
+    which is also the thread holding the server-side cursor's connection.
+    """
+    take = sync_to_async(lambda: ''.join(islice(lines, batch_size)))
+    try:
+        while chunk := await take():
+            yield chunk
+    finally:
+        # Releases the cursor if the client goes away mid-export
+        await sync_to_async(lines.close)()
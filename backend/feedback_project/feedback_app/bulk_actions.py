@@ -0,0 +1,77 @@
+"""
+Status changes, board moves and deletions applied to many feedbacks at once.
+
+Each call is one transaction: the targets are read in one query and changed
+with a single UPDATE ... WHERE id IN (...) (or one DELETE), instead of a
+PATCH with full serializer validation per card. QuerySet.update() skips the
+post_save handlers, so the work they would do per feedback (stats cache,
+activity rollups, duplicate fingerprints, live events) is done here once per
+board. Deletes go through QuerySet.delete(), which still sends post_delete
+for each feedback.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import realtime
+from .models import BoardActivity, Feedback, FeedbackFingerprint
+from .serializers import FeedbackSerializer
+from .stats_cache import invalidate_board_stats
+
+ACTIONS = ('status', 'move', 'delete')
+# Status changes are what the Kanban board does for everyone; the rest is moderation
+MODERATOR_ACTIONS = {'move', 'delete'}
+
+
+def apply(feedbacks, ids, action, value=None):
+    """
+    Applies `action` to the `ids` found in the `feedbacks` queryset and
+    returns {id: result} for every requested id, where result is 'updated',
+    'unchanged', 'deleted' or 'not_found'. `value` is the new status for
+    'status' and the target board id for 'move'.
+    """
+    results = dict.fromkeys(ids, 'not_found')
+    with transaction.atomic():
+        targets = list(feedbacks.filter(id__in=ids).values_list('id', 'board_id', 'status'))
+        if action == 'delete':
+            changed = [feedback_id for feedback_id, _, _ in targets]
+            Feedback.objects.filter(id__in=changed).delete()
+            results.update(dict.fromkeys(changed, 'deleted'))
+            return results
+
+        column = 'status' if action == 'status' else 'board_id'
+        current = {feedback_id: (board_id, status) for feedback_id, board_id, status in targets}
+        changed = {
+            feedback_id: board_id for feedback_id, (board_id, status) in current.items()
+            if (status if action == 'status' else board_id) != value
+        }
+        results.update(dict.fromkeys(current, 'unchanged'))
+        results.update(dict.fromkeys(changed, 'updated'))
+        if changed:
+            Feedback.objects.filter(id__in=list(changed)).update(**{column: value})
+            if action == 'status':
+                _status_changed(changed, value)
+            else:
+                _moved(changed, value)
+    return results
+
+
+def _status_changed(previous_boards, status):
+    today = timezone.localdate()
+    for board_id, count in Counter(previous_boards.values()).items():
+        invalidate_board_stats(board_id)
+        BoardActivity.record(board_id, today, status, status_changes=count)
+    for feedback_id, board_id in previous_boards.items():
+        realtime.publish(board_id, 'feedback.updated', id=feedback_id, changes={'status': status})
+
+
+def _moved(previous_boards, board_id):
+    FeedbackFingerprint.objects.filter(feedback_id__in=list(previous_boards)).update(board_id=board_id)
+    for previous_board_id in {*previous_boards.values(), board_id}:
+        invalidate_board_stats(previous_board_id)
+
+    moved = Feedback.objects.select_related('user').filter(id__in=list(previous_boards))
+    for feedback in moved:
+        realtime.publish(previous_boards[feedback.id], 'feedback.deleted', id=feedback.id)
+        realtime.publish(board_id, 'feedback.created', feedback=FeedbackSerializer(feedback).data)
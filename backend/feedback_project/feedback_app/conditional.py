@@ -0,0 +1,118 @@
+"""
+Conditional GET for the board list, board detail and stats, and the feedback list.
+
+ETags are built from the version tokens in stats_cache.py plus whatever else
+the response depends on: the role for board visibility, the user for
+has_upvoted, the query string for filters and cursors. Computing one takes
+only cache reads, so a request whose If-None-Match still matches gets a 304
+before the main query or serializer runs. Under ASGI the views in
+async_views.py do the same through the a-prefixed variants.
+
+The tokens live in the board_stats cache, so they are only right if every
+worker reads and deletes the same ones. With a per-process cache (the
+local-memory default) a write handled by one worker would leave the others
+answering 304 with stale data. So unless CONDITIONAL_GET says otherwise,
+ETags are only sent when that cache is a shared backend such as Redis; the
+builders return None and the helpers below do nothing otherwise.
+
+Last-Modified isn't sent: a token has no modification time that is exact to
+the second, and clients that get an ETag revalidate with it. The browser
+does that on its own for the frontend's axios requests, since responses are
+sent with Cache-Control: private, no-cache.
+"""
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from django.conf import settings
+
+from .stats_cache import (CACHE_ALIAS, aboard_list_version, aboard_version, ausers_version, board_list_version,
+                          board_version, users_version)
+
+PER_PROCESS_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def enabled():
+    """Whether to send ETags: CONDITIONAL_GET if set, otherwise only with a shared stats cache."""
+    if settings.CONDITIONAL_GET is not None:
+        return settings.CONDITIONAL_GET
+    return settings.CACHES[CACHE_ALIAS]['BACKEND'] not in PER_PROCESS_BACKENDS
+
+
+def _role(user):
+    profile = getattr(user, 'userprofile', None)
+    return profile.role if profile is not None else ''
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.sha1(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _board_param(params):
+    board_id = params.get('board', '')
+    return int(board_id) if board_id.isdigit() else None
+
+
+def board_list_etag(user):
+    if not enabled():
+        return None
+    return make_etag('boards', board_list_version(), _role(user))
+
+
+async def aboard_list_etag(user):
+    if not enabled():
+        return None
+    return make_etag('boards', await aboard_list_version(), _role(user))
+
+
+def board_etag(user, board_id, view):
+    if not enabled():
+        return None
+    return make_etag(view, board_id, board_version(board_id), _role(user))
+
+
+async def aboard_etag(user, board_id, view):
+    if not enabled():
+        return None
+    return make_etag(view, board_id, await aboard_version(board_id), _role(user))
+
+
+def feedback_list_etag(user, params):
+    # Items embed their author's details, so user edits count as well as board writes
+    if not enabled():
+        return None
+    version = board_version(_board_param(params))
+    return make_etag('feedbacks', version, users_version(), user.id, params.urlencode())
+
+
+async def afeedback_list_etag(user, params):
+    if not enabled():
+        return None
+    version = await aboard_version(_board_param(params))
+    return make_etag('feedbacks', version, await ausers_version(), user.id, params.urlencode())
+
+
+def not_modified(request, etag):
+    """A 304 if the request's If-None-Match has `etag`, otherwise None."""
+    if etag is None:
+        return None
+    if_none_match = request.headers.get('If-None-Match', '')
+    candidates = [candidate.strip().removeprefix('W/') for candidate in if_none_match.split(',')]
+    if etag in candidates or '*' in candidates:
+        return with_etag(HttpResponseNotModified(), etag)
+    return None
+
+
+def with_etag(response, etag):
+    if etag is None:
+        return response
+    response['ETag'] = etag
+    # Browsers keep the body but revalidate every time; it depends on the
+    # token's user, so it is private and varies on Authorization.
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
@@ -0,0 +1,242 @@
+"""
+Near-duplicate feedback detection with MinHash and locality-sensitive hashing.
+
+A feedback's title and description are reduced to word shingles, summarised
+by a 64-value MinHash signature and split into 16 bands of 4 values. Each
+band is hashed into a bucket and stored in FeedbackFingerprint, so finding
+candidates is one indexed lookup of 16 (band, bucket) pairs on the board
+rather than a scan of its feedback. Candidates are then confirmed by exact
+Jaccard similarity of their shingles. With these parameters pairs above ~0.5
+similarity are very likely to share a bucket.
+"""
+import random
+import re
+from hashlib import blake2b
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import BoardActivity, Comment, Feedback, FeedbackFingerprint
+from .search import index_feedback_ids as index_search_documents
+from .stats_cache import invalidate_board_stats
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+DEFAULT_THRESHOLD = 0.5
+MAX_CANDIDATES = 20
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_random = random.Random(1337)  # fixed seed: stored buckets must stay comparable across processes
+_PERMUTATIONS = [
+    (_random.randrange(1, _MERSENNE_PRIME), _random.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'can', 'for', 'from', 'i', 'if', 'in',
+    'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'please', 'so', 'that', 'the', 'this', 'to',
+    'we', 'when', 'with', 'would', 'you',
+}
+
+
+def shingles(title, description=''):
+    """Words and word pairs of the normalized text, minus stopwords."""
+    words = [word for word in re.findall(r'[^\W_]+', f'{title} {description}'.lower()) if word not in STOPWORDS]
+    return set(words) | {f'{first} {second}' for first, second in zip(words, words[1:])}
+
+
+def _hash(value):
+    return int.from_bytes(blake2b(value.encode('utf-8'), digest_size=4).digest(), 'big')
+
+
+def minhash(shingle_set):
+    hashes = [_hash(shingle) for shingle in shingle_set]
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_buckets(signature):
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = blake2b(b''.join(row.to_bytes(4, 'big') for row in rows), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+
+def fingerprint(title, description=''):
+    shingle_set = shingles(title, description)
+    if not shingle_set:
+        return []
+    return band_buckets(minhash(shingle_set))
+
+
+def jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+# Index maintenance
+
+def _fingerprint_rows(feedback):
+    return [
+        FeedbackFingerprint(feedback_id=feedback.id, board_id=feedback.board_id, band=band, bucket=bucket)
+        for band, bucket in fingerprint(feedback.title, feedback.description)
+    ]
+
+
+def index_feedback(feedback):
+    with transaction.atomic():
+        FeedbackFingerprint.objects.filter(feedback_id=feedback.id).delete()
+        FeedbackFingerprint.objects.bulk_create(_fingerprint_rows(feedback))
+
+
+def index_feedback_ids(feedback_ids, batch_size=1000):
+    feedback_ids = list(feedback_ids)
+    for start in range(0, len(feedback_ids), batch_size):
+        batch = feedback_ids[start:start + batch_size]
+        feedbacks = Feedback.objects.filter(id__in=batch).only('id', 'board_id', 'title', 'description')
+        rows = [row for feedback in feedbacks for row in _fingerprint_rows(feedback)]
+        with transaction.atomic():
+            FeedbackFingerprint.objects.filter(feedback_id__in=batch).delete()
+            FeedbackFingerprint.objects.bulk_create(rows, batch_size=batch_size)
+
+
+# Lookup
+
+def find_duplicates(board_id, title, description='', exclude_id=None,
+                    threshold=DEFAULT_THRESHOLD, limit=5):
+    """
+    Feedback on the board whose text is at least `threshold` similar, most
+    similar first, as dicts of id, title and similarity.
+    """
+    shingle_set = shingles(title, description)
+    if not shingle_set:
+        return []
+
+    bucket_match = Q()
+    for band, bucket in band_buckets(minhash(shingle_set)):
+        bucket_match |= Q(band=band, bucket=bucket)
+    candidate_ids = (
+        FeedbackFingerprint.objects.filter(bucket_match, board_id=board_id)
+        .exclude(feedback_id=exclude_id)
+        .values('feedback_id')
+        .annotate(shared_bands=Count('id'))
+        .order_by('-shared_bands')
+        .values_list('feedback_id', flat=True)[:MAX_CANDIDATES]
+    )
+    candidates = Feedback.objects.filter(id__in=list(candidate_ids)).values('id', 'title', 'description')
+
+    matches = []
+    for candidate in candidates:
+        similarity = jaccard(shingle_set, shingles(candidate['title'], candidate['description']))
+        if similarity >= threshold:
+            matches.append({'id': candidate['id'], 'title': candidate['title'], 'similarity': round(similarity, 3)})
+    matches.sort(key=lambda match: (-match['similarity'], match['id']))
+    return matches[:limit]
+
+
+def duplicate_pairs(board_id=None, threshold=DEFAULT_THRESHOLD, batch_size=1000):
+    """
+    Yields (feedback_id, duplicate_id, similarity) for every confirmed pair,
+    found with a self-join on shared buckets instead of comparing all pairs.
+    Candidate pairs are read `batch_size` at a time, and the text of each
+    batch's feedback is loaded in one query.
+    """
+    board_filter = "AND a.board_id = %s" if board_id is not None else ""
+    last = (0, 0)
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT DISTINCT a.feedback_id, b.feedback_id
+                FROM {FeedbackFingerprint._meta.db_table} a
+                JOIN {FeedbackFingerprint._meta.db_table} b
+                  ON a.board_id = b.board_id AND a.band = b.band AND a.bucket = b.bucket
+                 AND a.feedback_id < b.feedback_id
+                WHERE (a.feedback_id > %s OR (a.feedback_id = %s AND b.feedback_id > %s)) {board_filter}
+                ORDER BY a.feedback_id, b.feedback_id
+                LIMIT %s
+                """,
+                [last[0], last[0], last[1]] + ([board_id] if board_id is not None else []) + [batch_size],
+            )
+            pairs = cursor.fetchall()
+        if not pairs:
+            return
+
+        feedback_ids = {feedback_id for pair in pairs for feedback_id in pair}
+        shingles_of = {
+            feedback['id']: shingles(feedback['title'], feedback['description'])
+            for feedback in Feedback.objects.filter(id__in=feedback_ids).values('id', 'title', 'description')
+        }
+        for first, second in pairs:
+            # A feedback deleted since it was fingerprinted has no text left to compare
+            if first not in shingles_of or second not in shingles_of:
+                continue
+            similarity = jaccard(shingles_of[first], shingles_of[second])
+            if similarity >= threshold:
+                yield first, second, round(similarity, 3)
+        last = pairs[-1]
+
+
+# Merging
+
+def _record_merge_activity(survivor, survivor_status, survivor_votes, duplicate_status, duplicate_votes, moved_comments):
+    # The bulk writes above skip the signal handlers. The duplicate's votes go away and the new
+    # voters of the survivor arrive today; comments keep their days but now count under the
+    # survivor's status, as backfill would count them.
+    new_votes = Feedback.objects.filter(id=survivor.id).values_list('upvote_count', flat=True).get() - survivor_votes
+    today = timezone.localdate()
+    if duplicate_status == survivor_status:
+        BoardActivity.record(survivor.board_id, today, survivor_status, upvotes=new_votes - duplicate_votes)
+        return
+    BoardActivity.record(survivor.board_id, today, duplicate_status, upvotes=-duplicate_votes)
+    BoardActivity.record(survivor.board_id, today, survivor_status, upvotes=new_votes)
+    for row in moved_comments:
+        BoardActivity.record(survivor.board_id, row['day'], duplicate_status, comments=-row['count'])
+        BoardActivity.record(survivor.board_id, row['day'], survivor_status, comments=row['count'])
+
+
+def merge_feedback(survivor, duplicate):
+    """
+    Folds `duplicate` into `survivor`: its comments move over, its voters become
+    voters of the survivor (without double counting), and it is deleted.
+    """
+    if survivor.board_id != duplicate.board_id:
+        raise ValueError("Only feedback on the same board can be merged.")
+    if survivor.id == duplicate.id:
+        raise ValueError("A feedback can't be merged into itself.")
+
+    Vote = Feedback.upvoted_by.through
+    with transaction.atomic():
+        survivor_status, survivor_votes = (
+            Feedback.objects.filter(id=survivor.id).values_list('status', 'upvote_count').get()
+        )
+        duplicate_status = Feedback.objects.filter(id=duplicate.id).values_list('status', flat=True).get()
+        comments = Comment.objects.filter(feedback_id=duplicate.id)
+        moved_comments = list(
+            comments.annotate(day=TruncDate('created_at')).values('day').annotate(count=Count('id')).order_by()
+        )
+        comments.update(feedback_id=survivor.id)
+        voters = list(Vote.objects.filter(feedback_id=duplicate.id).values_list('user_id', flat=True))
+        Vote.objects.bulk_create(
+            [Vote(feedback_id=survivor.id, user_id=user_id) for user_id in voters],
+            ignore_conflicts=True,
+        )
+        duplicate.delete()
+        Feedback.objects.filter(id=survivor.id).update(**Feedback.actual_counters())
+        Feedback.refresh_hot_scores([survivor.id])
+        # Moved comments still point at the old feedback in the search index
+        index_search_documents([survivor.id])
+        _record_merge_activity(survivor, survivor_status, survivor_votes, duplicate_status, len(voters), moved_comments)
+
+    invalidate_board_stats(survivor.board_id)
+    survivor.refresh_from_db()
+    return survivor
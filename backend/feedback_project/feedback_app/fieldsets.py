@@ -0,0 +1,101 @@
+"""
+Sparse fieldsets and a values() fast path for the feedback and comment lists.
+
+`?fields=id,title,status` limits each item to the named fields, so a Kanban
+page doesn't carry descriptions and user objects it never shows. Without
+the parameter an item has every field, exactly as FeedbackSerializer or
+CommentSerializer would render it.
+
+Either way the page comes from values(). Only the columns behind the chosen
+fields are selected. Each item is built straight from the row, with no model
+instances and no DRF field lookups per object. Datetimes still go through
+DRF's DateTimeField, so the JSON is identical to the serializers' output.
+Writes, detail views and search keep using the serializers.
+"""
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from . import metrics
+from .serializers import UserSerializer
+
+# Output field -> values() column, or a dict of them for a nested object
+USER_FIELDS = {name: f'user__{name}' for name in UserSerializer.Meta.fields}
+
+FEEDBACK_FIELDS = {
+    'id': 'id',
+    'board': 'board_id',
+    'title': 'title',
+    'description': 'description',
+    'status': 'status',
+    'upvote_count': 'upvote_count',
+    'comment_count': 'comment_count',
+    'created_at': 'created_at',
+    'user': USER_FIELDS,
+    'has_upvoted': 'has_upvoted',  # needs the Feedback.upvoted_by_user annotation
+}
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'feedback': 'feedback_id',
+    'user': USER_FIELDS,
+    'text': 'text',
+    'created_at': 'created_at',
+}
+
+DATETIME_FIELDS = {'created_at'}
+
+
+def parse_fields(params, available):
+    """The output fields asked for with ?fields=, in order; all of `available` if it is absent."""
+    value = params.get('fields')
+    if value is None:
+        return list(available)
+    names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if not names or unknown:
+        raise ValidationError({'fields': f"Must be a comma-separated list of: {', '.join(available)}."})
+    return names
+
+
+def compact_values(queryset, available, names, extra=()):
+    """
+    `queryset` as values() rows with just the columns for `names`, plus
+    `extra` (e.g. the columns a cursor paginator reads its position from).
+    """
+    columns = dict.fromkeys(extra)
+    for name in names:
+        source = available[name]
+        columns.update(dict.fromkeys(source.values() if isinstance(source, dict) else [source]))
+    return queryset.values(*columns)
+
+
+def compact_rows(rows, available, names):
+    """Builds new item dicts from values() rows, leaving the rows for the paginator."""
+    # (name, source, kind) worked out once per page rather than per item
+    spec = []
+    for name in names:
+        source = available[name]
+        if isinstance(source, dict):
+            spec.append((name, list(source.items()), 'nested'))
+        else:
+            spec.append((name, source, 'datetime' if name in DATETIME_FIELDS else 'plain'))
+    # Looking up the current timezone for every value would cost more than formatting it
+    datetime_field = serializers.DateTimeField(
+        default_timezone=timezone.get_current_timezone() if settings.USE_TZ else None
+    )
+
+    with metrics.serializer_timer():
+        items = []
+        for row in rows:
+            item = {}
+            for name, source, kind in spec:
+                if kind == 'plain':
+                    item[name] = row[source]
+                elif kind == 'datetime':
+                    item[name] = datetime_field.to_representation(row[source])
+                else:
+                    item[name] = {key: row[column] for key, column in source}
+            items.append(item)
+        return items
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from feedback_app.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily BoardActivity rollups from the current feedbacks, votes and comments. "
+        "Run once after deploying the rollups or after a bulk import; see feedback_app/rollups.py "
+        "for what can and can't be reconstructed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', type=int, action='append', help="Only rebuild this board; repeatable.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = backfill(options['board'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} activity rows."))
@@ -0,0 +1,78 @@
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from feedback_app.benchmarks import BOARD_NAME_PREFIX, SCENARIOS, Context, compare, run_scenario
+from feedback_app.models import Board
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the in-process API scenarios (board_load, get_stats, toggle_upvote, comment_post, get_users) "
+        "against data from seed_benchmark_data. Reports throughput, p50/p95/p99 latency and SQL queries "
+        "per request; --output saves JSON and --compare prints the change against a saved run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                            help="Scenario to run; repeatable. Default: all.")
+        parser.add_argument('--board', type=int, help="Board under test. Default: the newest benchmark board.")
+        parser.add_argument('--requests', type=int, default=200, help="Iterations per scenario and concurrency.")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1], help="Client threads per run.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="A JSON file from an earlier --output to compare against.")
+
+    def handle(self, *args, **options):
+        board_id = options['board']
+        if board_id is None:
+            board = Board.objects.filter(name__startswith=BOARD_NAME_PREFIX, is_public=True).order_by('-id').first()
+            if board is None:
+                raise CommandError("No benchmark board found; run seed_benchmark_data or pass --board.")
+            board_id = board.id
+        try:
+            context = Context(board_id, workers=max(options['concurrency']))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        results = []
+        self.stdout.write(f"board {board_id} on {connection.vendor} ({connection.settings_dict['NAME']})")
+        self.stdout.write(
+            f"{'scenario':<15}{'threads':>8}{'requests':>10}{'errors':>8}{'req/s':>10}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+        )
+        for name in options['scenario'] or list(SCENARIOS):
+            for concurrency in options['concurrency']:
+                result = run_scenario(name, context, options['requests'], concurrency, options['seed'])
+                results.append(result)
+                self.stdout.write(
+                    f"{name:<15}{concurrency:>8}{result['requests']:>10}{result['errors']:>8}"
+                    f"{result['throughput']:>10.1f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+                    f"{result['p99_ms']:>9.1f}{result['queries_per_request']:>9.1f}"
+                )
+
+        run = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'board': board_id,
+                'requests': options['requests'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(run, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {options['output']}."))
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            self.stdout.write(f"\n{'run':<20}{'metric':<22}{'before':>10}{'after':>10}{'change':>9}")
+            for key, metric, before, after, change in compare(baseline, run):
+                change = f"{change:+.1%}" if change is not None else 'n/a'
+                self.stdout.write(f"{key:<20}{metric:<22}{before:>10.2f}{after:>10.2f}{change:>9}")
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback_app.benchmarks import percentile
+
+READ_PATHS = [
+    'boards/',
+    'boards/{board}/get_stats/',
+    'feedbacks/?board={board}',
+    'comments/?feedback={feedback}',
+]
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, stdlib only so the benchmark needs no HTTP client package."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def get(self, path, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        request = f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n{headers}\r\n"
+        self.writer.write(request.encode('latin-1'))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection.")
+        status = int(status_line.split()[1])
+        length, chunked, close = 0, False, False
+        while (line := await self.reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'transfer-encoding':
+                chunked = 'chunked' in value
+            elif name == 'connection':
+                close = value == 'close'
+
+        if chunked:
+            while size := int((await self.reader.readline()).split(b';')[0], 16):
+                await self.reader.readexactly(size + 2)
+            await self.reader.readline()
+        else:
+            await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def run_load(base_url, paths, token, concurrency, duration):
+    parts = urlsplit(base_url)
+    prefix = parts.path.rstrip('/') + '/'
+    headers = f"Authorization: Token {token}\r\nAccept: application/json\r\n"
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client(index):
+        nonlocal errors
+        connection = Connection(parts.hostname, parts.port or 80)
+        request_number = index
+        try:
+            while time.perf_counter() < deadline:
+                path = prefix + paths[request_number % len(paths)]
+                request_number += 1
+                started = time.perf_counter()
+                try:
+                    status = await connection.get(path, headers)
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    errors += 1
+                    connection.close()
+                    await asyncio.sleep(0.05)
+                    continue
+                if status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the hot read endpoints against running servers and compare throughput and latency, "
+        "e.g. --target wsgi=http://127.0.0.1:8000/api/ (gunicorn feedback_project.wsgi) and "
+        "--target asgi=http://127.0.0.1:8001/api/ (uvicorn feedback_project.asgi:application)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='NAME=URL',
+                            help="API base URL of a running server; repeat to compare several.")
+        parser.add_argument('--token', required=True, help="Auth token the simulated clients send.")
+        parser.add_argument('--board', type=int, required=True, help="Board id used in the request paths.")
+        parser.add_argument('--feedback', type=int, required=True, help="Feedback id used for the comment list.")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[100, 500, 1000],
+                            help="Concurrent keep-alive clients per run.")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per run.")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, separator, url = target.partition('=')
+            if not separator or not urlsplit(url).hostname:
+                raise CommandError(f"--target must look like name=http://host:port/api/, got {target!r}.")
+            targets.append((name, url))
+        paths = [path.format(board=options['board'], feedback=options['feedback']) for path in READ_PATHS]
+
+        self.stdout.write(f"{'target':<10}{'clients':>8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for concurrency in options['concurrency']:
+            for name, url in targets:
+                result = asyncio.run(run_load(url, paths, options['token'], concurrency, options['duration']))
+                self.stdout.write(
+                    f"{name:<10}{concurrency:>8}{result['requests']:>10}{result['errors']:>8}"
+                    f"{result['throughput']:>10.1f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+                )
@@ -0,0 +1,47 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from feedback_app.benchmarks import USERNAME_PREFIX, bench_serialization
+from feedback_app.models import Feedback
+
+
+class Command(BaseCommand):
+    help = (
+        "Time one large feedback page through FeedbackSerializer and through the values() path used by the "
+        "list endpoints, with and without ?fields=. Both render the same fields, so the speedup is the "
+        "values() path's alone. Seed at least --items feedbacks first "
+        "(seed_benchmark_data --boards 1 --feedbacks 10000)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', type=int, help="Only this board's feedback. Default: all feedback.")
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--fields', action='append', default=[],
+                            help="A ?fields= list to time as well, e.g. id,title,status; repeatable.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per path; the best is reported.")
+
+    def handle(self, *args, **options):
+        feedbacks = Feedback.objects.all()
+        if options['board'] is not None:
+            feedbacks = feedbacks.filter(board_id=options['board'])
+        user = User.objects.filter(username__startswith=USERNAME_PREFIX).first() or User.objects.first()
+        if user is None or not feedbacks.exists():
+            raise CommandError("No feedback to serialize; run seed_benchmark_data first.")
+
+        self.stdout.write(
+            f"{'fields':<44}{'items':>7}{'serializer ms':>15}{'values ms':>11}{'speedup':>9}"
+            f"{'  with query:':<14}{'serializer ms':>14}{'values ms':>11}{'speedup':>9}"
+        )
+        for fields in [None, *options['fields']]:
+            try:
+                result = bench_serialization(feedbacks, user, options['items'], fields, options['repeat'])
+            except ValidationError as e:
+                raise CommandError(e.detail['fields'])
+            label = fields or 'all'
+            self.stdout.write(
+                f"{label:<44}{result['items']:>7}{result['serializer_ms']:>15.1f}{result['values_ms']:>11.1f}"
+                f"{result['serializer_ms'] / result['values_ms']:>8.1f}x{'':<14}"
+                f"{result['serializer_with_query_ms']:>14.1f}{result['values_with_query_ms']:>11.1f}"
+                f"{result['serializer_with_query_ms'] / result['values_with_query_ms']:>8.1f}x"
+            )
@@ -0,0 +1,88 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from feedback_app.benchmarks import percentile
+from feedback_app.models import Board, Feedback
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer toggle_upvote on one feedback from many threads and report toggles/s, latency and "
+        "errors for the configured database. Run once per DB_ENGINE / SQLITE_WAL setting to compare. "
+        "Creates a scratch board and users and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds per run.")
+
+    def handle(self, *args, **options):
+        board = Board.objects.create(name='upvote contention benchmark', is_public=False)
+        users = [User(username=f'bench-voter-{i}', password='!') for i in range(max(options['threads']))]
+        users = User.objects.bulk_create(users)
+        try:
+            feedback = Feedback.objects.create(board=board, user=users[0], title='Benchmark', description='')
+            connection.close()  # the worker threads open their own
+
+            vendor = connection.vendor
+            self.stdout.write(f"database: {vendor} ({connection.settings_dict['NAME']})")
+            self.stdout.write(f"{'threads':>8}{'toggles':>10}{'errors':>8}{'toggles/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+            for thread_count in options['threads']:
+                result = self.run(feedback.id, users[:thread_count], options['duration'])
+                self.stdout.write(
+                    f"{thread_count:>8}{result['toggles']:>10}{result['errors']:>8}"
+                    f"{result['throughput']:>12.1f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+                )
+
+            feedback.refresh_from_db()
+            if feedback.upvote_count != feedback.upvoted_by.count():
+                self.stderr.write(self.style.ERROR("upvote_count drifted from the vote rows under contention."))
+        finally:
+            board.delete()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+    def run(self, feedback_id, users, duration):
+        latencies, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(users))
+
+        def voter(user):
+            feedback = Feedback.objects.get(id=feedback_id)
+            own_latencies, own_errors = [], 0
+            barrier.wait()
+            deadline = time.perf_counter() + duration
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        feedback.toggle_upvote(user)
+                    except Exception:
+                        own_errors += 1
+                        continue
+                    own_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(own_latencies)
+                errors.append(own_errors)
+
+        threads = [threading.Thread(target=voter, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'toggles': len(latencies),
+            'errors': sum(errors),
+            'throughput': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+        }
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from feedback_app.bulk import export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream boards, feedbacks, comments and upvotes to NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument('--board', type=int, action='append', dest='boards',
+                            help="Board id to export; repeat for several. Defaults to all boards.")
+        parser.add_argument('--output', help="File to write to. Defaults to stdout.")
+
+    def handle(self, *args, **options):
+        lines = export_lines(options['format'], options['boards'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
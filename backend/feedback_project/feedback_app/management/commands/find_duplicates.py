@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from feedback_app.duplicates import DEFAULT_THRESHOLD, duplicate_pairs, index_feedback_ids
+from feedback_app.models import Feedback
+
+
+class Command(BaseCommand):
+    help = "List near-duplicate feedback pairs, optionally (re)building the fingerprint index first."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', type=int, help="Only check this board.")
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help="Minimum Jaccard similarity to report.")
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Fingerprint every feedback first, e.g. after upgrading or a raw SQL import.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            feedbacks = Feedback.objects.order_by('id')
+            if options['board']:
+                feedbacks = feedbacks.filter(board_id=options['board'])
+            index_feedback_ids(
+                feedbacks.values_list('id', flat=True).iterator(chunk_size=options['batch_size']),
+                batch_size=options['batch_size'],
+            )
+
+        found = 0
+        for first, second, similarity in duplicate_pairs(options['board'], options['threshold'], options['batch_size']):
+            self.stdout.write(f"{first}\t{second}\t{similarity}")
+            found += 1
+        self.stdout.write(self.style.SUCCESS(f"Found {found} likely duplicate pairs."))
@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback_app.bulk import import_records
+
+
+class Command(BaseCommand):
+    help = "Bulk import boards, feedbacks, comments and upvotes from an NDJSON or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['ndjson', 'csv'],
+                            help="Defaults to csv for *.csv files, ndjson otherwise.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--create-users', action='store_true',
+                            help="Create users that don't exist yet, with unusable passwords.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        try:
+            with open(path, encoding='utf-8', newline='') as lines:
+                result = import_records(
+                    lines, fmt=fmt, chunk_size=options['chunk_size'], create_users=options['create_users']
+                )
+        except OSError as e:
+            raise CommandError(e)
+
+        for error in result['errors']:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {json.dumps(result['created'])} with {result['error_count']} rejected records."
+        ))
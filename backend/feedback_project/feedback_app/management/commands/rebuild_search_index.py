@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from feedback_app.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the full-text search index over feedback and comments."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
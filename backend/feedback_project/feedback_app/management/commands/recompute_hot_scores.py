@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from feedback_app.models import Feedback
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Feedback.hot_score in batches. Run periodically with the 'gravity' ranking, "
+        "or once after changing the RANKING settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--board', type=int, help="Only recompute this board.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        feedbacks = Feedback.objects.order_by('id')
+        if options['board']:
+            feedbacks = feedbacks.filter(board_id=options['board'])
+
+        last_id, updated = 0, 0
+        while True:
+            batch_ids = list(feedbacks.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not batch_ids:
+                break
+            last_id = batch_ids[-1]
+            Feedback.refresh_hot_scores(batch_ids, batch_size=batch_size)
+            updated += len(batch_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed hot scores for {updated} feedbacks."))
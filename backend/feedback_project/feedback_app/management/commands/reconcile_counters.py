@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from feedback_app.models import Feedback
+from feedback_app.stats_cache import invalidate_board_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute drifted Feedback.comment_count and upvote_count values in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        counters = Feedback.actual_counters()
+
+        last_id, checked, fixed = 0, 0, 0
+        while True:
+            batch_ids = list(
+                Feedback.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+            last_id = batch_ids[-1]
+            checked += len(batch_ids)
+
+            drifted = list(
+                Feedback.objects.filter(id__in=batch_ids)
+                .annotate(actual_comments=counters['comment_count'], actual_upvotes=counters['upvote_count'])
+                .filter(~Q(comment_count=F('actual_comments')) | ~Q(upvote_count=F('actual_upvotes')))
+                .values_list('id', 'board_id')
+            )
+            if not drifted or options['dry_run']:
+                fixed += len(drifted)
+                continue
+
+            drifted_ids = [feedback_id for feedback_id, _ in drifted]
+            Feedback.objects.filter(id__in=drifted_ids).update(**counters)
+            Feedback.refresh_hot_scores(drifted_ids)
+            for board_id in {board_id for _, board_id in drifted}:
+                invalidate_board_stats(board_id)
+            fixed += len(drifted)
+
+        verb = "Found" if options['dry_run'] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} feedbacks. {verb} {fixed} with drifted counters."))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from feedback_app.benchmarks import generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the configured database with synthetic boards, users, feedbacks, comments and upvotes for "
+        "bench_api. Use a scratch database (SQLITE_PATH=/tmp/bench.sqlite3 or POSTGRES_DB); "
+        "millions of rows are fine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--boards', type=int, default=5)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--feedbacks', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--upvotes', type=int, default=100000)
+        parser.add_argument('--days', type=int, default=90, help="Spread timestamps over this many days.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--index', action='store_true', help="Also build the search and duplicate indexes.")
+
+    def handle(self, *args, **options):
+        summary = generate(
+            boards=options['boards'], users=options['users'], feedbacks=options['feedbacks'],
+            comments=options['comments'], upvotes=options['upvotes'], days=options['days'],
+            batch_size=options['batch_size'], seed=options['seed'], index=options['index'],
+            log=self.stdout.write,
+        )
+        board_ids = ', '.join(map(str, summary['boards']))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created dataset {summary['run']}: boards {board_ids}; {summary['users']} users, "
+            f"{summary['feedbacks']} feedbacks, {summary['comments']} comments, {summary['upvotes']} upvotes."
+        ))
@@ -0,0 +1,215 @@
+"""
+Per-route request metrics in the Prometheus text format.
+
+middleware.request_metrics times every request. A query wrapper installed
+on each database connection (see signals.py) counts and times its SQL, and
+serializers.TimedSerializerMixin adds the time spent turning models into
+data. Requests are labelled by URL name (e.g. feedback-list) and method, and
+the totals are served at /metrics.
+
+The numbers are per process, like the board stats cache counters. With
+several workers, scrape each one or accept that one worker's share is
+reported.
+
+When SLOW_REQUEST_MS is set, requests slower than that are logged as
+warnings on the 'feedback_app.metrics' logger together with their
+SLOW_REQUEST_QUERIES slowest queries.
+"""
+import contextvars
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_serializing = contextvars.ContextVar('serializing', default=False)
+
+
+class RequestMetrics:
+    """What one request spent, filled in by the query wrapper and serializers while it runs."""
+
+    def __init__(self, keep_queries=0):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.keep_queries = keep_queries
+        self.slowest = []  # min-heap of (seconds, sql)
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.query_seconds += seconds
+        if self.keep_queries:
+            entry = (seconds, sql)
+            if len(self.slowest) < self.keep_queries:
+                heapq.heappush(self.slowest, entry)
+            elif entry > self.slowest[0]:
+                heapq.heapreplace(self.slowest, entry)
+
+
+def start_request():
+    """Starts collecting for the request running in this context; pass the token to end_request."""
+    keep = settings.SLOW_REQUEST_QUERIES if settings.SLOW_REQUEST_MS is not None else 0
+    return _current.set(RequestMetrics(keep_queries=keep))
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Connection execute wrapper adding each query's count and time to the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+@contextmanager
+def serializer_timer():
+    # Only the outermost serializer is timed, so nested ones aren't counted twice
+    metrics = _current.get()
+    if metrics is None or _serializing.get():
+        yield
+        return
+    token = _serializing.set(True)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_seconds += time.perf_counter() - started
+        _serializing.reset(token)
+
+
+class Registry:
+    """Thread-safe per-route totals and histograms for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = defaultdict(int)  # (route, method, status) -> count
+            self._routes = defaultdict(lambda: {
+                'buckets': [0] * len(DURATION_BUCKETS),
+                'count': 0,
+                'seconds': 0.0,
+                'queries': 0,
+                'query_seconds': 0.0,
+                'response_bytes': 0,
+                'serializer_seconds': 0.0,
+            })
+
+    def observe(self, route, method, status, seconds, metrics, response_bytes):
+        with self._lock:
+            self._requests[(route, method, str(status))] += 1
+            totals = self._routes[(route, method)]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    totals['buckets'][i] += 1
+                    break
+            totals['count'] += 1
+            totals['seconds'] += seconds
+            totals['queries'] += metrics.queries
+            totals['query_seconds'] += metrics.query_seconds
+            totals['response_bytes'] += response_bytes
+            totals['serializer_seconds'] += metrics.serializer_seconds
+
+    def snapshot(self):
+        with self._lock:
+            requests = dict(self._requests)
+            routes = {key: {**totals, 'buckets': list(totals['buckets'])} for key, totals in self._routes.items()}
+        return requests, routes
+
+
+registry = Registry()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def exposition():
+    """The registry in the Prometheus text exposition format (version 0.0.4)."""
+    requests, routes = registry.snapshot()
+    lines = [
+        '# HELP feedback_http_requests_total Requests handled, by route, method and status.',
+        '# TYPE feedback_http_requests_total counter',
+    ]
+    for (route, method, status), count in sorted(requests.items()):
+        lines.append(f'feedback_http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+    lines += [
+        '# HELP feedback_http_request_duration_seconds Request latency, by route and method.',
+        '# TYPE feedback_http_request_duration_seconds histogram',
+    ]
+    for (route, method), totals in sorted(routes.items()):
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, totals['buckets']):
+            cumulative += count
+            lines.append(
+                f'feedback_http_request_duration_seconds_bucket{_labels(route=route, method=method, le=bound)} {cumulative}'
+            )
+        labels = _labels(route=route, method=method)
+        lines.append(f'feedback_http_request_duration_seconds_bucket{_labels(route=route, method=method, le="+Inf")} {totals["count"]}')
+        lines.append(f'feedback_http_request_duration_seconds_sum{labels} {_number(totals["seconds"])}')
+        lines.append(f'feedback_http_request_duration_seconds_count{labels} {totals["count"]}')
+
+    for name, key, help_text in (
+        ('feedback_db_queries_total', 'queries', 'SQL queries run while handling requests.'),
+        ('feedback_db_query_seconds_total', 'query_seconds', 'Time spent in SQL queries.'),
+        ('feedback_http_response_bytes_total', 'response_bytes', 'Response body bytes (not counting streamed responses).'),
+        ('feedback_serializer_seconds_total', 'serializer_seconds', 'Time spent in DRF serializers.'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (route, method), totals in sorted(routes.items()):
+            lines.append(f'{name}{_labels(route=route, method=method)} {_number(totals[key])}')
+    return '\n'.join(lines) + '\n'
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+def finish_request(request, response, started):
+    """Records the finished request and logs it if it was slow."""
+    seconds = time.perf_counter() - started
+    metrics = _current.get()
+    route = route_name(request)
+    size = 0 if response.streaming else len(response.content)
+    registry.observe(route, request.method, response.status_code, seconds, metrics, size)
+
+    if settings.SLOW_REQUEST_MS is not None and seconds * 1000 >= settings.SLOW_REQUEST_MS:
+        worst = ''.join(
+            f'\n  {query_seconds * 1000:.1f} ms: {sql[:500]}'
+            for query_seconds, sql in sorted(metrics.slowest, reverse=True)
+        )
+        logger.warning(
+            "Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms, serializers %.0f ms%s",
+            request.method, request.get_full_path(), route, seconds * 1000,
+            metrics.queries, metrics.query_seconds * 1000, metrics.serializer_seconds * 1000, worst,
+        )
@@ -0,0 +1,48 @@
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.decorators import sync_and_async_middleware
+
+from . import metrics
+
+
+@sync_and_async_middleware
+def request_metrics(get_response):
+    """Records latency, SQL and serializer time per route for /metrics; see metrics.py."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token, started = metrics.start_request(), time.perf_counter()
+            try:
+                response = await get_response(request)
+                metrics.finish_request(request, response, started)
+                return response
+            finally:
+                metrics.end_request(token)
+    else:
+        def middleware(request):
+            token, started = metrics.start_request(), time.perf_counter()
+            try:
+                response = get_response(request)
+                metrics.finish_request(request, response, started)
+                return response
+            finally:
+                metrics.end_request(token)
+    return middleware
+
+
+@sync_and_async_middleware
+def async_read_path(get_response):
+    """Sends ASGI requests through ASYNC_ROOT_URLCONF so hot GETs hit the async views."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            request.urlconf = settings.ASYNC_ROOT_URLCONF
+            return await get_response(request)
+    else:
+        def middleware(request):
+            # A sync chain can still be serving ASGI when some middleware is sync-only
+            if isinstance(request, ASGIRequest):
+                request.urlconf = settings.ASYNC_ROOT_URLCONF
+            return get_response(request)
+    return middleware
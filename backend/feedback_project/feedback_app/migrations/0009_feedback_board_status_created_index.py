@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:28
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0008_alter_feedback_created_at_alter_feedback_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='feedback',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='status',
+            field=models.CharField(choices=[('Open', 'Open'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], db_index=True, default='Open', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['board', 'status', '-created_at'], name='feedback_board_status_created'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:31
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0010_comment_feedback_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(models.F('board'), models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('upvote_count'), '+', models.F('comment_count')), descending=True), models.OrderBy(models.F('id'), descending=True), name='feedback_board_engagement'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from feedback_app.search import get_backend
+
+
+def create_search_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    with schema_editor.connection.cursor() as cursor:
+        backend.create_index(cursor)
+        backend.populate(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        get_backend(schema_editor.connection).drop_index(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0011_feedback_board_engagement_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0012_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='feedback_app.board')),
+                ('feedback', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='feedback_app.feedback')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'band', 'bucket'], name='fingerprint_board_bucket')],
+            },
+        ),
+    ]
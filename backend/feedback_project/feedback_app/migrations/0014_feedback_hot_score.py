@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+from feedback_app.ranking import hot_score
+
+
+def compute_hot_scores(apps, schema_editor):
+    Feedback = apps.get_model('feedback_app', 'Feedback')
+    feedbacks = Feedback.objects.only('id', 'upvote_count', 'comment_count', 'created_at')
+    batch = []
+    for feedback in feedbacks.iterator(chunk_size=1000):
+        feedback.hot_score = hot_score(feedback.upvote_count, feedback.comment_count, feedback.created_at)
+        batch.append(feedback)
+        if len(batch) == 1000:
+            Feedback.objects.bulk_update(batch, ['hot_score'])
+            batch = []
+    Feedback.objects.bulk_update(batch, ['hot_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0013_feedbackfingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(compute_hot_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['board', '-hot_score', '-id'], name='feedback_board_hot'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0014_feedback_hot_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('Open', 'Open'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], max_length=20)),
+                ('new_feedbacks', models.IntegerField(default=0)),
+                ('status_changes', models.IntegerField(default=0)),
+                ('upvotes', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='feedback_app.board')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('board', 'day', 'status'), name='board_activity_unique_day')],
+            },
+        ),
+    ]
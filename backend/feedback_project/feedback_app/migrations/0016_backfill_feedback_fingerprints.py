@@ -0,0 +1,38 @@
+from django.db import migrations
+
+from feedback_app.duplicates import fingerprint
+
+BATCH_SIZE = 1000
+
+
+def backfill_fingerprints(apps, schema_editor):
+    # Feedback from before 0013 has no fingerprints, so duplicate detection would never match it
+    Feedback = apps.get_model('feedback_app', 'Feedback')
+    FeedbackFingerprint = apps.get_model('feedback_app', 'FeedbackFingerprint')
+    db = schema_editor.connection.alias
+    last_id = 0
+    while True:
+        batch = list(
+            Feedback.objects.using(db).filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'board_id', 'title', 'description')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        FeedbackFingerprint.objects.using(db).filter(feedback_id__in=[row[0] for row in batch]).delete()
+        FeedbackFingerprint.objects.using(db).bulk_create([
+            FeedbackFingerprint(feedback_id=feedback_id, board_id=board_id, band=band, bucket=bucket)
+            for feedback_id, board_id, title, description in batch
+            for band, bucket in fingerprint(title, description)
+        ], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0015_board_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
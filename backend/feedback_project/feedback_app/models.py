@@ -1,8 +1,19 @@
+from collections import defaultdict
+
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models import Count, F, Sum
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Sum, Window
+from django.db.models.functions import Coalesce, Greatest, RowNumber
 from django.utils import timezone
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from . import realtime
+from .ranking import hot_score
+from .stats_cache import invalidate_board_stats
+
+def count_of(queryset, key):
+    """Correlated COUNT subquery over `queryset` grouped by `key`, 0 when there are no rows."""
+    counted = queryset.order_by().values(key).annotate(total=Count('*')).values('total')
+    return Coalesce(Subquery(counted, output_field=models.IntegerField()), 0)
 
 class UserProfile(models.Model):
     ROLE_CHOICES = [('admin', 'Admin'),('moderator', 'Moderator'),('contributor', 'Contributor'),]
@@ -10,46 +21,55 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='userprofile')#Each user has one profile
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='contributor')
 
+    @staticmethod
+    def activity_counters():
+        """
+        Per-user activity as correlated COUNT subqueries on each table's user_id
+        index, for annotating a page of users without a query per user.
+        """
+        return {
+            'feedback_count': count_of(Feedback.objects.filter(user_id=OuterRef('pk')), 'user_id'),
+            'comment_count': count_of(Comment.objects.filter(user_id=OuterRef('pk')), 'user_id'),
+            'upvotes_given': count_of(Feedback.upvoted_by.through.objects.filter(user_id=OuterRef('pk')), 'user_id'),
+        }
+
+ENGAGEMENT_SCORE = F('upvote_count') + F('comment_count')
+
 class Board(models.Model):
     name = models.CharField(max_length=255)
     is_public = models.BooleanField(default=True)
 
-    def get_stats(self):
-        feedbacks = (
-            self.feedbacks.annotate(
-                engagement_score=(F('upvote_count') + F('comment_count'))
-            ).values(
-                'id', 
-                'title', 
-                'status',
-                'engagement_score'
-            )
+    def _stats_queries(self):
+        # Both parts run in the database: a GROUP BY status for the counts and an
+        # indexed ORDER BY hot_score ... LIMIT 5 for trending, so no feedback rows are loaded.
+        status_counts = self.feedbacks.order_by().values_list('status').annotate(count=Count('id'))
+        trending_feedbacks = (
+            self.feedbacks.annotate(engagement_score=ENGAGEMENT_SCORE)
+            .order_by('-hot_score', '-id')
+            .values('id', 'title', 'status', 'engagement_score')[:5]
         )
-        
-        trending_feedbacks = sorted(
-            feedbacks,
-            key=lambda x: x['engagement_score'],
-            reverse=True
-        )[:5]
-        
-        status_counts = {}
-        active_count = 0
-        total_count = 0
-        
-        for feedback in feedbacks:
-            status = feedback['status']
-            status_counts[status] = status_counts.get(status, 0) + 1
-            if status == 'Open':
-                active_count += 1
-            total_count += 1
-        
+        return status_counts, trending_feedbacks
+
+    @staticmethod
+    def _stats(status_counts, trending_feedbacks):
         return {
-            'active_feedbacks': active_count,
-            'total_feedbacks': total_count,
+            'active_feedbacks': status_counts.get('Open', 0),
+            'total_feedbacks': sum(status_counts.values()),
             'trending_feedbacks': trending_feedbacks,
             'feedbacks_by_status': status_counts
         }
 
+    def get_stats(self):
+        status_counts, trending_feedbacks = self._stats_queries()
+        return self._stats(dict(status_counts), list(trending_feedbacks))
+
+    async def aget_stats(self):
+        status_counts, trending_feedbacks = self._stats_queries()
+        return self._stats(
+            {status: count async for status, count in status_counts},
+            [feedback async for feedback in trending_feedbacks],
+        )
+
 class Feedback(models.Model):
     STATUS_CHOICES = [
         ('Open', 'Open'),
@@ -71,21 +91,134 @@ class Feedback(models.Model):
     comment_count = models.PositiveIntegerField(default=0)
     upvoted_by = models.ManyToManyField(User, related_name='upvoted_feedbacks',blank=True)
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # Time-decayed rank, kept current on every vote/comment change; see ranking.py
+    hot_score = models.FloatField(default=0)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Backs the board/status filtered, newest-first feedback list
+            models.Index(fields=['board', 'status', '-created_at'], name='feedback_board_status_created'),
+            # Lets ?ordering=top walk the top of the index and stop
+            models.Index(F('board'), ENGAGEMENT_SCORE.desc(), F('id').desc(), name='feedback_board_engagement'),
+            # Same for ?ordering=hot and the trending list in Board.get_stats
+            models.Index(fields=['board', '-hot_score', '-id'], name='feedback_board_hot'),
+        ]
+
+    SCORE_FIELDS = {'upvote_count', 'comment_count', 'created_at'}
+
+    def save(self, *args, **kwargs):
+        self.hot_score = hot_score(self.upvote_count, self.comment_count, self.created_at)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.SCORE_FIELDS & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'hot_score'}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def refresh_hot_scores(feedback_ids, batch_size=1000):
+        """Recomputes the stored hot_score of the given feedbacks from their current counters."""
+        feedback_ids = list(feedback_ids)
+        for start in range(0, len(feedback_ids), batch_size):
+            feedbacks = list(
+                Feedback.objects.filter(id__in=feedback_ids[start:start + batch_size])
+                .only('id', 'upvote_count', 'comment_count', 'created_at')
+            )
+            for feedback in feedbacks:
+                feedback.hot_score = hot_score(feedback.upvote_count, feedback.comment_count, feedback.created_at)
+            Feedback.objects.bulk_update(feedbacks, ['hot_score'])
+
+    @staticmethod
+    def upvoted_by_user(user):
+        """
+        EXISTS probe of the vote table's (feedback, user) unique index, for
+        annotating a page with whether `user` upvoted each feedback.
+        """
+        votes = Feedback.upvoted_by.through.objects.filter(feedback_id=OuterRef('pk'), user_id=user.pk)
+        return Exists(votes)
+
+    @staticmethod
+    def actual_counters():
+        """
+        Correlated COUNT subqueries giving each feedback's real comment and
+        upvote totals, for recomputing the stored counters in a single UPDATE.
+        """
+        return {
+            'comment_count': count_of(Comment.objects.filter(feedback_id=OuterRef('pk')), 'feedback_id'),
+            'upvote_count': count_of(Feedback.upvoted_by.through.objects.filter(feedback_id=OuterRef('pk')), 'feedback_id'),
+        }
+
+    @staticmethod
+    def adjust_comment_count(feedback_id, delta, board_id):
+        # Atomic in-place +1/-1; never lets a drifted counter go below zero
+        feedbacks = Feedback.objects.filter(id=feedback_id)
+        if delta < 0:
+            feedbacks = feedbacks.filter(comment_count__gte=-delta)
+        feedbacks.update(comment_count=F('comment_count') + delta)
+        Feedback.refresh_hot_scores([feedback_id])
+        invalidate_board_stats(board_id)
+
+    @staticmethod
+    def remove_comments(counts, batch_size=1000):
+        """
+        Takes counts[feedback_id] deleted comments off each feedback's counter
+        with one UPDATE per distinct count and one hot score refresh per batch,
+        however many comments went. Returns {feedback_id: board_id} for the
+        feedbacks that still exist.
+        """
+        feedback_ids = list(counts)
+        board_ids = {}
+        for start in range(0, len(feedback_ids), batch_size):
+            batch = dict(
+                Feedback.objects.filter(id__in=feedback_ids[start:start + batch_size]).order_by().values_list('id', 'board_id')
+            )
+            by_count = defaultdict(list)
+            for feedback_id in batch:
+                by_count[counts[feedback_id]].append(feedback_id)
+            for count, ids in by_count.items():
+                Feedback.objects.filter(id__in=ids).update(comment_count=Greatest(F('comment_count') - count, 0))
+            Feedback.refresh_hot_scores(batch, batch_size=batch_size)
+            board_ids.update(batch)
+        for board_id in set(board_ids.values()):
+            invalidate_board_stats(board_id)
+        return board_ids
 
     def toggle_upvote(self, user):
-        if self.upvoted_by.filter(id=user.id).exists():
-            self.upvoted_by.remove(user)
-        else:
-            self.upvoted_by.add(user)
+        """
+        Adds or removes the user's vote in one transaction. The unique
+        (feedback, user) row in the through table decides the vote state and
+        upvote_count moves with an F() increment, so concurrent voters can't
+        lose each other's updates. Returns only the caller's state and the count.
+        """
+        votes = Feedback.upvoted_by.through.objects
+        with transaction.atomic():
+            removed, _ = votes.filter(feedback_id=self.id, user_id=user.id).delete()
+            if removed:
+                has_upvoted, delta = False, -1
+            else:
+                try:
+                    with transaction.atomic():
+                        votes.create(feedback_id=self.id, user_id=user.id)
+                    has_upvoted, delta = True, 1
+                except IntegrityError:
+                    # A concurrent request from the same user inserted the vote first
+                    has_upvoted, delta = True, 0
 
-        self.upvote_count = self.upvoted_by.count()
-        self.save(update_fields=['upvote_count'])
+            feedbacks = Feedback.objects.filter(id=self.id)
+            if delta:
+                feedbacks.update(upvote_count=F('upvote_count') + delta)
+            self.upvote_count, comment_count, created_at = (
+                feedbacks.values_list('upvote_count', 'comment_count', 'created_at').get()
+            )
+            if delta:
+                self.hot_score = hot_score(self.upvote_count, comment_count, created_at)
+                feedbacks.update(hot_score=self.hot_score)
+                BoardActivity.record(self.board_id, timezone.localdate(), self.status, upvotes=delta)
 
+        invalidate_board_stats(self.board_id)
+        if delta:
+            realtime.publish(self.board_id, 'feedback.upvotes', id=self.id, upvote_count=self.upvote_count)
         return {
-            "upvoted_by": list(self.upvoted_by.values_list('id', flat=True)),  
+            "has_upvoted": has_upvoted,
             "upvote_count": self.upvote_count,
         }
 
@@ -97,10 +230,81 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Serves "latest comments per feedback" without sorting each feedback's comments
+            models.Index(fields=['feedback', '-created_at'], name='comment_feedback_created'),
+        ]
+
+    @classmethod
+    def latest_for(cls, feedback_ids, limit):
+        # One windowed query: number each feedback's comments newest-first and keep the top `limit`
+        return (
+            cls.objects.filter(feedback_id__in=feedback_ids)
+            .select_related('user')
+            .annotate(position=Window(
+                expression=RowNumber(),
+                partition_by=[F('feedback_id')],
+                order_by=F('created_at').desc(),
+            ))
+            .filter(position__lte=limit)
+            .order_by('feedback_id', 'position')
+        )
 
     def save(self, *args, **kwargs):
         is_new = self._state.adding
-        super().save(*args, **kwargs)
-        if is_new:
-            self.feedback.comment_count = self.feedback.comments.count()
-            self.feedback.save(update_fields=['comment_count'])  
\ No newline at end of file
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                Feedback.adjust_comment_count(self.feedback_id, 1, board_id=self.feedback.board_id)
+
+
+class FeedbackFingerprint(models.Model):
+    """
+    One MinHash LSH band of a feedback's text. Feedbacks sharing a (band, bucket)
+    on the same board are near-duplicate candidates; see duplicates.py.
+    """
+    feedback = models.ForeignKey(Feedback, on_delete=models.CASCADE, related_name='fingerprints')
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='+')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'band', 'bucket'], name='fingerprint_board_bucket'),
+        ]
+
+
+class BoardActivity(models.Model):
+    """
+    Daily activity rollup per board and feedback status, kept by the signal
+    handlers as things happen and rebuilt by `backfill_activity`; see rollups.py.
+    upvotes is the day's net change, so retracted votes count negative.
+    """
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='activity')
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Feedback.STATUS_CHOICES)
+    new_feedbacks = models.IntegerField(default=0)
+    status_changes = models.IntegerField(default=0)  # feedbacks moved into this status
+    upvotes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+
+    COUNTERS = ('new_feedbacks', 'status_changes', 'upvotes', 'comments')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'day', 'status'], name='board_activity_unique_day'),
+        ]
+
+    @classmethod
+    def record(cls, board_id, day, status, **deltas):
+        """Adds `deltas` to the day's counters with an atomic F() update, creating the row on first use."""
+        increments = {name: F(name) + delta for name, delta in deltas.items()}
+        rows = cls.objects.filter(board_id=board_id, day=day, status=status)
+        if rows.update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(board_id=board_id, day=day, status=status, **deltas)
+        except IntegrityError:
+            # Another writer created the row between our UPDATE and INSERT
+            rows.update(**increments)
@@ -0,0 +1,60 @@
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+from .models import ENGAGEMENT_SCORE
+
+
+class FeedbackCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the feedback list.
+    The cursor encodes the last seen value of the sort key, so each page is a
+    bounded index range scan instead of an OFFSET over the whole table.
+    `?ordering=` picks the sort key; each one has a matching index.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', 'id')
+    orderings = {
+        'new': ('-created_at', 'id'),
+        'hot': ('-hot_score', '-id'),
+        'top': ('-engagement_score', '-id'),
+    }
+    # Columns the cursor position is read from, for values() querysets to select
+    # (engagement_score is annotated by paginate_queryset itself)
+    position_columns = ('id', 'created_at', 'hot_score')
+
+    def get_ordering(self, request, queryset, view):
+        choice = request.query_params.get('ordering', 'new')
+        if choice not in self.orderings:
+            raise ValidationError({'ordering': f"Must be one of {', '.join(self.orderings)}."})
+        return self.orderings[choice]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get('ordering') == 'top':
+            queryset = queryset.annotate(engagement_score=ENGAGEMENT_SCORE)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # DRF's paginator evaluates the page with a plain list(); run it the way the
+        # async ORM runs its queries, in the request's sync worker thread.
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+
+class UserDirectoryPagination(CursorPagination):
+    """Keyset pagination for the user directory, by username or newest first."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('username',)
+    orderings = {
+        'username': ('username',),
+        'joined': ('-date_joined', '-id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        choice = request.query_params.get('ordering', 'username')
+        if choice not in self.orderings:
+            raise ValidationError({'ordering': f"Must be one of {', '.join(self.orderings)}."})
+        return self.orderings[choice]
@@ -0,0 +1,48 @@
+"""
+Time-decayed "hot" scores for ranking feedback.
+
+Each feedback stores its score in Feedback.hot_score, indexed per board, so
+`?ordering=hot` and the trending list are index scans rather than a sort
+over computed values. The score is recomputed whenever a feedback's votes or
+comments change, and in batches by `recompute_hot_scores`.
+
+Two formulas are available through settings.RANKING['ALGORITHM']:
+
+* 'log' (default, Reddit-style): log10(points) + created_at / DECAY_SECONDS.
+  Every tenfold increase in points is worth DECAY_SECONDS of recency. A
+  score never changes while the points stay the same, so new items overtake
+  old ones without any periodic work.
+* 'gravity' (Hacker News-style): points / (age_hours + 2) ** GRAVITY. This
+  decays with wall-clock time, so run `recompute_hot_scores` periodically
+  (e.g. every few minutes from cron) to keep the stored order current.
+
+Points are upvotes plus COMMENT_WEIGHT per comment.
+"""
+import math
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def points(upvote_count, comment_count):
+    return upvote_count + settings.RANKING['COMMENT_WEIGHT'] * comment_count
+
+
+def log_score(points, created_at, now):
+    return math.log10(max(points, 1)) + created_at.timestamp() / settings.RANKING['DECAY_SECONDS']
+
+
+def gravity_score(points, created_at, now):
+    age_hours = max((now - created_at).total_seconds(), 0) / 3600
+    return points / (age_hours + 2) ** settings.RANKING['GRAVITY']
+
+
+ALGORITHMS = {
+    'log': log_score,
+    'gravity': gravity_score,
+}
+
+
+def hot_score(upvote_count, comment_count, created_at, now=None):
+    score = ALGORITHMS[settings.RANKING['ALGORITHM']]
+    return score(points(upvote_count, comment_count), created_at, now or timezone.now())
@@ -0,0 +1,159 @@
+"""
+Per-board change events for live clients.
+
+Writes publish small deltas (feedback created/updated/deleted, upvote counts,
+comments) to a broker once their transaction commits, and the server-sent
+events endpoint streams them to subscribers of that board. The broker is
+chosen by REALTIME_BROKER: the default LocalBroker fans out inside this
+process; RedisBroker shares events between workers.
+
+Streaming needs an ASGI server (e.g. `uvicorn feedback_project.asgi:application`).
+Under WSGI each open stream would hold a worker thread forever, so the
+endpoint answers 501 there and clients poll instead. EventSource can't send
+headers, so clients open the stream with a stream token: a signed value
+valid for one user and board for REALTIME_STREAM_TOKEN_MAX_AGE seconds,
+rather than their API token, which would end up in access logs.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15
+STREAM_TOKEN_SALT = 'feedback_app.realtime.stream'
+
+
+def _deliver(queue, event):
+    # A subscriber that can't keep up is told to refetch instead of growing without bound
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+        event = {'type': 'resync'}
+    queue.put_nowait(event)
+
+
+class LocalBroker:
+    """In-process pub/sub. Safe to publish from any thread; subscribers live on event loops."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, board_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(board_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_deliver, queue, event)
+            except RuntimeError:
+                pass  # loop already closed; its subscription is being torn down
+
+    async def subscribe(self, board_id):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[board_id].add(subscriber)
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            with self._lock:
+                self._subscribers[board_id].discard(subscriber)
+                if not self._subscribers[board_id]:
+                    del self._subscribers[board_id]
+
+
+class RedisBroker:
+    """Redis pub/sub, one channel per board, so every worker sees every event."""
+
+    def __init__(self, url=None):
+        import redis
+        import redis.asyncio
+
+        self.url = url or settings.REALTIME_REDIS_URL
+        self._client = redis.Redis.from_url(self.url)
+        self._async_redis = redis.asyncio
+
+    def _channel(self, board_id):
+        return f'board-events:{board_id}'
+
+    def publish(self, board_id, event):
+        self._client.publish(self._channel(board_id), json.dumps(event, cls=DjangoJSONEncoder))
+
+    async def subscribe(self, board_id):
+        client = self._async_redis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(self._channel(board_id))
+        try:
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    yield json.loads(message['data'])
+        finally:
+            await pubsub.unsubscribe()
+            await client.aclose()
+
+
+_brokers = {}
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    path = settings.REALTIME_BROKER
+    with _broker_lock:
+        if path not in _brokers:
+            _brokers[path] = import_string(path)()
+        return _brokers[path]
+
+
+def stream_token(user_id, board_id):
+    return signing.dumps({'user': user_id, 'board': board_id}, salt=STREAM_TOKEN_SALT, compress=True)
+
+
+def read_stream_token(value, board_id):
+    """The user id a stream token was issued to, or None if it is invalid, expired or for another board."""
+    try:
+        payload = signing.loads(value, salt=STREAM_TOKEN_SALT, max_age=settings.REALTIME_STREAM_TOKEN_MAX_AGE)
+    except signing.BadSignature:  # includes SignatureExpired
+        return None
+    if payload.get('board') != board_id:
+        return None
+    return payload.get('user')
+
+
+def publish(board_id, event_type, **payload):
+    """Queues an event for the board, sent only if the surrounding transaction commits."""
+    event = {'type': event_type, 'board': board_id, **payload}
+    transaction.on_commit(lambda: get_broker().publish(board_id, event))
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def event_stream(board_id):
+    """Server-sent events for one board, with comment heartbeats to keep proxies from timing out."""
+    yield f"retry: 3000\nevent: ready\ndata: {json.dumps({'board': board_id})}\n\n"
+    events = get_broker().subscribe(board_id)
+    next_event = asyncio.ensure_future(anext(events))
+    try:
+        while True:
+            # Keep waiting on the same pending read across heartbeats so no event is dropped
+            done, _ = await asyncio.wait({next_event}, timeout=HEARTBEAT_SECONDS)
+            if not done:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(next_event.result())
+            next_event = asyncio.ensure_future(anext(events))
+    finally:
+        next_event.cancel()
+        try:
+            await next_event
+        except (asyncio.CancelledError, StopAsyncIteration):
+            pass
+        await events.aclose()
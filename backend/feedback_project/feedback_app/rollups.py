@@ -0,0 +1,126 @@
+"""
+Daily activity rollups and the board timeseries built from them.
+
+BoardActivity holds one row per board, day and feedback status with the
+number of new feedbacks, status changes, net upvotes and comments. The signal
+handlers in signals.py (and Feedback.toggle_upvote) add to the current row as
+things happen, so a timeseries over months reads a few hundred small rows
+instead of grouping every feedback, vote and comment on the board.
+
+`backfill` rebuilds the rows from the current data, for boards that existed
+before the rollups. Bulk imports add their rows with `add_feedbacks`
+instead. Both can only approximate history:
+votes have no timestamp, so they count on the feedback's creation day,
+feedbacks and comments count under the feedback's current status, and past
+status changes are not recorded anywhere, so they stay at zero.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+
+from .models import BoardActivity, Comment, Feedback
+
+BUCKETS = ('day', 'week')
+
+
+def _count(feedbacks, comments, counts):
+    """Adds the activity of `feedbacks` and `comments` to `counts`, keyed by (board_id, day, status)."""
+    feedback_days = (
+        feedbacks.annotate(day=TruncDate('created_at'))
+        .values('board_id', 'day', 'status')
+        .annotate(created=Count('id'), votes=Sum('upvote_count'))
+        .order_by()
+    )
+    for row in feedback_days:
+        key = (row['board_id'], row['day'], row['status'])
+        counts[key]['new_feedbacks'] += row['created']
+        counts[key]['upvotes'] += row['votes'] or 0
+
+    comment_days = (
+        comments.annotate(day=TruncDate('created_at'), board_id=F('feedback__board_id'), status=F('feedback__status'))
+        .values('board_id', 'day', 'status')
+        .annotate(created=Count('id'))
+        .order_by()
+    )
+    for row in comment_days:
+        counts[(row['board_id'], row['day'], row['status'])]['comments'] += row['created']
+    return counts
+
+
+def _empty_counts():
+    return defaultdict(lambda: dict.fromkeys(BoardActivity.COUNTERS, 0))
+
+
+def backfill(board_ids=None, batch_size=1000):
+    """Replaces the rollup rows of `board_ids` (all boards if None) with ones rebuilt from current data."""
+    feedbacks = Feedback.objects.all()
+    comments = Comment.objects.all()
+    existing = BoardActivity.objects.all()
+    if board_ids is not None:
+        feedbacks = feedbacks.filter(board_id__in=board_ids)
+        comments = comments.filter(feedback__board_id__in=board_ids)
+        existing = existing.filter(board_id__in=board_ids)
+
+    counts = _count(feedbacks, comments, _empty_counts())
+    rows = [
+        BoardActivity(board_id=board_id, day=day, status=status, **counters)
+        for (board_id, day, status), counters in counts.items()
+    ]
+    with transaction.atomic():
+        existing.delete()
+        BoardActivity.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def add_feedbacks(feedback_ids, batch_size=1000):
+    """
+    Adds the activity of newly written feedbacks (and their comments and
+    votes) to the rollups, the way backfill would count it, leaving the
+    rest of their boards' rows alone. For bulk imports, which skip the
+    signal handlers.
+    """
+    feedback_ids = list(feedback_ids)
+    counts = _empty_counts()
+    for start in range(0, len(feedback_ids), batch_size):
+        batch = feedback_ids[start:start + batch_size]
+        _count(Feedback.objects.filter(id__in=batch), Comment.objects.filter(feedback_id__in=batch), counts)
+    with transaction.atomic():
+        for (board_id, day, status), counters in counts.items():
+            BoardActivity.record(board_id, day, status, **counters)
+    return len(counts)
+
+
+def _bucket_start(day, bucket):
+    return day - timedelta(days=day.weekday()) if bucket == 'week' else day
+
+
+def timeseries(board_id, start, end, bucket='day'):
+    """
+    Activity of a board between `start` and `end` (inclusive dates), one
+    entry per day or ISO week (starting Monday) with the totals and a
+    per-status breakdown. Buckets without activity are included as zeros.
+    """
+    rows = BoardActivity.objects.filter(board_id=board_id, day__range=(start, end))
+    rows = rows.annotate(bucket=TruncWeek('day') if bucket == 'week' else F('day'))
+    rows = (
+        rows.values('bucket', 'status')
+        .annotate(**{f'total_{name}': Sum(name) for name in BoardActivity.COUNTERS})
+        .order_by('bucket', 'status')
+    )
+
+    step = timedelta(days=7 if bucket == 'week' else 1)
+    series, day = {}, _bucket_start(start, bucket)
+    while day <= end:
+        series[day] = {'date': day.isoformat(), **dict.fromkeys(BoardActivity.COUNTERS, 0), 'by_status': {}}
+        day += step
+
+    for row in rows:
+        point = series[_bucket_start(row['bucket'], bucket)]
+        counters = {name: row[f'total_{name}'] for name in BoardActivity.COUNTERS}
+        point['by_status'][row['status']] = counters
+        for name, value in counters.items():
+            point[name] += value
+    return list(series.values())
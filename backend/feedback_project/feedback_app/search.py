@@ -0,0 +1,244 @@
+"""
+Full-text search over feedback titles, descriptions and comments.
+
+Every feedback and every comment is one document in an inverted index keyed
+by a doc id (feedback id * 2, comment id * 2 + 1) and tagged with its
+feedback id, so single documents can be replaced or removed by primary key.
+The index is an FTS5 virtual table on SQLite and a tsvector table with a GIN
+index on Postgres; other databases fall back to unindexed LIKE matching.
+Search ranks the matching documents and groups them per feedback.
+
+The signal handlers keep the index current; `rebuild_search_index` recreates
+it from scratch.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Comment, Feedback
+
+INDEX_TABLE = 'feedback_app_search'
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+
+def feedback_doc_id(feedback_id):
+    return feedback_id * 2
+
+
+def comment_doc_id(comment_id):
+    return comment_id * 2 + 1
+
+
+class SQLiteSearchBackend:
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} "
+            "USING fts5(feedback_id UNINDEXED, title, body, tokenize='porter unicode61')"
+        )
+
+    def drop_index(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def populate(self, cursor):
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (rowid, feedback_id, title, body) "
+            "SELECT id * 2, id, title, description FROM feedback_app_feedback"
+        )
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (rowid, feedback_id, title, body) "
+            "SELECT id * 2 + 1, feedback_id, '', text FROM feedback_app_comment"
+        )
+
+    def upsert(self, cursor, docs):
+        # FTS5 has no UPSERT; replace each document by rowid
+        cursor.executemany(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", [(doc[0],) for doc in docs])
+        cursor.executemany(
+            f"INSERT INTO {INDEX_TABLE} (rowid, feedback_id, title, body) VALUES (%s, %s, %s, %s)", docs
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.executemany(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", [(doc_id,) for doc_id in doc_ids])
+
+    def match_query(self, terms):
+        # Quote every term so user input can't inject FTS syntax; prefix-match the last one
+        quoted = ['"%s"' % term.replace('"', '""') for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def search(self, cursor, terms, board_id, limit, offset):
+        board_filter = "AND f.board_id = %s" if board_id is not None else ""
+        params = [self.match_query(terms)] + ([board_id] if board_id is not None else []) + [limit, offset]
+        cursor.execute(
+            f"""
+            SELECT s.feedback_id, MIN(s.score) AS score
+            FROM (
+                SELECT feedback_id, rank AS score
+                FROM {INDEX_TABLE}
+                WHERE {INDEX_TABLE} MATCH %s AND rank MATCH 'bm25(0, {TITLE_WEIGHT}, {BODY_WEIGHT})'
+            ) s
+            JOIN feedback_app_feedback f ON f.id = s.feedback_id
+            WHERE 1 = 1 {board_filter}
+            GROUP BY s.feedback_id
+            ORDER BY score, s.feedback_id DESC
+            LIMIT %s OFFSET %s
+            """,
+            params,
+        )
+        # bm25 is lower-is-better; flip it so higher always means more relevant
+        return [(feedback_id, -score) for feedback_id, score in cursor.fetchall()]
+
+
+class PostgresSearchBackend:
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+            "doc_id bigint PRIMARY KEY, feedback_id bigint NOT NULL, document tsvector NOT NULL)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document ON {INDEX_TABLE} USING GIN (document)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_feedback ON {INDEX_TABLE} (feedback_id)")
+
+    def drop_index(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def populate(self, cursor):
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (doc_id, feedback_id, document) "
+            "SELECT id * 2, id, setweight(to_tsvector('english', title), 'A') "
+            "|| setweight(to_tsvector('english', description), 'D') FROM feedback_app_feedback"
+        )
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE} (doc_id, feedback_id, document) "
+            "SELECT id * 2 + 1, feedback_id, setweight(to_tsvector('english', text), 'D') FROM feedback_app_comment"
+        )
+
+    def upsert(self, cursor, docs):
+        cursor.executemany(
+            f"""
+            INSERT INTO {INDEX_TABLE} (doc_id, feedback_id, document)
+            VALUES (%s, %s, setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'D'))
+            ON CONFLICT (doc_id) DO UPDATE SET feedback_id = EXCLUDED.feedback_id, document = EXCLUDED.document
+            """,
+            docs,
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE doc_id = ANY(%s)", [list(doc_ids)])
+
+    def search(self, cursor, terms, board_id, limit, offset):
+        board_filter = "AND f.board_id = %s" if board_id is not None else ""
+        params = [' & '.join(f"{term}:*" for term in terms)]
+        params += ([board_id] if board_id is not None else []) + [limit, offset]
+        cursor.execute(
+            f"""
+            SELECT s.feedback_id, MAX(ts_rank(s.document, query)) AS score
+            FROM {INDEX_TABLE} s
+            CROSS JOIN to_tsquery('english', %s) AS query
+            JOIN feedback_app_feedback f ON f.id = s.feedback_id
+            WHERE s.document @@ query {board_filter}
+            GROUP BY s.feedback_id
+            ORDER BY score DESC, s.feedback_id DESC
+            LIMIT %s OFFSET %s
+            """,
+            params,
+        )
+        return cursor.fetchall()
+
+
+class FallbackSearchBackend:
+    """No inverted index; matches with LIKE so search still works on other databases."""
+
+    def create_index(self, cursor):
+        pass
+
+    def drop_index(self, cursor):
+        pass
+
+    def populate(self, cursor):
+        pass
+
+    def upsert(self, cursor, docs):
+        pass
+
+    def delete(self, cursor, doc_ids):
+        pass
+
+    def search(self, cursor, terms, board_id, limit, offset):
+        matches = Feedback.objects.all()
+        for term in terms:
+            matches = matches.filter(
+                Q(title__icontains=term) | Q(description__icontains=term) | Q(comments__text__icontains=term)
+            )
+        if board_id is not None:
+            matches = matches.filter(board_id=board_id)
+        ids = matches.distinct().order_by('-created_at').values_list('id', flat=True)[offset:offset + limit]
+        return [(feedback_id, 0.0) for feedback_id in ids]
+
+
+def get_backend(conn=None):
+    vendor = (conn or connection).vendor
+    if vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    if vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return FallbackSearchBackend()
+
+
+def search_terms(query):
+    return re.findall(r'[^\W_]+', query.lower())[:16]
+
+
+# Index maintenance
+
+def index_feedbacks(feedbacks):
+    docs = [(feedback_doc_id(f.id), f.id, f.title, f.description) for f in feedbacks]
+    if docs:
+        with connection.cursor() as cursor:
+            get_backend().upsert(cursor, docs)
+
+
+def index_comments(comments):
+    docs = [(comment_doc_id(c.id), c.feedback_id, '', c.text) for c in comments]
+    if docs:
+        with connection.cursor() as cursor:
+            get_backend().upsert(cursor, docs)
+
+
+def unindex_feedback(feedback_id):
+    with connection.cursor() as cursor:
+        get_backend().delete(cursor, [feedback_doc_id(feedback_id)])
+
+
+def unindex_comments(comment_ids):
+    if comment_ids:
+        with connection.cursor() as cursor:
+            get_backend().delete(cursor, [comment_doc_id(comment_id) for comment_id in comment_ids])
+
+
+def index_feedback_ids(feedback_ids, batch_size=1000):
+    """Indexes the given feedbacks and all of their comments, in batches."""
+    feedback_ids = list(feedback_ids)
+    for start in range(0, len(feedback_ids), batch_size):
+        batch = feedback_ids[start:start + batch_size]
+        index_feedbacks(Feedback.objects.filter(id__in=batch).only('id', 'title', 'description'))
+        comments = Comment.objects.filter(feedback_id__in=batch).only('id', 'feedback_id', 'text')
+        index_comments(comments.iterator(chunk_size=batch_size))
+
+
+def rebuild_index():
+    """Drops and recreates the index, filling it with set-based INSERT ... SELECTs."""
+    with connection.cursor() as cursor:
+        backend = get_backend()
+        backend.drop_index(cursor)
+        backend.create_index(cursor)
+        backend.populate(cursor)
+
+
+def search(query, board_id=None, limit=20, offset=0):
+    """Returns (feedback_id, score) pairs, most relevant first."""
+    terms = search_terms(query)
+    if not terms:
+        return []
+    with connection.cursor() as cursor:
+        return get_backend().search(cursor, terms, board_id, limit, offset)
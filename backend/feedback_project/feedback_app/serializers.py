@@ -1,26 +1,33 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from . import metrics
 from .models import Board, Feedback, Comment, UserProfile
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    # Adds the time spent serializing to the request's metrics (see metrics.py)
+    def to_representation(self, instance):
+        with metrics.serializer_timer():
+            return super().to_representation(instance)
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
         read_only_fields = ['id']
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
         model = UserProfile
         fields = ['user', 'role']
 
-class BoardSerializer(serializers.ModelSerializer):
+class BoardSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Board
         fields = '__all__'
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
 
     class Meta:
@@ -28,13 +35,15 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'feedback', 'user', 'text', 'created_at']
         read_only_fields = ['user', 'created_at']
 
-class FeedbackSerializer(serializers.ModelSerializer):
+class FeedbackSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    # Only present when the queryset is annotated for the requesting user (Feedback.upvoted_by_user)
+    has_upvoted = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = Feedback
         fields = ['id', 'board', 'title', 'description', 'status', 
-                 'upvote_count', 'comment_count', 'created_at', 'user']
+                 'upvote_count', 'comment_count', 'created_at', 'user', 'has_upvoted']
         read_only_fields = ['user', 'created_at'] 
 
     def get_upvotes_count(self, obj):
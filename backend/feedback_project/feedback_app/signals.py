@@ -0,0 +1,183 @@
+import threading
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from . import duplicates, metrics, realtime
+from .authentication import invalidate_token, invalidate_user_tokens
+from .models import Board, BoardActivity, Comment, Feedback, UserProfile
+from .search import index_comments, index_feedbacks, unindex_comments, unindex_feedback
+from .serializers import CommentSerializer, FeedbackSerializer
+from .stats_cache import (invalidate_board_list, invalidate_board_stats, invalidate_board_version,
+                          invalidate_users_version)
+
+# Fields that feed Board.get_stats: status counts and the trending list
+STATS_FIELDS = {'board_id', 'status', 'title', 'upvote_count', 'comment_count'}
+# Fields held in the full-text search index
+SEARCH_FIELDS = {'title', 'description'}
+# Fields sent to live clients as feedback.updated deltas
+EVENT_FIELDS = {'title', 'description', 'status', 'upvote_count', 'comment_count'}
+TRACKED_FIELDS = STATS_FIELDS | SEARCH_FIELDS | EVENT_FIELDS
+
+
+def _snapshot(instance):
+    return {field: instance.__dict__.get(field) for field in TRACKED_FIELDS}
+
+
+@receiver(post_init, sender=Feedback)
+def remember_tracked_fields(sender, instance, **kwargs):
+    instance._tracked_snapshot = _snapshot(instance)
+
+
+@receiver(post_save, sender=Feedback)
+def feedback_saved(sender, instance, created, **kwargs):
+    previous = instance._tracked_snapshot
+    instance._tracked_snapshot = _snapshot(instance)
+    changed = {field for field in TRACKED_FIELDS if previous[field] != instance._tracked_snapshot[field]}
+
+    if created or changed & STATS_FIELDS:
+        invalidate_board_stats(instance.board_id)
+        if previous['board_id'] and previous['board_id'] != instance.board_id:
+            invalidate_board_stats(previous['board_id'])
+    elif changed:
+        # Still shown in the feedback list, so its ETags must change
+        invalidate_board_version(instance.board_id)
+
+    if created or changed & SEARCH_FIELDS:
+        index_feedbacks([instance])
+
+    if created or changed & (SEARCH_FIELDS | {'board_id'}):
+        duplicates.index_feedback(instance)
+
+    record_feedback_activity(instance, created, changed)
+    publish_feedback_changes(instance, created, previous['board_id'], changed)
+
+
+def record_feedback_activity(instance, created, changed):
+    if created:
+        day = timezone.localdate(instance.created_at)
+        BoardActivity.record(instance.board_id, day, instance.status, new_feedbacks=1)
+    elif 'status' in changed:
+        BoardActivity.record(instance.board_id, timezone.localdate(), instance.status, status_changes=1)
+
+
+def publish_feedback_changes(instance, created, previous_board_id, changed):
+    moved = previous_board_id and previous_board_id != instance.board_id
+    if created or moved:
+        realtime.publish(instance.board_id, 'feedback.created', feedback=FeedbackSerializer(instance).data)
+        if moved:
+            realtime.publish(previous_board_id, 'feedback.deleted', id=instance.id)
+        return
+
+    changes = {field: getattr(instance, field) for field in changed & EVENT_FIELDS}
+    if changes:
+        realtime.publish(instance.board_id, 'feedback.updated', id=instance.id, changes=changes)
+
+
+@receiver(post_delete, sender=Feedback)
+def feedback_deleted(sender, instance, **kwargs):
+    invalidate_board_stats(instance.board_id)
+    unindex_feedback(instance.id)
+    realtime.publish(instance.board_id, 'feedback.deleted', id=instance.id)
+
+
+@receiver(post_save, sender=Board)
+@receiver(post_delete, sender=Board)
+def board_changed(sender, instance, **kwargs):
+    invalidate_board_stats(instance.id)
+    invalidate_board_list()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or 'text' in update_fields:
+        index_comments([instance])
+    if created:
+        feedback = instance.feedback
+        BoardActivity.record(feedback.board_id, timezone.localdate(instance.created_at), feedback.status, comments=1)
+        realtime.publish(feedback.board_id, 'comment.created', comment=CommentSerializer(instance).data)
+
+
+# A delete sends pre_delete for every collected comment before removing any, then post_delete for
+# each. The batch counts the first and gathers the second, so the counter, hot score and search
+# work runs once per delete instead of once per comment.
+_comment_deletes = threading.local()
+
+
+class CommentDeleteBatch:
+    def __init__(self, origin):
+        self.origin = origin
+        self.expected = 0
+        self.deleted = []  # (comment_id, feedback_id)
+
+
+@receiver(pre_delete, sender=Comment)
+def comment_deleting(sender, instance, origin=None, **kwargs):
+    batch = getattr(_comment_deletes, 'batch', None)
+    # A batch from a delete that failed part-way never completed; its transaction rolled back
+    if batch is None or batch.origin is not origin or batch.deleted:
+        batch = _comment_deletes.batch = CommentDeleteBatch(origin)
+    batch.expected += 1
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    batch = getattr(_comment_deletes, 'batch', None)
+    if batch is None or batch.origin is not origin:
+        batch = CommentDeleteBatch(origin)
+        batch.expected = 1
+    batch.deleted.append((instance.id, instance.feedback_id))
+    if len(batch.deleted) >= batch.expected:
+        _comment_deletes.batch = None
+        apply_comment_deletes(batch)
+
+
+def apply_comment_deletes(batch):
+    unindex_comments([comment_id for comment_id, _ in batch.deleted])
+
+    # Covers single deletes, queryset deletes and cascades from User. When the
+    # feedback (or its board) is being deleted there is no counter left to maintain.
+    origin_model = batch.origin.model if isinstance(batch.origin, QuerySet) else type(batch.origin)
+    if origin_model in (Board, Feedback):
+        return
+    board_ids = Feedback.remove_comments(Counter(feedback_id for _, feedback_id in batch.deleted))
+    for comment_id, feedback_id in batch.deleted:
+        if feedback_id in board_ids:
+            realtime.publish(board_ids[feedback_id], 'comment.deleted', id=comment_id, feedback=feedback_id)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Counts and times every query for the per-route request metrics. Sent again
+    # each time the same wrapper reconnects, so only add it once.
+    if metrics.record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.record_query)
+
+
+# Cached auth tokens carry the user and their role, so drop them when either changes
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    if not created:
+        invalidate_user_tokens(instance.id)
+        # Feedback lists show the author's details; logins only touch last_login
+        if update_fields is None or set(update_fields) - {'last_login'}:
+            invalidate_users_version()
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def user_profile_changed(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.user_id)
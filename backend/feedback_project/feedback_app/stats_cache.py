@@ -0,0 +1,148 @@
+"""
+Board statistics cache.
+
+Stats are stored in the 'board_stats' cache alias (local-memory LRU by default,
+Redis when BOARD_STATS_REDIS_URL is set) and dropped by the signal handlers in
+signals.py whenever a write changes a board's counts or trending list.
+
+The same alias holds version tokens for the conditional GETs in
+conditional.py: one per board, one covering every board, one for the board
+list and one for user details shown in feedback lists. A token is a random
+value created on first read and deleted along with the stats, so any write
+gives the next reader a new token. Tokens are only trustworthy when every
+worker shares this cache; conditional.enabled() checks that.
+"""
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+CACHE_ALIAS = 'board_stats'
+
+_counter_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(board_id):
+    return f'board-stats:{board_id}'
+
+
+def _version_key(board_id):
+    return f'board-version:{board_id if board_id is not None else "all"}'
+
+
+BOARD_LIST_VERSION_KEY = 'board-list-version'
+USERS_VERSION_KEY = 'users-version'
+
+
+def _count(name):
+    with _counter_lock:
+        _counters[name] += 1
+
+
+def get_board_stats(board):
+    stats = _cache().get(_key(board.id))
+    if stats is not None:
+        _count('hits')
+        return stats
+
+    _count('misses')
+    stats = board.get_stats()
+    _cache().set(_key(board.id), stats, timeout=settings.BOARD_STATS_CACHE_TTL)
+    return stats
+
+
+async def aget_board_stats(board):
+    stats = await _cache().aget(_key(board.id))
+    if stats is not None:
+        _count('hits')
+        return stats
+
+    _count('misses')
+    stats = await board.aget_stats()
+    await _cache().aset(_key(board.id), stats, timeout=settings.BOARD_STATS_CACHE_TTL)
+    return stats
+
+
+def _delete(*keys):
+    _cache().delete_many(keys)
+
+    # A reader could re-cache pre-commit data before this transaction commits,
+    # so drop the entries again once it has.
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def invalidate_board_stats(board_id):
+    """Drops the board's stats and replaces its version tokens (and the all-boards one)."""
+    _delete(_key(board_id), _version_key(board_id), _version_key(None))
+    _count('invalidations')
+
+
+def invalidate_board_version(board_id):
+    """Replaces the board's version tokens but keeps its stats, for writes the stats don't show."""
+    _delete(_version_key(board_id), _version_key(None))
+
+
+def invalidate_board_list():
+    _delete(BOARD_LIST_VERSION_KEY)
+
+
+def invalidate_users_version():
+    """For changes to the user details embedded in feedback lists (username, name, email)."""
+    _delete(USERS_VERSION_KEY)
+
+
+def _version(key):
+    return _cache().get_or_set(key, uuid.uuid4().hex, timeout=settings.BOARD_STATS_CACHE_TTL)
+
+
+async def _aversion(key):
+    return await _cache().aget_or_set(key, uuid.uuid4().hex, timeout=settings.BOARD_STATS_CACHE_TTL)
+
+
+def board_version(board_id=None):
+    """Token that changes whenever the board's feedback or stats do; None covers every board."""
+    return _version(_version_key(board_id))
+
+
+async def aboard_version(board_id=None):
+    return await _aversion(_version_key(board_id))
+
+
+def board_list_version():
+    return _version(BOARD_LIST_VERSION_KEY)
+
+
+async def aboard_list_version():
+    return await _aversion(BOARD_LIST_VERSION_KEY)
+
+
+def users_version():
+    return _version(USERS_VERSION_KEY)
+
+
+async def ausers_version():
+    return await _aversion(USERS_VERSION_KEY)
+
+
+def cache_counters():
+    """Hit/miss counters for this worker process."""
+    with _counter_lock:
+        counters = dict(_counters)
+    lookups = counters['hits'] + counters['misses']
+    counters['hit_rate'] = counters['hits'] / lookups if lookups else None
+    return counters
+
+
+def reset_cache_counters():
+    with _counter_lock:
+        for name in _counters:
+            _counters[name] = 0
@@ -1,3 +1,1643 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import math
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .models import Board, BoardActivity, Feedback, FeedbackFingerprint, Comment, UserProfile
+from . import async_views, benchmarks, fieldsets, metrics, realtime, rollups, upvote_buffer
+from .bulk import import_records
+from .duplicates import duplicate_pairs, find_duplicates, merge_feedback
+from .search import search
+from .serializers import CommentSerializer, FeedbackSerializer
+from .authentication import CACHE_ALIAS as AUTH_CACHE_ALIAS
+from .stats_cache import CACHE_ALIAS, cache_counters, reset_cache_counters
+
+
+def create_user(username, role='contributor'):
+    user = User.objects.create_user(username=username)
+    UserProfile.objects.create(user=user, role=role)
+    return user
+
+
+def api_client_for(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+class QueryCountTests(TestCase):
+    """
+    Every list/retrieve endpoint must run a fixed number of queries no matter
+    how many rows it returns. Each test hits the endpoint with a small and a
+    large data set and pins the count, so an N+1 regression fails here. The
+    token is resolved once up front, so the counts are for a warm auth cache.
+    """
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        self.admin = create_user('admin', role='admin')
+        self.client = api_client_for(self.admin)
+        self.board = Board.objects.create(name='Board')
+
+    def populate(self, count):
+        for i in range(count):
+            author = create_user(f'author{Feedback.objects.count()}')
+            feedback = Feedback.objects.create(
+                board=self.board, user=author, title=f'Feedback {i}', description='Description'
+            )
+            Comment.objects.create(feedback=feedback, user=author, text='Comment')
+            Board.objects.create(name=f'Board {i}')
+
+    def assertConstantQueries(self, url, expected):
+        self.client.get(url)
+        for count in (1, 10):
+            self.populate(count)
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_board_list(self):
+        self.assertConstantQueries('/api/boards/', 1)
+
+    def test_board_retrieve(self):
+        self.assertConstantQueries(f'/api/boards/{self.board.id}/', 1)
+
+    def test_feedback_list(self):
+        self.assertConstantQueries(f'/api/feedbacks/?board={self.board.id}', 1)
+
+    def test_feedback_retrieve(self):
+        self.populate(1)
+        feedback = Feedback.objects.first()
+        self.assertConstantQueries(f'/api/feedbacks/{feedback.id}/', 1)
+
+    def test_comment_list(self):
+        self.assertConstantQueries('/api/comments/', 1)
+
+    def test_comment_retrieve(self):
+        self.populate(1)
+        comment = Comment.objects.first()
+        self.assertConstantQueries(f'/api/comments/{comment.id}/', 1)
+
+    def test_get_users(self):
+        # users joined to their profiles
+        self.assertConstantQueries('/api/users/', 1)
+
+    def test_board_latest_comments(self):
+        self.populate(1)
+        ids = ','.join(str(pk) for pk in Feedback.objects.values_list('id', flat=True))
+        # board + windowed comments
+        self.assertConstantQueries(f'/api/boards/{self.board.id}/comments/?feedback__in={ids}', 2)
+
+    def test_board_stats(self):
+        # board + status GROUP BY + trending LIMIT 5 (populate invalidates the cached stats)
+        self.assertConstantQueries(f'/api/boards/{self.board.id}/get_stats/', 3)
+
+
+class BoardStatsCacheTests(TestCase):
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        reset_cache_counters()
+        self.user = create_user('admin', role='admin')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        self.feedback = Feedback.objects.create(
+            board=self.board, user=self.user, title='Feedback', description='Description'
+        )
+        self.url = f'/api/boards/{self.board.id}/get_stats/'
+
+    def get_stats(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertRecomputed(self, change):
+        self.get_stats()
+        misses = cache_counters()['misses']
+        change()
+        stats = self.get_stats()
+        self.assertEqual(cache_counters()['misses'], misses + 1)
+        return stats
+
+    def test_repeated_reads_hit_cache(self):
+        self.get_stats()
+        with self.assertNumQueries(1):  # board only: the token and the stats are both cached
+            self.get_stats()
+        counters = cache_counters()
+        self.assertEqual((counters['hits'], counters['misses']), (1, 1))
+
+    def test_counters_endpoint(self):
+        self.get_stats()
+        self.get_stats()
+        response = self.client.get('/api/boards/stats_cache/')
+        self.assertEqual(response.data['hit_rate'], 0.5)
+
+    def test_create_invalidates(self):
+        stats = self.assertRecomputed(lambda: Feedback.objects.create(
+            board=self.board, user=self.user, title='Another', description='Description'
+        ))
+        self.assertEqual(stats['total_feedbacks'], 2)
+
+    def test_status_change_invalidates(self):
+        def change():
+            self.feedback.status = 'Completed'
+            self.feedback.save()
+        stats = self.assertRecomputed(change)
+        self.assertEqual(stats['feedbacks_by_status'], {'Completed': 1})
+
+    def test_delete_invalidates(self):
+        stats = self.assertRecomputed(self.feedback.delete)
+        self.assertEqual(stats['total_feedbacks'], 0)
+
+    def test_upvote_invalidates(self):
+        stats = self.assertRecomputed(lambda: self.feedback.toggle_upvote(self.user))
+        self.assertEqual(stats['trending_feedbacks'][0]['engagement_score'], 1)
+
+    def test_comment_invalidates(self):
+        stats = self.assertRecomputed(lambda: Comment.objects.create(
+            feedback=self.feedback, user=self.user, text='Comment'
+        ))
+        self.assertEqual(stats['trending_feedbacks'][0]['engagement_score'], 1)
+
+    def test_unrelated_edit_keeps_cache(self):
+        self.get_stats()
+        self.feedback.description = 'Edited'
+        self.feedback.save()
+        self.get_stats()
+        self.assertEqual(cache_counters()['hits'], 1)
+
+
+@override_settings(CONDITIONAL_GET=True)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = create_user('revalidator')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        self.feedback = Feedback.objects.create(board=self.board, user=self.user, title='Cached')
+
+    def assertRevalidates(self, url, num_queries=0):
+        """Returns the ETag after checking that sending it back gets a 304 without queries."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        return etag
+
+    def assertChanged(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_board_list(self):
+        etag = self.assertRevalidates('/api/boards/')
+        Board.objects.create(name='Another')
+        self.assertChanged('/api/boards/', etag)
+
+    def test_board_list_after_import(self):
+        etag = self.assertRevalidates('/api/boards/')
+        import_records([json.dumps({'type': 'board', 'id': 1, 'name': 'Imported'})])
+        self.assertChanged('/api/boards/', etag)
+
+    def test_stats_follow_board_writes(self):
+        url = f'/api/boards/{self.board.id}/get_stats/'
+        etag = self.assertRevalidates(url)
+        self.feedback.toggle_upvote(self.user)
+        self.assertChanged(url, etag)
+        etag = self.assertRevalidates(url)
+        self.board.is_public = False
+        self.board.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+    def test_feedback_list_is_per_user_and_query(self):
+        url = f'/api/feedbacks/?board={self.board.id}'
+        etag = self.assertRevalidates(url)
+        self.assertEqual(self.client.get(url + '&status=Open', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        other = api_client_for(create_user('someone-else'))
+        self.assertEqual(other.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.feedback.description = 'Only shown in the list'
+        self.feedback.save()
+        self.assertChanged(url, etag)
+        etag = self.assertRevalidates(url)
+        Comment.objects.create(feedback=self.feedback, user=self.user, text='Counts too')
+        self.assertChanged(url, etag)
+
+    def test_author_details_rotate_feedback_lists(self):
+        url = f'/api/feedbacks/?board={self.board.id}'
+        etag = self.assertRevalidates(url)
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertChanged(url, etag)
+
+
+class ConditionalGetCacheTests(TestCase):
+    """Validators are only sent when every worker sees the same tokens."""
+
+    def setUp(self):
+        self.user = create_user('revalidator')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        self.feedback = Feedback.objects.create(board=self.board, user=self.user, title='Cached')
+        self.url = f'/api/feedbacks/?board={self.board.id}'
+
+    def test_no_etags_with_a_per_process_cache(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+    def test_edit_through_another_cache_instance(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        shared = {**settings.CACHES, CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}
+        with override_settings(CACHES=shared):
+            etag = self.client.get(self.url)['ETag']
+            # Another worker: its own cache object over the same shared store
+            other_worker = caches.create_connection(CACHE_ALIAS)
+            with mock.patch('feedback_app.stats_cache._cache', return_value=other_worker):
+                self.feedback.title = 'Edited elsewhere'
+                self.feedback.save()
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['title'], 'Edited elsewhere')
+
+
+class ToggleUpvoteTests(TestCase):
+    def setUp(self):
+        self.user = create_user('voter')
+        self.client = api_client_for(self.user)
+        board = Board.objects.create(name='Board')
+        self.feedback = Feedback.objects.create(
+            board=board, user=self.user, title='Feedback', description='Description'
+        )
+        self.url = f'/api/feedbacks/{self.feedback.id}/toggle_upvote/'
+
+    def test_toggle_on_and_off(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.data, {'has_upvoted': True, 'upvote_count': 1})
+        response = self.client.post(self.url)
+        self.assertEqual(response.data, {'has_upvoted': False, 'upvote_count': 0})
+        self.assertFalse(self.feedback.upvoted_by.exists())
+
+    def test_response_does_not_grow_with_voters(self):
+        for i in range(5):
+            self.feedback.toggle_upvote(create_user(f'other{i}'))
+        response = self.client.post(self.url)
+        self.assertEqual(response.data, {'has_upvoted': True, 'upvote_count': 6})
+
+
+@override_settings(UPVOTE_BUFFER='feedback_app.upvote_buffer.LocalUpvoteBuffer', UPVOTE_FLUSH_INTERVAL_MS=0)
+class UpvoteBufferTests(TestCase):
+    def setUp(self):
+        self.user = create_user('voter')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        self.feedback = Feedback.objects.create(board=self.board, user=self.user, title='Feedback')
+        self.url = f'/api/feedbacks/{self.feedback.id}/toggle_upvote/'
+        # No flush thread with a zero interval; the tests flush by hand
+        self.buffer = upvote_buffer.get_upvote_buffer()
+        self.addCleanup(self.buffer.flush)
+
+    def test_toggles_are_buffered_until_flushed(self):
+        self.client.get('/api/boards/')  # warm the token cache
+        with self.assertNumQueries(2):  # the feedback and the caller's vote; nothing is written
+            response = self.client.post(self.url)
+        self.assertEqual(response.data, {'has_upvoted': True, 'upvote_count': 1})
+        self.assertFalse(self.feedback.upvoted_by.exists())
+
+        for i in range(3):
+            self.buffer.toggle(self.feedback, create_user(f'other{i}'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.buffer.flush(), 4)
+        self.feedback.refresh_from_db()
+        self.assertEqual(self.feedback.upvote_count, 4)
+        self.assertEqual(self.feedback.upvoted_by.count(), 4)
+        self.assertGreater(self.feedback.hot_score, 0)
+        self.assertEqual(BoardActivity.objects.get(board=self.board).upvotes, 4)
+
+        response = self.client.post(self.url)
+        self.assertEqual(response.data, {'has_upvoted': False, 'upvote_count': 3})
+        self.buffer.flush()
+        self.assertEqual(self.feedback.upvoted_by.count(), 3)
+
+    def test_toggling_back_cancels_out(self):
+        self.client.post(self.url)
+        response = self.client.post(self.url)
+        self.assertEqual(response.data, {'has_upvoted': False, 'upvote_count': 0})
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertFalse(self.feedback.upvoted_by.exists())
+
+    def test_reads_merge_pending_votes(self):
+        other = create_user('other')
+        self.buffer.toggle(self.feedback, self.user)
+        self.buffer.toggle(self.feedback, other)
+
+        response = self.client.get(f'/api/feedbacks/?board={self.board.id}')
+        item = response.data['results'][0]
+        self.assertEqual((item['upvote_count'], item['has_upvoted']), (2, True))
+        response = api_client_for(create_user('viewer')).get(f'/api/feedbacks/{self.feedback.id}/')
+        self.assertEqual((response.data['upvote_count'], response.data['has_upvoted']), (2, False))
+
+        self.buffer.flush()
+        response = self.client.get(f'/api/feedbacks/?board={self.board.id}')
+        self.assertEqual(response.data['results'][0]['upvote_count'], 2)
+
+    def test_reads_started_before_a_flush_reread_its_rows(self):
+        self.buffer.toggle(self.feedback, self.user)
+        since = upvote_buffer.read_generation()
+        item = {'id': self.feedback.id, 'upvote_count': 0, 'has_upvoted': False}  # as read before the flush
+        self.buffer.flush()
+        with self.assertNumQueries(2):
+            upvote_buffer.merge_pending([item], self.user, since)
+        self.assertEqual((item['upvote_count'], item['has_upvoted']), (1, True))
+        # Nothing flushed since a later read, so nothing to re-read
+        with self.assertNumQueries(0):
+            upvote_buffer.merge_pending([item], self.user, upvote_buffer.read_generation())
+
+    def test_failed_flush_is_retried(self):
+        self.buffer.toggle(self.feedback, self.user)
+        with mock.patch.object(self.buffer, '_write', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.buffer.flush()
+        response = self.client.get(f'/api/feedbacks/{self.feedback.id}/')
+        self.assertEqual((response.data['upvote_count'], response.data['has_upvoted']), (1, True))
+
+        self.buffer.toggle(self.feedback, create_user('other'))
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.feedback.upvoted_by.count(), 2)
+
+
+    def test_votes_for_deleted_rows_do_not_block_the_batch(self):
+        doomed = Feedback.objects.create(board=self.board, user=self.user, title='Doomed')
+        leaving = create_user('leaving')
+        self.buffer.toggle(doomed, self.user)
+        self.buffer.toggle(self.feedback, leaving)
+        self.buffer.toggle(self.feedback, self.user)
+        doomed.delete()
+        leaving.delete()
+
+        self.assertEqual(self.buffer.flush(), 3)
+        self.feedback.refresh_from_db()
+        self.assertEqual(self.feedback.upvote_count, 1)
+        self.assertEqual(list(self.feedback.upvoted_by.all()), [self.user])
+        # Nothing is left to retry or merge into reads
+        self.assertEqual(self.buffer.flush(), 0)
+
+
+class FeedbackListFilterTests(TestCase):
+    def setUp(self):
+        self.user = create_user('reader')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        for title, day in (('January', 15), ('February', 1)):
+            Feedback.objects.create(board=self.board, user=self.user, title=title,
+                                    created_at=timezone.make_aware(datetime(2024, 1 if title == 'January' else 2, day)))
+
+    def titles(self, **params):
+        response = self.client.get('/api/feedbacks/', {'board': self.board.id, **params})
+        return sorted(item['title'] for item in response.data['results'])
+
+    def test_date_ranges(self):
+        self.assertEqual(self.titles(created_after='2024-01-20'), ['February'])
+        self.assertEqual(self.titles(created_before='2024-01-15'), ['January'])  # the whole day is included
+        self.assertEqual(self.titles(created_after='2024-01-15T12:00:00'), ['February'])
+
+    def test_impossible_dates_are_rejected(self):
+        for param, value in (('created_after', '2024-02-30'), ('created_before', '2024-13-01T00:00'),
+                             ('created_after', 'yesterday')):
+            response = self.client.get('/api/feedbacks/', {param: value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn(param, response.data)
+
+
+class HasUpvotedTests(TestCase):
+    def setUp(self):
+        self.user = create_user('viewer')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        self.feedbacks = [
+            Feedback.objects.create(board=self.board, user=self.user, title=f'Feedback {i}') for i in range(4)
+        ]
+        self.feedbacks[1].toggle_upvote(self.user)
+        self.feedbacks[2].toggle_upvote(create_user('someone else'))
+
+    def test_list_flags_only_the_requesting_users_votes(self):
+        self.client.get('/api/boards/')  # warm the token cache
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/feedbacks/?board={self.board.id}')
+        flags = {item['id']: item['has_upvoted'] for item in response.data['results']}
+        self.assertEqual(flags, {
+            self.feedbacks[0].id: False, self.feedbacks[1].id: True,
+            self.feedbacks[2].id: False, self.feedbacks[3].id: False,
+        })
+
+    def test_retrieve_and_search_include_flag(self):
+        response = self.client.get(f'/api/feedbacks/{self.feedbacks[1].id}/')
+        self.assertIs(response.data['has_upvoted'], True)
+        response = self.client.get('/api/feedbacks/search/', {'q': 'feedback'})
+        self.assertEqual(sum(item['has_upvoted'] for item in response.data['results']), 1)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.user = create_user('reader')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        self.feedbacks = [
+            Feedback.objects.create(board=self.board, user=self.user, title=f'Feedback {i}', description='Long text')
+            for i in range(3)
+        ]
+        self.feedbacks[1].toggle_upvote(self.user)
+        Comment.objects.create(feedback=self.feedbacks[0], user=self.user, text='Comment')
+
+    def test_full_items_match_the_serializers(self):
+        response = self.client.get(f'/api/feedbacks/?board={self.board.id}&ordering=hot')
+        queryset = Feedback.objects.annotate(has_upvoted=Feedback.upvoted_by_user(self.user)).order_by('-hot_score', '-id')
+        self.assertEqual(json.loads(response.content)['results'],
+                         json.loads(json.dumps(FeedbackSerializer(queryset, many=True).data, cls=DjangoJSONEncoder)))
+
+        response = self.client.get(f'/api/comments/?feedback={self.feedbacks[0].id}')
+        self.assertEqual(response.json(), [
+            json.loads(json.dumps(CommentSerializer(Comment.objects.get()).data, cls=DjangoJSONEncoder))
+        ])
+
+    def test_fields_limit_each_item(self):
+        self.client.get('/api/boards/')  # warm the token cache
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/feedbacks/?board={self.board.id}&fields=id,title,has_upvoted,title')
+        self.assertEqual(response.data['results'][1], {
+            'id': self.feedbacks[1].id, 'title': 'Feedback 1', 'has_upvoted': True,
+        })
+        response = self.client.get('/api/comments/?fields=user,text')
+        self.assertEqual(response.data[0]['user']['username'], 'reader')
+        self.assertEqual(set(response.data[0]), {'user', 'text'})
+
+    def test_cursor_pages_work_without_the_sort_fields(self):
+        response = self.client.get(f'/api/feedbacks/?board={self.board.id}&fields=title&ordering=top&page_size=2')
+        titles = [item['title'] for item in response.data['results']]
+        response = self.client.get(response.data['next'])
+        titles += [item['title'] for item in response.data['results']]
+        self.assertEqual(sorted(titles), ['Feedback 0', 'Feedback 1', 'Feedback 2'])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/feedbacks/?fields=id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+        self.assertEqual(self.client.get('/api/comments/?fields=').status_code, 400)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        caches[AUTH_CACHE_ALIAS].clear()
+        self.user = create_user('member')
+        self.client = api_client_for(self.user)
+
+    def test_token_user_and_role_resolve_in_one_query_then_from_cache(self):
+        with self.assertNumQueries(2):  # token + user + profile join, then the board list
+            self.client.get('/api/boards/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/boards/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_change_is_seen_on_next_request(self):
+        Board.objects.create(name='Private', is_public=False)
+        self.assertEqual(len(self.client.get('/api/boards/').data), 0)
+        profile = self.user.userprofile
+        profile.role = 'moderator'
+        profile.save()
+        self.assertEqual(len(self.client.get('/api/boards/').data), 1)
+
+    def test_logout_and_deactivation_revoke_cached_token(self):
+        self.client.get('/api/boards/')
+        self.client.get('/api/logout/')
+        self.assertEqual(self.client.get('/api/boards/').status_code, 401)
+
+        self.client = api_client_for(self.user)
+        self.client.get('/api/boards/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/boards/').status_code, 401)
+
+
+@override_settings(UPVOTE_BUFFER='feedback_app.upvote_buffer.LocalUpvoteBuffer', UPVOTE_FLUSH_INTERVAL_MS=0)
+class UpvoteBufferFlushTests(TransactionTestCase):
+    """Reads racing a flush, which needs the flush to really commit."""
+
+    def test_reads_between_commit_and_clear_count_votes_once(self):
+        user = create_user('voter')
+        board = Board.objects.create(name='Board')
+        feedback = Feedback.objects.create(board=board, user=user, title='Feedback')
+        buffer = upvote_buffer.get_upvote_buffer()
+        buffer.toggle(feedback, user)
+        results, readers, write = [], [], buffer._write
+
+        def read():
+            try:
+                response = api_client_for(user).get(f'/api/feedbacks/?board={board.id}')
+                item = response.data['results'][0]
+                results.append((item['upvote_count'], item['has_upvoted']))
+            finally:
+                connection.close()
+
+        def write_then_read(entries):
+            write(entries)
+            # Committed, but the entries stay in flight until flush() takes them back
+            readers.append(threading.Thread(target=read))
+            readers[0].start()
+            readers[0].join(timeout=0.5)
+
+        with mock.patch.object(buffer, '_write', side_effect=write_then_read):
+            buffer.flush()
+        readers[0].join()
+        self.assertEqual(results, [(1, True)])
+
+
+class ConcurrentUpvoteTests(TransactionTestCase):
+    """Many threads voting on one feedback at once must not lose updates."""
+
+    voters = 20
+
+    def setUp(self):
+        owner = create_user('owner')
+        board = Board.objects.create(name='Board')
+        self.feedback = Feedback.objects.create(
+            board=board, user=owner, title='Feedback', description='Description'
+        )
+        self.users = [create_user(f'voter{i}') for i in range(self.voters)]
+
+    def vote_concurrently(self, users):
+        barrier = threading.Barrier(len(users))
+        errors = []
+
+        def vote(user):
+            try:
+                barrier.wait()
+                Feedback.objects.get(id=self.feedback.id).toggle_upvote(user)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=vote, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assertCountMatchesVotes(self, expected):
+        self.feedback.refresh_from_db()
+        self.assertEqual(self.feedback.upvote_count, expected)
+        self.assertEqual(self.feedback.upvoted_by.count(), expected)
+
+    def test_concurrent_upvotes(self):
+        self.vote_concurrently(self.users)
+        self.assertCountMatchesVotes(self.voters)
+
+    def test_concurrent_mixed_toggles(self):
+        self.vote_concurrently(self.users)
+        # Half the voters retract while the same users vote again on the other half
+        half = self.voters // 2
+        self.vote_concurrently(self.users[:half])
+        self.assertCountMatchesVotes(self.voters - half)
+
+
+class DatabaseProfileTests(TransactionTestCase):
+    """
+    Runs on whichever database is configured. The backend workflow in
+    .github/workflows runs the suite once with the SQLite default and once
+    against PostgreSQL; locally, with a server running:
+
+        DB_ENGINE=postgres POSTGRES_HOST=localhost python manage.py test feedback_app
+    """
+
+    def test_models_and_migrations_agree(self):
+        call_command('makemigrations', 'feedback_app', check=True, dry_run=True, stdout=StringIO())
+
+    def test_migrations_reverse_and_reapply(self):
+        # Covers the vendor-specific RunPython steps (search index) in both directions
+        call_command('migrate', 'feedback_app', '0008', verbosity=0)
+        call_command('migrate', 'feedback_app', verbosity=0)
+        board = Board.objects.create(name='Board')
+        Feedback.objects.create(board=board, user=create_user('author'), title='Searchable title')
+        self.assertEqual(len(search('searchable')), 1)
+
+    def test_upgrade_fingerprints_existing_feedback(self):
+        call_command('migrate', 'feedback_app', '0015', verbosity=0)
+        board = Board.objects.create(name='Board')
+        original = Feedback.objects.create(board=board, user=create_user('author'), title='Export boards to CSV files')
+        FeedbackFingerprint.objects.all().delete()  # as for feedback written before 0013
+        call_command('migrate', 'feedback_app', verbosity=0)
+        self.assertTrue(FeedbackFingerprint.objects.filter(feedback=original).exists())
+        self.assertEqual([match['id'] for match in find_duplicates(board.id, 'Export boards to CSV files')],
+                         [original.id])
+
+    def test_sqlite_connection_pragmas(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+            if settings.SQLITE_WAL:
+                self.assertEqual((journal_mode, synchronous), ('wal', 1))  # NORMAL
+            else:
+                self.assertNotEqual(journal_mode, 'wal')
+                self.assertEqual(synchronous, 2)  # FULL, the default
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.DATABASES['default']['OPTIONS']['timeout'] * 1000)
+
+
+class HotRankingTests(TestCase):
+    def setUp(self):
+        self.user = create_user('ranker')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        now = timezone.now()
+        self.old_popular = Feedback.objects.create(
+            board=self.board, user=self.user, title='Old popular', created_at=now - timedelta(days=7),
+        )
+        self.new_quiet = Feedback.objects.create(board=self.board, user=self.user, title='New quiet', created_at=now)
+        self.new_popular = Feedback.objects.create(
+            board=self.board, user=self.user, title='New popular', created_at=now - timedelta(hours=1),
+        )
+        for i in range(30):
+            self.old_popular.toggle_upvote(create_user(f'old{i}'))
+        for i in range(5):
+            self.new_popular.toggle_upvote(create_user(f'new{i}'))
+
+    def titles(self, ordering):
+        response = self.client.get('/api/feedbacks/', {'board': self.board.id, 'ordering': ordering})
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for item in response.data['results']]
+
+    def test_orderings(self):
+        self.assertEqual(self.titles('new'), ['New quiet', 'New popular', 'Old popular'])
+        self.assertEqual(self.titles('top'), ['Old popular', 'New popular', 'New quiet'])
+        # A week of age outweighs 6x the votes
+        self.assertEqual(self.titles('hot'), ['New popular', 'New quiet', 'Old popular'])
+        self.assertEqual(self.client.get('/api/feedbacks/', {'ordering': 'random'}).status_code, 400)
+
+    def test_scores_follow_votes_and_comments(self):
+        before = Feedback.objects.get(id=self.new_quiet.id).hot_score
+        Comment.objects.create(feedback=self.new_quiet, user=self.user, text='Bump')
+        Comment.objects.create(feedback=self.new_quiet, user=self.user, text='Bump')
+        self.new_quiet.toggle_upvote(self.user)
+        after = Feedback.objects.get(id=self.new_quiet.id).hot_score
+        self.assertAlmostEqual(after - before, math.log10(2), places=6)  # 1 upvote + 2 comments at 0.5
+        trending = [item['title'] for item in self.board.get_stats()['trending_feedbacks']]
+        self.assertEqual(trending, ['New popular', 'New quiet', 'Old popular'])
+
+    def test_hot_cursor_pages_through_ties(self):
+        for i in range(5):
+            Feedback.objects.create(board=self.board, user=self.user, title=f'Tie {i}', created_at=self.new_quiet.created_at)
+        seen, url = [], f'/api/feedbacks/?board={self.board.id}&ordering=hot&page_size=2'
+        while url:
+            data = self.client.get(url).data
+            seen += [item['id'] for item in data['results']]
+            url = data['next']
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(len(set(seen)), 8)
+
+    @override_settings(RANKING={**settings.RANKING, 'ALGORITHM': 'gravity'})
+    def test_gravity_batch_recompute(self):
+        call_command('recompute_hot_scores', stdout=StringIO())
+        # No points means no score under gravity, however new
+        self.assertEqual(self.titles('hot'), ['New popular', 'Old popular', 'New quiet'])
+        self.assertLess(Feedback.objects.get(id=self.old_popular.id).hot_score, 0.01)
+
+
+class BoardActivityTests(TestCase):
+    def setUp(self):
+        self.user = create_user('tracker', role='admin')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        self.today = timezone.localdate()
+
+    def activity(self, day, status):
+        row = BoardActivity.objects.filter(board=self.board, day=day, status=status).first()
+        return {name: getattr(row, name) for name in BoardActivity.COUNTERS} if row else None
+
+    def test_signals_keep_rollups_current(self):
+        feedback = Feedback.objects.create(board=self.board, user=self.user, title='Tracked')
+        Comment.objects.create(feedback=feedback, user=self.user, text='First')
+        feedback.toggle_upvote(self.user)
+        feedback.toggle_upvote(create_user('voter'))
+        feedback.toggle_upvote(self.user)  # retracted
+        self.assertEqual(self.activity(self.today, 'Open'),
+                         {'new_feedbacks': 1, 'status_changes': 0, 'upvotes': 1, 'comments': 1})
+
+        feedback.status = 'In Progress'
+        feedback.save()
+        feedback.title = 'Renamed'
+        feedback.save()
+        self.assertEqual(self.activity(self.today, 'In Progress'),
+                         {'new_feedbacks': 0, 'status_changes': 1, 'upvotes': 0, 'comments': 0})
+
+    def test_backfill_rebuilds_from_current_data(self):
+        week_ago = timezone.now() - timedelta(days=7)
+        old = Feedback.objects.create(board=self.board, user=self.user, title='Old', created_at=week_ago)
+        old.toggle_upvote(self.user)
+        Feedback.objects.create(board=self.board, user=self.user, title='New', status='Completed')
+        BoardActivity.objects.all().delete()
+
+        call_command('backfill_activity', '--board', str(self.board.id), stdout=StringIO())
+        self.assertEqual(self.activity(timezone.localdate(week_ago), 'Open'),
+                         {'new_feedbacks': 1, 'status_changes': 0, 'upvotes': 1, 'comments': 0})
+        self.assertEqual(self.activity(self.today, 'Completed')['new_feedbacks'], 1)
+        self.assertEqual(BoardActivity.objects.count(), 2)
+
+    def totals(self, board_id):
+        rows = BoardActivity.objects.filter(board_id=board_id)
+        by_status = {}
+        for row in rows:
+            upvotes, comments = by_status.get(row.status, (0, 0))
+            by_status[row.status] = (upvotes + row.upvotes, comments + row.comments)
+        return {status: counts for status, counts in by_status.items() if counts != (0, 0)}
+
+    def assertMatchesBackfill(self, board_id):
+        # Votes count on the day they happen live and on the feedback's day in a backfill, so
+        # compare the per-status totals
+        live = self.totals(board_id)
+        rollups.backfill([board_id])
+        self.assertEqual(live, self.totals(board_id))
+
+    def test_bulk_import_records_activity(self):
+        create_user('bob')
+        records = [
+            {'type': 'board', 'id': 1, 'name': 'Imported'},
+            {'type': 'feedback', 'id': 2, 'board': 1, 'user': 'tracker', 'title': 'Old',
+             'status': 'Completed', 'created_at': '2024-01-02T03:04:05Z'},
+            {'type': 'comment', 'id': 3, 'feedback': 2, 'user': 'bob', 'text': 'Done?',
+             'created_at': '2024-01-03T00:00:00Z'},
+            {'type': 'upvote', 'feedback': 2, 'user': 'bob'},
+        ]
+        import_records([json.dumps(record) for record in records])
+        self.board = Board.objects.get(name='Imported')
+        self.assertEqual(self.activity(date(2024, 1, 2), 'Completed'),
+                         {'new_feedbacks': 1, 'status_changes': 0, 'upvotes': 1, 'comments': 0})
+        self.assertEqual(self.activity(date(2024, 1, 3), 'Completed')['comments'], 1)
+        self.assertMatchesBackfill(self.board.id)
+
+    def test_merge_moves_activity_to_the_survivor(self):
+        survivor = Feedback.objects.create(board=self.board, user=self.user, title='Survivor')
+        duplicate = Feedback.objects.create(board=self.board, user=self.user, title='Duplicate', status='In Progress')
+        both, only_duplicate = create_user('both'), create_user('only-duplicate')
+        survivor.toggle_upvote(both)
+        duplicate.toggle_upvote(both)
+        duplicate.toggle_upvote(only_duplicate)
+        Comment.objects.create(feedback=duplicate, user=both, text='Moved')
+
+        merge_feedback(survivor, duplicate)
+        self.assertEqual(self.totals(self.board.id), {'Open': (2, 1)})
+        self.assertMatchesBackfill(self.board.id)
+
+    def test_timeseries_endpoint(self):
+        start = self.today - timedelta(days=13)
+        BoardActivity.record(self.board.id, start, 'Open', new_feedbacks=2, upvotes=5)
+        BoardActivity.record(self.board.id, start, 'Completed', status_changes=1)
+        BoardActivity.record(self.board.id, self.today, 'Open', comments=3)
+        url = f'/api/boards/{self.board.id}/timeseries/'
+        self.client.get(url)  # warm the auth cache
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'from': start.isoformat(), 'to': self.today.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        series = response.data['series']
+        self.assertEqual(len(series), 14)
+        self.assertEqual(series[0]['date'], start.isoformat())
+        self.assertEqual(series[0]['new_feedbacks'], 2)
+        self.assertEqual(series[0]['by_status']['Completed']['status_changes'], 1)
+        self.assertEqual(series[1]['by_status'], {})
+        self.assertEqual(series[-1]['comments'], 3)
+
+        weekly = self.client.get(url, {'from': start.isoformat(), 'to': self.today.isoformat(), 'bucket': 'week'}).data
+        self.assertTrue(all(date.fromisoformat(point['date']).weekday() == 0 for point in weekly['series']))
+        self.assertEqual(sum(point['upvotes'] for point in weekly['series']), 5)
+        self.assertEqual(sum(point['comments'] for point in weekly['series']), 3)
+
+        self.assertEqual(self.client.get(url, {'bucket': 'month'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'from': '2024-02-30'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'from': '2020-01-01', 'to': '2024-01-01'}).status_code, 400)
+
+
+class CommentCountTests(TestCase):
+    def setUp(self):
+        self.user = create_user('commenter')
+        self.board = Board.objects.create(name='Board')
+        self.feedback = Feedback.objects.create(
+            board=self.board, user=self.user, title='Feedback', description='Description'
+        )
+
+    def add_comments(self, count, user=None):
+        for i in range(count):
+            Comment.objects.create(feedback=self.feedback, user=user or self.user, text=f'Comment {i}')
+
+    def assertCommentCount(self, expected):
+        self.feedback.refresh_from_db()
+        self.assertEqual(self.feedback.comment_count, expected)
+
+    def test_create_increments_without_recounting(self):
+        self.add_comments(2)
+        # savepoint, insert, counter update, score read + write, search doc replace (a delete and an
+        # insert on SQLite, one upsert on PostgreSQL), activity rollup, release
+        with self.assertNumQueries(9 if connection.vendor == 'sqlite' else 8):
+            Comment.objects.create(feedback=self.feedback, user=self.user, text='Another')
+        self.assertCommentCount(3)
+
+    def test_delete_decrements(self):
+        self.add_comments(3)
+        Comment.objects.first().delete()
+        self.assertCommentCount(2)
+
+    def test_delete_through_api_decrements(self):
+        self.add_comments(1)
+        client = api_client_for(self.user)
+        response = client.delete(f'/api/comments/{Comment.objects.get().id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertCommentCount(0)
+
+    def test_bulk_delete_decrements(self):
+        self.add_comments(5)
+        Comment.objects.filter(id__in=Comment.objects.values('id')[:3]).delete()
+        self.assertCommentCount(2)
+
+    def test_bulk_delete_is_one_update_per_delete(self):
+        second = Feedback.objects.create(board=self.board, user=self.user, title='Second')
+        self.add_comments(40)
+        Comment.objects.bulk_create([Comment(feedback=second, user=self.user, text='Bulk') for _ in range(60)])
+        Feedback.objects.filter(id=second.id).update(comment_count=60)
+        # select, delete, search unindex, board lookup, one decrement per distinct count (two here),
+        # score read + write; the same however many comments go
+        with self.assertNumQueries(8) as queries:
+            Comment.objects.filter(feedback__board=self.board).delete()
+        self.assertEqual(sum('UPDATE "feedback_app_feedback" SET "comment_count"' in query['sql']
+                             for query in queries.captured_queries), 2)
+        self.assertCommentCount(0)
+        second.refresh_from_db()
+        self.assertEqual(second.comment_count, 0)
+
+    def test_failed_delete_does_not_leak_into_the_next(self):
+        self.add_comments(3)
+        # Fails after every pre_delete was sent but before any post_delete
+        with mock.patch('django.db.models.sql.DeleteQuery.delete_batch', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Comment.objects.all().delete()
+        self.assertCommentCount(3)
+        Comment.objects.first().delete()
+        self.assertCommentCount(2)
+
+    def test_user_cascade_decrements(self):
+        other = create_user('other')
+        self.add_comments(2)
+        self.add_comments(3, user=other)
+        other.delete()
+        self.assertCommentCount(2)
+
+    def test_feedback_cascade(self):
+        self.add_comments(3)
+        self.feedback.delete()
+        self.assertFalse(Comment.objects.exists())
+
+    def test_reconcile_counters(self):
+        self.add_comments(3)
+        self.feedback.upvoted_by.add(self.user)
+        Feedback.objects.update(comment_count=10, upvote_count=0)
+
+        out = StringIO()
+        call_command('reconcile_counters', batch_size=1, stdout=out)
+        self.assertIn('Fixed 1', out.getvalue())
+        self.feedback.refresh_from_db()
+        self.assertEqual((self.feedback.comment_count, self.feedback.upvote_count), (3, 1))
+
+
+class BulkImportExportTests(TestCase):
+    records = [
+        {'type': 'board', 'id': 10, 'name': 'Imported', 'is_public': False},
+        {'type': 'feedback', 'id': 20, 'board': 10, 'user': 'alice', 'title': 'First',
+         'description': 'Description', 'status': 'In Progress', 'created_at': '2024-01-02T03:04:05Z'},
+        {'type': 'feedback', 'id': 21, 'board': 10, 'user': 'alice', 'title': 'Second', 'description': ''},
+        {'type': 'comment', 'id': 30, 'feedback': 20, 'user': 'bob', 'text': 'Agreed',
+         'created_at': '2024-01-03T00:00:00Z'},
+        {'type': 'upvote', 'feedback': 20, 'user': 'alice'},
+        {'type': 'upvote', 'feedback': 20, 'user': 'bob'},
+        {'type': 'feedback', 'id': 22, 'board': 99, 'user': 'alice', 'title': 'Orphan'},
+        {'type': 'comment', 'id': 31, 'feedback': 20, 'user': 'nobody', 'text': 'Who?'},
+    ]
+
+    def setUp(self):
+        self.admin = create_user('admin', role='admin')
+        self.client = api_client_for(self.admin)
+        create_user('alice')
+        create_user('bob')
+
+    def ndjson(self, records):
+        return ''.join(json.dumps(record) + '\n' for record in records)
+
+    def upload(self, content, name='import.ndjson', **data):
+        upload = SimpleUploadedFile(name, content.encode('utf-8'))
+        return self.client.post('/api/bulk/import/', {'file': upload, **data}, format='multipart')
+
+    def test_import_creates_records_and_counters(self):
+        response = self.upload(self.ndjson(self.records))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], {'boards': 1, 'feedbacks': 2, 'comments': 1, 'upvotes': 2})
+        self.assertEqual([error['line'] for error in response.data['errors']], [7, 8])
+
+        feedback = Feedback.objects.get(title='First')
+        self.assertEqual((feedback.comment_count, feedback.upvote_count), (1, 2))
+        self.assertEqual(feedback.status, 'In Progress')
+        self.assertEqual(feedback.created_at.year, 2024)
+        self.assertEqual(feedback.comments.get().created_at.day, 3)
+        self.assertFalse(feedback.board.is_public)
+
+    def test_import_requires_moderator(self):
+        self.client = api_client_for(create_user('contributor'))
+        response = self.upload(self.ndjson(self.records))
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_can_create_missing_users(self):
+        response = self.upload(self.ndjson(self.records), create_users='true')
+        self.assertEqual(response.data['created']['comments'], 2)
+        self.assertFalse(User.objects.get(username='nobody').has_usable_password())
+
+    def export(self, **params):
+        response = self.client.get('/api/bulk/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson_round_trip(self):
+        self.upload(self.ndjson(self.records))
+        board = Board.objects.get(name='Imported')
+        exported = self.export(board=board.id)
+        Board.objects.all().delete()
+
+        response = self.upload(exported)
+        self.assertEqual(response.data['created'], {'boards': 1, 'feedbacks': 2, 'comments': 1, 'upvotes': 2})
+        self.assertEqual(response.data['error_count'], 0)
+
+    def test_csv_round_trip(self):
+        self.upload(self.ndjson(self.records))
+        exported = self.export(format='csv')
+        self.assertTrue(exported.startswith('type,id,name'))
+        Board.objects.all().delete()
+
+        response = self.upload(exported, name='import.csv')
+        self.assertEqual(response.data['created'], {'boards': 1, 'feedbacks': 2, 'comments': 1, 'upvotes': 2})
+        self.assertFalse(Board.objects.get().is_public)
+
+    def test_commands(self):
+        self.upload(self.ndjson(self.records))
+        out = StringIO()
+        call_command('export_feedback', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 6)
+
+
+class FeedbackExportTests(TestCase):
+    def setUp(self):
+        self.user = create_user('exporter')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        other = Board.objects.create(name='Other')
+        for i in range(3):
+            Feedback.objects.create(board=self.board, user=self.user, title=f'Feedback {i}', description='Line\nbreak')
+        Feedback.objects.create(board=other, user=self.user, title='Elsewhere', description='')
+
+    def export(self, params):
+        response = self.client.get('/api/feedbacks/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_export_filters_by_board(self):
+        response, content = self.export({'board': self.board.id, 'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([row['title'] for row in rows], ['Feedback 2', 'Feedback 1', 'Feedback 0'])
+        self.assertEqual(rows[0]['username'], 'exporter')
+        self.assertEqual(rows[0]['description'], 'Line\nbreak')
+
+    def test_ndjson_export(self):
+        _, content = self.export({'format': 'ndjson', 'status': 'Open'})
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['board_name'], 'Other')
+
+    def test_unknown_format(self):
+        response = self.client.get('/api/feedbacks/export/', {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_asgi_exports_stream_without_buffering(self):
+        await sync_to_async(UserProfile.objects.filter(user=self.user).update)(role='admin')
+        token = await Token.objects.aget(user=self.user)
+        headers = {'Authorization': f'Token {token.key}'}
+        for url, lines in (('/api/feedbacks/export/', 4), ('/api/bulk/export/', 6)):
+            response = await AsyncClient().get(url, {'format': 'ndjson'}, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            # A sync iterator here would make Django read the whole export into a list first
+            self.assertTrue(response.is_async)
+            content = b''.join([chunk async for chunk in response.streaming_content])
+            self.assertEqual(len(content.splitlines()), lines)
+
+
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin', role='admin')
+        self.client = api_client_for(self.admin)
+        board = Board.objects.create(name='Board')
+        self.alice = create_user('alice')
+        self.albert = create_user('albert', role='moderator')
+        self.bob = User.objects.create_user(username='bob')  # no profile
+        feedback = Feedback.objects.create(board=board, user=self.alice, title='Idea')
+        Feedback.objects.create(board=board, user=self.alice, title='Another')
+        Comment.objects.create(feedback=feedback, user=self.alice, text='Mine')
+        Comment.objects.create(feedback=feedback, user=self.bob, text='Theirs')
+        feedback.toggle_upvote(self.albert)
+        feedback.toggle_upvote(self.bob)
+
+    def directory(self, **params):
+        response = self.client.get('/api/users/', params)
+        self.assertEqual(response.status_code, 200)
+        return {row['username']: row for row in response.data['results']}
+
+    def test_activity_and_roles(self):
+        users = self.directory()
+        self.assertEqual(list(users), ['admin', 'albert', 'alice', 'bob'])
+        self.assertEqual(
+            {key: users['alice'][key] for key in ('role', 'feedback_count', 'comment_count', 'upvotes_given')},
+            {'role': 'contributor', 'feedback_count': 2, 'comment_count': 1, 'upvotes_given': 0},
+        )
+        self.assertEqual(users['bob']['role'], 'contributor')
+        self.assertEqual(users['bob']['upvotes_given'], 1)
+        self.assertEqual(users['albert']['name'], 'albert')
+
+    def test_filters(self):
+        self.assertEqual(list(self.directory(username='al')), ['albert', 'alice'])
+        self.assertEqual(list(self.directory(role='contributor')), ['alice', 'bob'])
+        self.assertEqual(list(self.directory(role='moderator', username='al')), ['albert'])
+        create_user('Alfred')
+        self.assertEqual(list(self.directory(username='Al')), ['Alfred'])
+        self.assertEqual(list(self.directory(username='al')), ['albert', 'alice'])
+        self.assertEqual(list(self.directory(username='AL')), [])
+        # Names that sort next to the prefix once non-ASCII is involved
+        for username in ('ál', 'Ál', 'alé', 'al\U0001f600', 'ałbert', 'am'):
+            User.objects.create_user(username=username)
+        self.assertEqual(sorted(self.directory(username='al')), sorted(['albert', 'alice', 'alé', 'al\U0001f600']))
+        self.assertEqual(list(self.directory(username='ál')), ['ál'])
+        self.assertEqual(list(self.directory(username='ał')), ['ałbert'])
+        User.objects.filter(id=self.bob.id).update(date_joined=timezone.now() - timedelta(days=10))
+        cutoff = (timezone.localdate() - timedelta(days=5)).isoformat()
+        self.assertEqual(list(self.directory(joined_before=cutoff)), ['bob'])
+        self.assertNotIn('bob', self.directory(joined_after=cutoff))
+        self.assertEqual(self.client.get('/api/users/', {'role': 'owner'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/users/', {'ordering': 'email'}).status_code, 400)
+
+    def test_keyset_pages(self):
+        seen, url = [], '/api/users/?ordering=joined&page_size=3'
+        while url:
+            data = self.client.get(url).data
+            seen += [row['username'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(sorted(seen), ['admin', 'albert', 'alice', 'bob'])
+        self.assertEqual(seen[0], 'bob')  # created last
+
+    def test_contributors_are_refused(self):
+        self.assertEqual(api_client_for(self.alice).get('/api/users/').status_code, 403)
+
+
+class BulkUpdateTests(TestCase):
+    url = '/api/feedbacks/bulk_update/'
+
+    def setUp(self):
+        self.moderator = create_user('triager', role='moderator')
+        self.contributor = create_user('dragger')
+        self.board = Board.objects.create(name='Public')
+        self.other_board = Board.objects.create(name='Other')
+        self.private_board = Board.objects.create(name='Private', is_public=False)
+        self.feedbacks = [
+            Feedback.objects.create(board=self.board, user=self.contributor, title=f'Card {i}') for i in range(5)
+        ]
+        self.hidden = Feedback.objects.create(board=self.private_board, user=self.moderator, title='Hidden')
+        self.ids = [feedback.id for feedback in self.feedbacks]
+
+    def post(self, user, data):
+        return api_client_for(user).post(self.url, data, format='json')
+
+    def test_status_change_is_one_update(self):
+        client = api_client_for(self.contributor)
+        self.feedbacks[0].status = 'Completed'
+        self.feedbacks[0].save()
+        self.board.get_stats()
+        data = {'action': 'status', 'ids': [*self.ids, self.hidden.id, 999999], 'status': 'Completed'}
+        client.post(self.url, {'action': 'status', 'ids': [999999], 'status': 'Open'}, format='json')  # warm the auth cache
+
+        # select targets, savepoint, UPDATE, activity rollup, release
+        with self.assertNumQueries(5):
+            response = client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(results[str(self.ids[0])], 'unchanged')
+        self.assertEqual([results[str(i)] for i in self.ids[1:]], ['updated'] * 4)
+        self.assertEqual(results[str(self.hidden.id)], 'not_found')  # private board, contributor
+        self.assertEqual(results['999999'], 'not_found')
+
+        self.assertEqual(Feedback.objects.filter(id__in=self.ids, status='Completed').count(), 5)
+        self.assertEqual(self.board.get_stats()['feedbacks_by_status']['Completed'], 5)
+        activity = BoardActivity.objects.get(board=self.board, day=timezone.localdate(), status='Completed')
+        self.assertEqual(activity.status_changes, 5)
+
+    def test_moderator_moves_and_deletes(self):
+        response = self.post(self.moderator, {'action': 'move', 'ids': self.ids[:2], 'board': self.other_board.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'].values()), {'updated'})
+        self.assertEqual(Feedback.objects.filter(board=self.other_board).count(), 2)
+        fingerprint_boards = FeedbackFingerprint.objects.filter(feedback_id__in=self.ids[:2]).values_list('board_id', flat=True)
+        self.assertEqual(set(fingerprint_boards), {self.other_board.id})
+
+        response = self.post(self.moderator, {'action': 'delete', 'ids': [*self.ids[2:], self.hidden.id]})
+        self.assertEqual(set(response.data['results'].values()), {'deleted'})
+        self.assertFalse(Feedback.objects.filter(id__in=[*self.ids[2:], self.hidden.id]).exists())
+
+    def test_validation_and_permissions(self):
+        self.assertEqual(self.post(self.contributor, {'action': 'delete', 'ids': self.ids}).status_code, 403)
+        self.assertEqual(self.post(self.contributor, {'action': 'move', 'ids': self.ids, 'board': self.other_board.id}).status_code, 403)
+        self.assertEqual(self.post(self.moderator, {'action': 'archive', 'ids': self.ids}).status_code, 400)
+        self.assertEqual(self.post(self.moderator, {'action': 'status', 'ids': self.ids, 'status': 'Done'}).status_code, 400)
+        self.assertEqual(self.post(self.moderator, {'action': 'status', 'ids': ['1'], 'status': 'Open'}).status_code, 400)
+        self.assertEqual(self.post(self.moderator, {'action': 'move', 'ids': self.ids, 'board': 999999}).status_code, 400)
+        too_many = list(range(1, 502))
+        self.assertEqual(self.post(self.moderator, {'action': 'status', 'ids': too_many, 'status': 'Open'}).status_code, 400)
+        self.assertEqual(Feedback.objects.filter(status='Open').count(), 6)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.user = create_user('observer')
+        self.client = api_client_for(self.user)
+        board = Board.objects.create(name='Board')
+        Feedback.objects.create(board=board, user=self.user, title='Measured')
+
+    def sample(self, text, name, **labels):
+        prefix = name + metrics._labels(**labels) + ' '
+        values = [float(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix)]
+        self.assertEqual(len(values), 1, prefix)
+        return values[0]
+
+    def test_routes_are_measured_and_exposed(self):
+        self.client.get('/api/feedbacks/')
+        self.client.get('/api/feedbacks/')
+        self.client.get('/api/no-such-route/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+
+        route = {'route': 'feedback-list', 'method': 'GET'}
+        self.assertEqual(self.sample(text, 'feedback_http_requests_total', **route, status='200'), 2)
+        self.assertEqual(self.sample(text, 'feedback_http_request_duration_seconds_count', **route), 2)
+        self.assertEqual(self.sample(text, 'feedback_http_request_duration_seconds_bucket', **route, le='+Inf'), 2)
+        self.assertGreaterEqual(self.sample(text, 'feedback_db_queries_total', **route), 2)
+        self.assertGreater(self.sample(text, 'feedback_serializer_seconds_total', **route), 0)
+        self.assertGreater(self.sample(text, 'feedback_http_response_bytes_total', **route), 0)
+        self.assertEqual(self.sample(text, 'feedback_http_requests_total', route='unmatched', method='GET', status='404'), 1)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token_protects_endpoint(self):
+        scraper = APIClient()
+        self.assertEqual(scraper.get('/metrics').status_code, 401)
+        self.assertEqual(scraper.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_QUERIES=2)
+    def test_slow_requests_are_logged_with_their_worst_queries(self):
+        with self.assertLogs('feedback_app.metrics', 'WARNING') as logs:
+            self.client.get('/api/feedbacks/')
+        self.assertIn('Slow request GET /api/feedbacks/ (feedback-list)', logs.output[0])
+        self.assertEqual(logs.output[0].count(' ms: '), 2)
+
+    async def test_async_views_share_labels(self):
+        token = await Token.objects.aget(user=self.user)
+        await AsyncClient().get('/api/feedbacks/', headers={'Authorization': f'Token {token.key}'})
+        text = metrics.exposition()
+        route = {'route': 'feedback-list', 'method': 'GET'}
+        self.assertEqual(self.sample(text, 'feedback_http_requests_total', **route, status='200'), 1)
+        self.assertGreater(self.sample(text, 'feedback_db_queries_total', **route), 0)
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_generate_and_run_every_scenario(self):
+        summary = benchmarks.generate(boards=2, users=120, feedbacks=40, comments=60, upvotes=200,
+                                      batch_size=25, log=lambda message: None)
+        self.assertEqual(Feedback.objects.filter(board_id__in=summary['boards']).count(), 40)
+        feedback = Feedback.objects.filter(board_id__in=summary['boards']).order_by('-upvote_count').first()
+        self.assertEqual(feedback.upvote_count, feedback.upvoted_by.count())
+
+        context = benchmarks.Context(summary['boards'][0], workers=2)
+        results = {'results': [benchmarks.run_scenario(name, context, requests=3) for name in benchmarks.SCENARIOS]}
+        for result in results['results']:
+            self.assertEqual(result['errors'], 0, result['scenario'])
+            self.assertGreater(result['queries_per_request'], 0)
+        self.assertEqual(results['results'][0]['requests'], 9)  # board_load makes three requests per iteration
+
+        rows = benchmarks.compare(results, results)
+        self.assertEqual({change for *_, change in rows}, {0.0})
+
+        result = benchmarks.bench_serialization(Feedback.objects.all(), User.objects.first(),
+                                                items=10, fields='id,title', repeat=1)
+        self.assertEqual((result['items'], result['fields']), (10, ['id', 'title']))
+        self.assertGreater(result['serializer_ms'], 0)
+
+        # The serializer is timed on the same fields as the values() path
+        user = User.objects.first()
+        queryset = Feedback.objects.annotate(has_upvoted=Feedback.upvoted_by_user(user)).order_by('id')
+        for names in (['status', 'id'], ['title', 'user', 'has_upvoted'], list(fieldsets.FEEDBACK_FIELDS)):
+            with self.assertNumQueries(1):
+                instances = benchmarks.sparse_instances(queryset, names)
+                data = benchmarks.sparse_serializer(names)(instances, many=True).data
+            rows = fieldsets.compact_values(queryset.select_related('user'), fieldsets.FEEDBACK_FIELDS, names)
+            self.assertEqual(json.loads(json.dumps(data)),
+                             fieldsets.compact_rows(rows, fieldsets.FEEDBACK_FIELDS, names))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = create_user('searcher')
+        self.client = api_client_for(self.user)
+        self.board = Board.objects.create(name='Board')
+        self.other_board = Board.objects.create(name='Other')
+        self.in_title = self.create('Dark mode support', 'Please add it')
+        self.in_description = self.create('Theme options', 'Something like dark mode would help')
+        self.in_comment = self.create('Accessibility', 'Contrast issues')
+        Comment.objects.create(feedback=self.in_comment, user=self.user, text='A dark theme fixes this')
+        self.elsewhere = self.create('Dark mode on mobile', '', board=self.other_board)
+
+    def create(self, title, description, board=None):
+        return Feedback.objects.create(
+            board=board or self.board, user=self.user, title=title, description=description
+        )
+
+    def search(self, **params):
+        response = self.client.get('/api/feedbacks/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def result_ids(self, **params):
+        return [result['id'] for result in self.search(**params)['results']]
+
+    def test_ranks_title_matches_first(self):
+        ids = self.result_ids(q='dark', board=self.board.id)
+        self.assertEqual(ids[0], self.in_title.id)
+        self.assertCountEqual(ids, [self.in_title.id, self.in_description.id, self.in_comment.id])
+
+    def test_board_filter(self):
+        self.assertEqual(self.result_ids(q='mobile'), [self.elsewhere.id])
+        self.assertEqual(self.result_ids(q='mobile', board=self.board.id), [])
+
+    def test_prefix_and_stemming(self):
+        self.assertEqual(self.result_ids(q='contra'), [self.in_comment.id])
+        self.assertIn(self.in_description.id, self.result_ids(q='helping'))
+
+    def test_pagination(self):
+        data = self.search(q='dark', page_size=2)
+        self.assertEqual((len(data['results']), data['next']), (2, 2))
+        data = self.search(q='dark', page_size=2, page=2)
+        self.assertEqual((len(data['results']), data['next']), (2, None))
+
+    def test_index_follows_edits_and_deletes(self):
+        self.in_title.title = 'Light mode support'
+        self.in_title.save()
+        self.assertNotIn(self.in_title.id, self.result_ids(q='dark'))
+        self.assertEqual(self.result_ids(q='light'), [self.in_title.id])
+
+        self.in_comment.comments.all().delete()
+        self.assertNotIn(self.in_comment.id, self.result_ids(q='dark'))
+        self.in_description.delete()
+        self.assertEqual(self.result_ids(q='dark', board=self.board.id), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.result_ids(q='dark" (mode*'), self.result_ids(q='dark mode'))
+        self.assertEqual(self.client.get('/api/feedbacks/search/', {'q': '  '}).status_code, 400)
+
+    def test_rebuild_command(self):
+        Feedback.objects.filter(id=self.in_title.id).update(title='Renamed without signals')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.result_ids(q='renamed'), [self.in_title.id])
+
+
+class DuplicateDetectionTests(TestCase):
+    def setUp(self):
+        self.moderator = create_user('moderator', role='moderator')
+        self.client = api_client_for(self.moderator)
+        self.board = Board.objects.create(name='Board')
+        self.original = Feedback.objects.create(
+            board=self.board, user=self.moderator, title='Add dark mode to the dashboard',
+            description='The dashboard is too bright at night, a dark mode option would help a lot',
+        )
+        Feedback.objects.create(
+            board=self.board, user=self.moderator, title='Export reports as PDF',
+            description='We need to send monthly reports to management as PDF files',
+        )
+
+    def submit(self, title, description, board=None):
+        response = self.client.post('/api/feedbacks/', {
+            'board': (board or self.board).id, 'title': title, 'description': description,
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def test_create_reports_near_duplicates(self):
+        data = self.submit(
+            'Dark mode for the dashboard',
+            'The dashboard is too bright at night, a dark mode option would really help',
+        )
+        self.assertEqual([match['id'] for match in data['possible_duplicates']], [self.original.id])
+        self.assertGreaterEqual(data['possible_duplicates'][0]['similarity'], 0.5)
+
+    def test_unrelated_and_other_board_are_not_reported(self):
+        data = self.submit('Slack integration', 'Post new feedback to a Slack channel')
+        self.assertEqual(data['possible_duplicates'], [])
+        data = self.submit(self.original.title, self.original.description, board=Board.objects.create(name='Other'))
+        self.assertEqual(data['possible_duplicates'], [])
+
+    def test_lookup_uses_fingerprint_index(self):
+        self.assertEqual(self.original.fingerprints.count(), 16)
+        with self.assertNumQueries(2):  # bucket lookup + candidate rows
+            find_duplicates(self.board.id, self.original.title, self.original.description)
+
+    def test_merge_folds_votes_and_comments(self):
+        duplicate = Feedback.objects.create(
+            board=self.board, user=self.moderator, title='Dark mode please', description='Same as the dashboard one',
+        )
+        voters = [create_user(f'voter{i}') for i in range(3)]
+        self.original.toggle_upvote(voters[0])
+        for voter in voters[:2]:
+            duplicate.toggle_upvote(voter)
+        Comment.objects.create(feedback=duplicate, user=voters[2], text='Also on mobile')
+
+        response = self.client.post(f'/api/feedbacks/{self.original.id}/merge/', {'duplicate': duplicate.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['upvote_count'], response.data['comment_count']), (2, 1))
+        self.assertFalse(Feedback.objects.filter(id=duplicate.id).exists())
+        self.assertEqual(self.original.comments.get().text, 'Also on mobile')
+
+    def test_merge_requires_moderator_and_same_board(self):
+        other = Feedback.objects.create(
+            board=Board.objects.create(name='Other'), user=self.moderator, title='Dark mode', description='',
+        )
+        response = self.client.post(f'/api/feedbacks/{self.original.id}/merge/', {'duplicate': other.id})
+        self.assertEqual(response.status_code, 400)
+
+        self.client = api_client_for(create_user('contributor'))
+        response = self.client.post(f'/api/feedbacks/{self.original.id}/merge/', {'duplicate': other.id})
+        self.assertEqual(response.status_code, 403)
+
+    def test_batch_command(self):
+        Feedback.objects.create(
+            board=self.board, user=self.moderator, title='Add a dark mode to the dashboard',
+            description='The dashboard is too bright at night, a dark mode option would help',
+        )
+        out = StringIO()
+        call_command('find_duplicates', rebuild=True, board=self.board.id, stdout=out)
+        self.assertIn('Found 1 likely duplicate pairs.', out.getvalue())
+
+    def test_pairs_are_read_in_batches(self):
+        for suffix in ('at night', 'in the evening', 'after dark'):
+            Feedback.objects.create(
+                board=self.board, user=self.moderator, title='Add a dark mode to the dashboard',
+                description=f'The dashboard is too bright {suffix}, a dark mode option would really help',
+            )
+        expected = list(duplicate_pairs(self.board.id))
+        self.assertEqual(len(expected), 6)
+        # Three batches of pairs plus the empty read that ends them, each batch's text in one query
+        with self.assertNumQueries(7):
+            self.assertEqual(list(duplicate_pairs(self.board.id, batch_size=2)), expected)
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, board_id, event):
+        self.events.append(event)
+
+
+@override_settings(REALTIME_BROKER='feedback_app.tests.RecordingBroker')
+class RealtimeEventTests(TestCase):
+    def setUp(self):
+        self.user = create_user('author')
+        self.board = Board.objects.create(name='Board')
+        self.feedback = Feedback.objects.create(board=self.board, user=self.user, title='Feedback')
+        self.broker = realtime.get_broker()
+        self.broker.events.clear()
+
+    def published(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            action()
+        events, self.broker.events[:] = list(self.broker.events), []
+        return [(event['type'], event['board']) for event in events], events
+
+    def test_feedback_lifecycle(self):
+        types, events = self.published(lambda: Feedback.objects.create(board=self.board, user=self.user, title='New'))
+        self.assertEqual(types, [('feedback.created', self.board.id)])
+        self.assertEqual(events[0]['feedback']['title'], 'New')
+
+        self.feedback.status = 'In Progress'
+        types, events = self.published(self.feedback.save)
+        self.assertEqual(types, [('feedback.updated', self.board.id)])
+        self.assertEqual(events[0]['changes'], {'status': 'In Progress'})
+
+        other = Board.objects.create(name='Other')
+        self.feedback.board = other
+        types, _ = self.published(self.feedback.save)
+        self.assertEqual(types, [('feedback.created', other.id), ('feedback.deleted', self.board.id)])
+
+        types, _ = self.published(self.feedback.delete)
+        self.assertEqual(types, [('feedback.deleted', other.id)])
+
+    def test_upvotes_and_comments(self):
+        types, events = self.published(lambda: self.feedback.toggle_upvote(self.user))
+        self.assertEqual(types, [('feedback.upvotes', self.board.id)])
+        self.assertEqual(events[0]['upvote_count'], 1)
+
+        comment = Comment(feedback=self.feedback, user=self.user, text='Hi')
+        types, events = self.published(comment.save)
+        self.assertEqual(types[-1], ('comment.created', self.board.id))
+        self.assertEqual(events[-1]['comment']['text'], 'Hi')
+
+        types, _ = self.published(comment.delete)
+        self.assertEqual(types[-1], ('comment.deleted', self.board.id))
+
+    def test_nothing_is_published_on_rollback(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    Feedback.objects.create(board=self.board, user=self.user, title='Rolled back')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+
+
+class BoardEventStreamTests(TestCase):
+    def test_stream_delivers_events_published_from_other_threads(self):
+        async def read_two_events():
+            stream = realtime.event_stream(42)
+            ready = await anext(stream)
+            publisher = threading.Thread(
+                target=realtime.get_broker().publish, args=(42, {'type': 'feedback.deleted', 'id': 7}),
+            )
+            # Subscribing happens on the first read after the ready frame
+            next_frame = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.05)
+            publisher.start()
+            frame = await asyncio.wait_for(next_frame, timeout=5)
+            await stream.aclose()
+            return ready, frame
+
+        ready, frame = asyncio.run(read_two_events())
+        self.assertTrue(ready.startswith('retry: 3000\nevent: ready\n'))
+        self.assertEqual(frame, 'event: feedback.deleted\ndata: {"type": "feedback.deleted", "id": 7}\n\n')
+        self.assertEqual(realtime.get_broker()._subscribers, {})
+
+    def test_wsgi_requests_are_told_to_poll(self):
+        board = Board.objects.create(name='Public')
+        client = api_client_for(create_user('viewer'))
+        self.assertEqual(client.get(f'/api/boards/{board.id}/events/').status_code, 501)
+        self.assertEqual(client.post(f'/api/boards/{board.id}/events_token/').status_code, 501)
+
+    async def test_endpoint_requires_stream_token_and_visible_board(self):
+        public = await Board.objects.acreate(name='Public')
+        private = await Board.objects.acreate(name='Private', is_public=False)
+        user = await sync_to_async(create_user)('contributor')
+        api_token = await Token.objects.acreate(user=user)
+        headers = {'Authorization': f'Token {api_token.key}'}
+
+        response = await AsyncClient().get(f'/api/boards/{public.id}/events/')
+        self.assertEqual(response.status_code, 401)
+        # The API token is not accepted in the URL
+        response = await AsyncClient().get(f'/api/boards/{public.id}/events/?token={api_token.key}')
+        self.assertEqual(response.status_code, 401)
+        response = await AsyncClient().post(f'/api/boards/{private.id}/events_token/', headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+        response = await AsyncClient().post(f'/api/boards/{public.id}/events_token/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        stream_token = json.loads(response.content)['token']
+        self.assertNotIn(api_token.key, stream_token)
+        response = await AsyncClient().get(f'/api/boards/{private.id}/events/?stream_token={stream_token}')
+        self.assertEqual(response.status_code, 401)  # issued for another board
+        with override_settings(REALTIME_STREAM_TOKEN_MAX_AGE=-1):
+            response = await AsyncClient().get(f'/api/boards/{public.id}/events/?stream_token={stream_token}')
+        self.assertEqual(response.status_code, 401)
+
+        response = await AsyncClient().get(f'/api/boards/{public.id}/events/?stream_token={stream_token}')
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'event: ready', await anext(stream))
+        await stream.aclose()
+
+    async def test_endpoint_streams_event_source(self):
+        board = await Board.objects.acreate(name='Public')
+        user = await sync_to_async(create_user)('viewer')
+        token = await Token.objects.acreate(user=user)
+
+        response = await AsyncClient().get(f'/api/boards/{board.id}/events/', headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'event: ready', await anext(stream))
+        await stream.aclose()
+
+
+class AsyncReadPathTests(TestCase):
+    """Under ASGI the hot GETs are served by async_views and must match the DRF responses."""
+
+    def setUp(self):
+        self.user = create_user('reader')
+        self.sync_client = api_client_for(self.user)
+        self.headers = {'Authorization': f'Token {Token.objects.get(user=self.user).key}'}
+        self.board = Board.objects.create(name='Board')
+        Board.objects.create(name='Hidden', is_public=False)
+        for i in range(3):
+            feedback = Feedback.objects.create(board=self.board, user=self.user, title=f'Feedback {i}')
+            Comment.objects.create(feedback=feedback, user=self.user, text=f'Comment {i}')
+        self.feedback = feedback
+
+    async def assertSameAsSync(self, url):
+        sync_response = await sync_to_async(self.sync_client.get)(url)
+        async_response = await AsyncClient().get(url, headers=self.headers)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+        return async_response
+
+    async def test_read_endpoints_match_sync_views(self):
+        await self.assertSameAsSync('/api/boards/')
+        await self.assertSameAsSync(f'/api/boards/{self.board.id}/get_stats/')
+        await self.assertSameAsSync(f'/api/feedbacks/?board={self.board.id}&page_size=2')
+        await self.assertSameAsSync(f'/api/comments/?feedback={self.feedback.id}')
+        await self.assertSameAsSync(f'/api/feedbacks/?board={self.board.id}&fields=id,title&ordering=top')
+        await self.assertSameAsSync('/api/comments/?fields=id,text')
+        await self.assertSameAsSync('/api/feedbacks/?board=abc')
+        await self.assertSameAsSync('/api/feedbacks/?fields=id,nope')
+        hidden = await Board.objects.aget(name='Hidden')
+        await self.assertSameAsSync(f'/api/boards/{hidden.id}/get_stats/')
+
+    @override_settings(CONDITIONAL_GET=True)
+    async def test_conditional_get_matches_sync_etags(self):
+        url = f'/api/feedbacks/?board={self.board.id}'
+        sync_response = await sync_to_async(self.sync_client.get)(url)
+        response = await AsyncClient().get(url, headers={**self.headers, 'If-None-Match': sync_response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        response = await AsyncClient().get(f'/api/boards/{self.board.id}/get_stats/', headers=self.headers)
+        response = await AsyncClient().get(
+            f'/api/boards/{self.board.id}/get_stats/', headers={**self.headers, 'If-None-Match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_cursor_links_are_followable(self):
+        response = await AsyncClient().get('/api/feedbacks/?page_size=2', headers=self.headers)
+        next_url = json.loads(response.content)['next']
+        response = await AsyncClient().get(next_url, headers=self.headers)
+        self.assertEqual([item['title'] for item in json.loads(response.content)['results']], ['Feedback 0'])
+
+    async def test_writes_and_anonymous_reads(self):
+        response = await AsyncClient().get('/api/boards/')
+        self.assertEqual(response.status_code, 401)
+        response = await AsyncClient().post(
+            '/api/comments/', {'feedback': self.feedback.id, 'text': 'Async'},
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(await Comment.objects.filter(text='Async').acount(), 1)
+
+    def test_only_asgi_requests_use_async_urlconf(self):
+        self.assertIs(resolve('/api/feedbacks/', urlconf=settings.ASYNC_ROOT_URLCONF).func, async_views.feedback_list)
+        self.assertIsNot(resolve('/api/feedbacks/').func, async_views.feedback_list)
@@ -0,0 +1,327 @@
+"""
+Optional write-behind buffer for upvote toggles.
+
+Normally every toggle is its own transaction on the vote table and the
+feedback row (Feedback.toggle_upvote). When a feedback item is linked
+publicly, hundreds of those land within seconds and SQLite's single writer
+becomes the bottleneck. With UPVOTE_BUFFER set, a toggle only does an
+indexed read of the caller's vote and updates an in-memory entry per
+(feedback, user). A background thread then flushes all entries every
+UPVOTE_FLUSH_INTERVAL_MS in one transaction. That transaction does one
+bulk insert, one delete per feedback, one UPDATE recounting upvote_count,
+and the same hot score, rollup, stats-cache and live-event work as
+toggle_upvote. A vote toggled back before a flush cancels out and is never
+written.
+
+Reads see votes before they are flushed: the toggle response, and
+merge_pending() on feedback responses, add this process's pending deltas to
+upvote_count and has_upvoted. A read can't tell from its rows alone whether
+a flush committed before or after its query. So readers take a generation
+with read_generation() before querying, and merge_pending() re-reads the
+items that flushes since then may have changed. Without that, a vote would
+be counted twice just after a commit, or left out just before one.
+
+LocalUpvoteBuffer keeps entries in this process only. A flush is at most one
+interval behind, so a crash loses at most that many votes; a clean
+shutdown flushes. With several workers each one flushes its own votes,
+which stays correct because flushes recount upvote_count from the vote
+table. A worker's reads only merge its own pending votes. A shared buffer
+can be plugged in through the UPVOTE_BUFFER class path.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict, deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.db.models import OuterRef
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import realtime
+from .models import BoardActivity, Feedback, count_of
+from .stats_cache import invalidate_board_stats, invalidate_board_version
+
+logger = logging.getLogger(__name__)
+
+Vote = Feedback.upvoted_by.through
+
+# Flushes remembered for working out which items a read may have missed; older readers re-read everything
+RECENT_FLUSHES = 64
+
+
+class LocalUpvoteBuffer:
+    def __init__(self, interval_ms=None, max_pending=None):
+        self.interval = (settings.UPVOTE_FLUSH_INTERVAL_MS if interval_ms is None else interval_ms) / 1000
+        self.max_pending = settings.UPVOTE_FLUSH_MAX_PENDING if max_pending is None else max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # (feedback_id, user_id) -> (stored, wanted): the vote state the table will hold once
+        # earlier flushes finish, and the state the user asked for
+        self._pending = {}
+        self._in_flight = {}  # entries taken by the flush that is currently writing
+        # Odd while a flush is committing, bumped again once its entries leave _in_flight
+        self._generation = 0
+        self._settled = threading.Condition(self._lock)
+        self._recent = deque()  # (generation when a flush finished, its feedback ids)
+        self._forgotten = 0  # finishing generation of the newest flush dropped from _recent
+        self._wake = threading.Event()
+        self._thread = None
+
+    # Toggles and reads
+
+    def _state(self, key):
+        """(stored, wanted) for the key from the buffer, or None if only the table knows."""
+        if key in self._pending:
+            return self._pending[key]
+        if key in self._in_flight:
+            wanted = self._in_flight[key][1]
+            return wanted, wanted
+        return None
+
+    def generation(self):
+        """Taken before reading feedback rows and passed to merge_pending()."""
+        with self._lock:
+            return self._generation
+
+    def toggle(self, feedback, user, since=None):
+        """
+        Flips the user's vote in the buffer and returns the same shape as
+        Feedback.toggle_upvote, counting from the upvote_count `feedback` was
+        loaded with. `since` is the generation from before it was loaded.
+        """
+        key = (feedback.id, user.id)
+        while True:
+            with self._lock:
+                state, generation = self._state(key), self._generation
+            if state is None:
+                voted = Vote.objects.filter(feedback_id=feedback.id, user_id=user.id).exists()
+            with self._lock:
+                # A flush that finished since the read may have changed the table; read again
+                if state is None and self._generation != generation:
+                    continue
+                stored, wanted = self._state(key) or (voted, voted)
+                wanted = not wanted
+                if wanted == stored:
+                    self._pending.pop(key, None)
+                else:
+                    self._pending[key] = (stored, wanted)
+                pending = len(self._pending)
+                break
+
+        self._ensure_thread()
+        if pending >= self.max_pending:
+            self._wake.set()
+        # Readers holding this board's ETags must refetch to see the merged count
+        invalidate_board_version(feedback.board_id)
+        item = {'id': feedback.id, 'upvote_count': feedback.upvote_count, 'has_upvoted': wanted}
+        self.merge_pending([item], user.id, self.generation() if since is None else since)
+        return {
+            "has_upvoted": item['has_upvoted'],
+            "upvote_count": item['upvote_count'],
+        }
+
+    def _entries(self):
+        # In-flight entries first: a pending entry for the same key continues from where the
+        # in-flight one leaves the table, so summing both gives the full difference
+        yield from self._in_flight.items()
+        yield from self._pending.items()
+
+    def merge_pending(self, items, user_id, since):
+        """
+        Adds buffered votes to the upvote_count and has_upvoted of serialized
+        feedback dicts read after generation `since`, first re-reading any that
+        a flush may have changed in the meantime.
+        """
+        ids = {item['id'] for item in items if 'id' in item}  # a ?fields= list may leave out any of these
+        while True:
+            with self._lock:
+                stale = self._changed_since(since)
+                stale = ids if stale is None else stale & ids
+                if not stale:
+                    deltas, voted = self._deltas(user_id)
+                    break
+                # Wait out a commit in progress so the re-read sees it
+                self._settled.wait_for(lambda: self._generation % 2 == 0)
+                since = self._generation
+            self._reread([item for item in items if item.get('id') in stale], user_id)
+
+        for item in items:
+            if 'id' not in item:
+                continue
+            if 'upvote_count' in item:
+                item['upvote_count'] += deltas.get(item['id'], 0)
+            if 'has_upvoted' in item and item['id'] in voted:
+                item['has_upvoted'] = voted[item['id']]
+        return items
+
+    def _changed_since(self, since):
+        """
+        Called with the lock held. Feedback ids whose rows a flush may have
+        changed after generation `since`, or None if that is too long ago to say.
+        """
+        if since < self._forgotten:
+            return None
+        changed = set()
+        for finished, feedback_ids in self._recent:
+            if finished > since:
+                changed |= feedback_ids
+        if self._generation % 2:
+            changed.update(feedback_id for feedback_id, _ in self._in_flight)
+        return changed
+
+    def _deltas(self, user_id):
+        # Called with the lock held. Linear in the buffered votes, which a flush keeps small.
+        deltas, voted = defaultdict(int), {}
+        for (feedback_id, entry_user_id), (stored, wanted) in self._entries():
+            deltas[feedback_id] += wanted - stored
+            if entry_user_id == user_id:
+                voted[feedback_id] = wanted
+        return deltas, voted
+
+    def _reread(self, items, user_id):
+        ids = [item['id'] for item in items]
+        counts = dict(Feedback.objects.filter(id__in=ids).values_list('id', 'upvote_count'))
+        if any('has_upvoted' in item for item in items):
+            voted = set(Vote.objects.filter(feedback_id__in=ids, user_id=user_id).values_list('feedback_id', flat=True))
+        for item in items:
+            if 'upvote_count' in item and item['id'] in counts:
+                item['upvote_count'] = counts[item['id']]
+            if 'has_upvoted' in item:
+                item['has_upvoted'] = item['id'] in voted
+
+    # Flushing
+
+    def _ensure_thread(self):
+        if self._thread is not None or not self.interval:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='upvote-flush', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # The entries stay in flight and the next flush retries them
+                logger.exception("Flushing buffered upvotes failed")
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Writes every pending vote in one transaction; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                # A failed flush leaves its entries in flight; fold newer toggles into them
+                for key, (stored, wanted) in self._pending.items():
+                    stored = self._in_flight.get(key, (stored, None))[0]
+                    if wanted == stored:
+                        self._in_flight.pop(key, None)
+                    else:
+                        self._in_flight[key] = (stored, wanted)
+                self._pending = {}
+                entries = dict(self._in_flight)
+            if not entries:
+                return 0
+            written = False
+            try:
+                self._write(entries)
+                written = True
+            finally:
+                with self._lock:
+                    if written:
+                        self._in_flight = {}
+                    if self._generation % 2:
+                        self._generation += 1
+                        self._remember({feedback_id for feedback_id, _ in entries})
+                    self._settled.notify_all()
+            return len(entries)
+
+    def _remember(self, feedback_ids):
+        # Called with the lock held, as a flush that reached its commit finishes
+        if len(self._recent) == RECENT_FLUSHES:
+            self._forgotten = self._recent.popleft()[0]
+        self._recent.append((self._generation, frozenset(feedback_ids)))
+
+    def _write(self, entries):
+        feedback_ids = list({feedback_id for feedback_id, _ in entries})
+        user_ids = {user_id for _, user_id in entries}
+
+        with transaction.atomic():
+            feedbacks = Feedback.objects.filter(id__in=feedback_ids)
+            before = {row[0]: row for row in feedbacks.values_list('id', 'board_id', 'status', 'upvote_count')}
+            # Votes for feedback or users deleted since the toggle are dropped; a foreign key
+            # error would otherwise fail the whole batch on every retry
+            live_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+            added = [Vote(feedback_id=feedback_id, user_id=user_id)
+                     for (feedback_id, user_id), (_, wanted) in entries.items()
+                     if wanted and feedback_id in before and user_id in live_users]
+            removed = defaultdict(list)
+            for (feedback_id, user_id), (_, wanted) in entries.items():
+                if not wanted:
+                    removed[feedback_id].append(user_id)
+            Vote.objects.bulk_create(added, ignore_conflicts=True)
+            for feedback_id, user_ids in removed.items():
+                Vote.objects.filter(feedback_id=feedback_id, user_id__in=user_ids).delete()
+            # Recount rather than add deltas, so other workers' flushes can't make it drift
+            feedbacks.update(upvote_count=count_of(Vote.objects.filter(feedback_id=OuterRef('pk')), 'feedback_id'))
+            Feedback.refresh_hot_scores(feedback_ids)
+
+            after = dict(feedbacks.values_list('id', 'upvote_count'))
+            today = timezone.localdate()
+            activity = defaultdict(int)
+            for feedback_id, board_id, status, upvote_count in before.values():
+                change = after.get(feedback_id, upvote_count) - upvote_count
+                if change:
+                    activity[(board_id, status)] += change
+                    realtime.publish(board_id, 'feedback.upvotes', id=feedback_id, upvote_count=after[feedback_id])
+            for (board_id, status), change in activity.items():
+                BoardActivity.record(board_id, today, status, upvotes=change)
+            for board_id in {row[1] for row in before.values()}:
+                invalidate_board_stats(board_id)
+            # Last, so the odd generation covers only the commit
+            with self._lock:
+                self._generation += 1
+
+
+_buffers = {}
+_buffer_lock = threading.Lock()
+
+
+def get_upvote_buffer():
+    """The configured buffer, or None when toggles write through (the default)."""
+    path = settings.UPVOTE_BUFFER
+    if not path:
+        return None
+    with _buffer_lock:
+        if path not in _buffers:
+            _buffers[path] = import_string(path)()
+        return _buffers[path]
+
+
+def read_generation():
+    """Taken before reading feedback rows whose votes merge_pending() will merge; None without a buffer."""
+    buffer = get_upvote_buffer()
+    return None if buffer is None else buffer.generation()
+
+
+def merge_pending(items, user, since):
+    buffer = get_upvote_buffer()
+    if buffer is None:
+        return items
+    return buffer.merge_pending(items, user.id, since)
+
+
+async def amerge_pending(items, user, since):
+    # May re-read rows, so it runs off the event loop
+    if get_upvote_buffer() is None:
+        return items
+    return await sync_to_async(merge_pending)(items, user, since)
@@ -1,9 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework.authtoken.views import obtain_auth_token
-from .views import toggle_upvote
+from .views import board_events_unavailable, toggle_upvote
 from .views import (
-    login_view, logout_view, register_view, get_user_info,get_users,
+    login_view, logout_view, register_view, get_user_info,get_users, bulk_import, bulk_export,
     BoardViewSet, FeedbackViewSet, CommentViewSet
 )
 
@@ -31,6 +31,10 @@ urlpatterns = [
     path('api-token-auth/', obtain_auth_token, name='api_token_auth'),
     path('feedbacks/<int:feedback_id>/toggle_upvote/', toggle_upvote, name='toggle-upvote'),
     path('users/', get_users, name='get-users'),  
+    path('bulk/import/', bulk_import, name='bulk-import'),
+    path('bulk/export/', bulk_export, name='bulk-export'),
+    # Served by async_views.board_events under ASGI (see feedback_project/urls_async.py)
+    path('boards/<int:board_id>/events/', board_events_unavailable, name='board-events'),
 
 
     #Endpoint: POST /api-token-auth/
@@ -1,13 +1,37 @@
 from rest_framework import permissions, status
-from rest_framework.decorators import (api_view, permission_classes, authentication_classes, action)
+from rest_framework.decorators import (api_view, permission_classes, authentication_classes, action, parser_classes, renderer_classes)
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from django.contrib.auth import authenticate, login
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
-from rest_framework.authentication import TokenAuthentication
+from django.db import connection
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+import hmac
+from datetime import date, datetime, time, timedelta
+from .authentication import CachedTokenAuthentication
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from . import bulk_actions, metrics, realtime
+from .conditional import board_etag, board_list_etag, feedback_list_etag, not_modified, with_etag
+from .bulk import aiter_lines, csv_lines, export_lines, import_records, ndjson_lines
+from .duplicates import find_duplicates, merge_feedback
+from .fieldsets import COMMENT_FIELDS, FEEDBACK_FIELDS, compact_rows, compact_values, parse_fields
 from .models import Board, Feedback, Comment, UserProfile
+from .pagination import FeedbackCursorPagination, UserDirectoryPagination
+from .renderers import CSVRenderer, NDJSONRenderer
+from .rollups import BUCKETS, timeseries
+from .search import search as search_feedbacks
+from .stats_cache import cache_counters, get_board_stats
 from .serializers import (BoardSerializer, FeedbackSerializer, CommentSerializer, UserProfileSerializer)
+from .upvote_buffer import get_upvote_buffer, merge_pending, read_generation
 
 
 @api_view(['POST'])
@@ -62,7 +86,7 @@ def logout_view(request):
 
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 def get_user_info(request):
     user = request.user
     if not hasattr(user, 'userprofile'):
@@ -88,44 +112,418 @@ class IsAdminOrModeratorOrReadOnly(permissions.BasePermission):
         except AttributeError:
             return False
 
+class IsAdminOrModerator(permissions.BasePermission):
+    def has_permission(self, request, view):
+        user = request.user
+        if not user.is_authenticated:
+            return False
+        if user.is_superuser:
+            return True
+        return hasattr(user, 'userprofile') and user.userprofile.role in ['admin', 'moderator']
+
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+MAX_BATCH_FEEDBACKS = 200
+EXPORT_CHUNK_SIZE = 2000
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+FEEDBACK_EXPORT_FIELDS = ['id', 'board', 'title', 'description', 'status',
+                          'upvote_count', 'comment_count', 'created_at']
+USER_DIRECTORY_FIELDS = ['id', 'username', 'email', 'first_name', 'last_name', 'date_joined']
+DEFAULT_LATEST_COMMENTS = 3
+MAX_LATEST_COMMENTS = 50
+MAX_BULK_UPDATE_IDS = 500
+DEFAULT_TIMESERIES_DAYS = 30
+MAX_TIMESERIES_DAYS = 366
+EVENTS_NEED_ASGI = "Live events need the ASGI server; poll the board instead."
+
+def parse_id_list(value, param):
+    ids = [part.strip() for part in value.split(',') if part.strip()]
+    if not all(part.isdigit() for part in ids):
+        raise ValidationError({param: "Must be a comma separated list of integer ids."})
+    return list(dict.fromkeys(int(part) for part in ids))
+
+def created_at_filter(param, value):
+    """
+    Turns created_after / created_before into a range lookup on created_at.
+    A plain YYYY-MM-DD date covers that whole day, so the range stays
+    sargable against the created_at index instead of using __date.
+    """
+    error = ValidationError({param: "Expected an ISO 8601 date or datetime."})
+    try:
+        moment = parse_datetime(value)
+    except ValueError:  # well formed but not a real moment, e.g. 2024-13-01T00:00
+        raise error
+    if moment is not None:
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        lookup = 'created_at__gte' if param == 'created_after' else 'created_at__lte'
+        return {lookup: moment}
+
+    try:
+        day = parse_date(value)
+    except ValueError:  # e.g. 2024-02-30
+        day = None
+    if day is None:
+        raise error
+    if param == 'created_before':
+        if day == date.max:
+            return {}
+        day += timedelta(days=1)
+        lookup = 'created_at__lt'
+    else:
+        lookup = 'created_at__gte'
+    return {lookup: timezone.make_aware(datetime.combine(day, time.min))}
+
+def parse_day(params, param, default):
+    if not params.get(param):
+        return default
+    try:
+        day = parse_date(params[param])
+    except ValueError:  # well formed but not a real date, e.g. 2024-02-30
+        day = None
+    if day is None:
+        raise ValidationError({param: "Expected an ISO 8601 date (YYYY-MM-DD)."})
+    return day
+
+def visible_boards(user):
+    if hasattr(user, 'userprofile') and user.userprofile.role in ['admin', 'moderator']:
+        return Board.objects.all()
+    return Board.objects.filter(is_public=True)
+
+def filter_feedback_list(queryset, params):
+    """The list filters: board, user, status, created_after and created_before."""
+    for param in ('board', 'user'):
+        value = params.get(param)
+        if value:
+            if not value.isdigit():
+                raise ValidationError({param: "Must be an integer id."})
+            queryset = queryset.filter(**{f'{param}_id': int(value)})
+
+    feedback_status = params.get('status')
+    if feedback_status:
+        queryset = queryset.filter(status=feedback_status)
+
+    for param in ('created_after', 'created_before'):
+        value = params.get(param)
+        if value:
+            queryset = queryset.filter(**created_at_filter(param, value))
+
+    return queryset
+
+def filter_user_directory(queryset, params):
+    """The user directory filters: role, username (prefix), joined_after and joined_before."""
+    role = params.get('role')
+    if role:
+        roles = dict(UserProfile.ROLE_CHOICES)
+        if role not in roles:
+            raise ValidationError({'role': f"Must be one of: {', '.join(roles)}."})
+        # Users without a profile count as contributors
+        condition = Q(userprofile__role=role)
+        if role == 'contributor':
+            condition |= Q(userprofile__isnull=True)
+        queryset = queryset.filter(condition)
+
+    prefix = params.get('username')
+    if prefix:
+        if connection.vendor == 'sqlite':
+            # SQLite's LIKE ignores ASCII case and can't use the username index. Its default BINARY
+            # collation compares UTF-8 bytes, so this range is an exact, case-sensitive prefix match
+            # answered from the index; U+10FFFF sorts after any character that can follow the prefix.
+            queryset = queryset.filter(username__gte=prefix, username__lt=prefix + '\U0010ffff')
+        else:
+            # A range would follow the column's collation there; PostgreSQL answers LIKE 'prefix%'
+            # from the varchar_pattern_ops index Django adds for unique columns.
+            queryset = queryset.filter(username__startswith=prefix)
+
+    joined_after = parse_day(params, 'joined_after', None)
+    if joined_after:
+        queryset = queryset.filter(date_joined__gte=timezone.make_aware(datetime.combine(joined_after, time.min)))
+    joined_before = parse_day(params, 'joined_before', None)
+    if joined_before:
+        day_after = joined_before + timedelta(days=1)
+        queryset = queryset.filter(date_joined__lt=timezone.make_aware(datetime.combine(day_after, time.min)))
+    return queryset
+
+def filter_comment_list(queryset, params):
+    feedback_id = params.get('feedback')
+    if feedback_id:
+        if not feedback_id.isdigit():
+            raise ValidationError({'feedback': "Must be an integer id."})
+        queryset = queryset.filter(feedback_id=int(feedback_id))
+    return queryset
+
+def export_response(request, lines, filename):
+    """
+    A streamed download of `lines`. Under ASGI the response gets an async
+    iterator, since Django would buffer a sync one in full before sending it.
+    """
+    if isinstance(request._request, ASGIRequest):
+        lines = aiter_lines(lines)
+    response = StreamingHttpResponse(lines, content_type=request.accepted_renderer.media_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 class BoardViewSet(ModelViewSet):
     queryset = Board.objects.all()
     serializer_class = BoardSerializer
 
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'userprofile') and user.userprofile.role in ['admin', 'moderator']:
-            return Board.objects.all()
-        return Board.objects.filter(is_public=True)
+        return visible_boards(self.request.user)
+
+    # The reads answer a matching If-None-Match with 304 before touching the database; see conditional.py
+
+    def list(self, request, *args, **kwargs):
+        etag = board_list_etag(request.user)
+        return not_modified(request, etag) or with_etag(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = board_etag(request.user, kwargs['pk'], 'board')
+        return not_modified(request, etag) or with_etag(super().retrieve(request, *args, **kwargs), etag)
 
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def get_stats(self, request, pk=None):
+        etag = board_etag(request.user, pk, 'stats')
+        if response := not_modified(request, etag):
+            return response
+        board = self.get_object()
+        stats = get_board_stats(board)
+        return with_etag(Response(stats), etag)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminOrModerator])
+    def stats_cache(self, request):
+        # Hit/miss counters of this worker's board stats cache, for checking hit rate under load
+        return Response(cache_counters())
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def comments(self, request, pk=None):
+        # Latest comments for a whole page of feedback on this board in a single query
+        board = self.get_object()
+        feedback_ids = parse_id_list(request.query_params.get('feedback__in', ''), 'feedback__in')
+        if len(feedback_ids) > MAX_BATCH_FEEDBACKS:
+            raise ValidationError({'feedback__in': f"At most {MAX_BATCH_FEEDBACKS} ids per request."})
+
+        limit = request.query_params.get('limit', str(DEFAULT_LATEST_COMMENTS))
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_LATEST_COMMENTS:
+            raise ValidationError({'limit': f"Must be between 1 and {MAX_LATEST_COMMENTS}."})
+
+        board_feedback_ids = board.feedbacks.filter(id__in=feedback_ids).values('id')
+        comments = Comment.latest_for(board_feedback_ids, int(limit))
+
+        grouped = {str(feedback_id): [] for feedback_id in feedback_ids}
+        for comment in CommentSerializer(comments, many=True).data:
+            grouped[str(comment['feedback'])].append(comment)
+        return Response(grouped)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def events_token(self, request, pk=None):
+        # A short-lived token for opening this board's event stream, which EventSource has to
+        # pass in the URL; the API token would end up in access logs
+        board = self.get_object()
+        if not isinstance(request._request, ASGIRequest):
+            return Response({"detail": EVENTS_NEED_ASGI}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        return Response({
+            'token': realtime.stream_token(request.user.id, board.id),
+            'expires_in': settings.REALTIME_STREAM_TOKEN_MAX_AGE,
+        })
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def timeseries(self, request, pk=None):
+        # Daily or weekly activity from the BoardActivity rollups, for the dashboard charts
         board = self.get_object()
-        stats = board.get_stats()  
-        return Response(stats)
+        params = request.query_params
+        end = parse_day(params, 'to', timezone.localdate())
+        start = parse_day(params, 'from', end - timedelta(days=DEFAULT_TIMESERIES_DAYS - 1))
+        if start > end:
+            raise ValidationError({'from': "Must not be after 'to'."})
+        if (end - start).days >= MAX_TIMESERIES_DAYS:
+            raise ValidationError({'from': f"The range can cover at most {MAX_TIMESERIES_DAYS} days."})
+        bucket = params.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            raise ValidationError({'bucket': f"Must be one of: {', '.join(BUCKETS)}."})
+
+        return Response({
+            'board': board.id,
+            'from': start,
+            'to': end,
+            'bucket': bucket,
+            'series': timeseries(board.id, start, end, bucket),
+        })
 
 class FeedbackViewSet(ModelViewSet):
-    queryset = Feedback.objects.all()
+    queryset = Feedback.objects.select_related('user')
     serializer_class = FeedbackSerializer
     permission_classes = [permissions.IsAuthenticated]  # Only logged-in users
 
-    authentication_classes = [TokenAuthentication]  # Token-based auth
+    authentication_classes = [CachedTokenAuthentication]  # Token-based auth
+    pagination_class = FeedbackCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'export':
+            return filter_feedback_list(queryset, self.request.query_params)
+        queryset = queryset.annotate(has_upvoted=Feedback.upvoted_by_user(self.request.user))
+        if self.action == 'list':
+            queryset = filter_feedback_list(queryset, self.request.query_params)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        etag = feedback_list_etag(request.user, request.query_params)
+        if response := not_modified(request, etag):
+            return response
+        # values() rows rather than serializer instances; ?fields= picks the item fields (see fieldsets.py)
+        names = parse_fields(request.query_params, FEEDBACK_FIELDS)
+        queryset = compact_values(self.filter_queryset(self.get_queryset()), FEEDBACK_FIELDS, names,
+                                  extra=self.paginator.position_columns)
+        since = read_generation()
+        page = self.paginate_queryset(queryset)
+        results = merge_pending(compact_rows(page, FEEDBACK_FIELDS, names), request.user, since)
+        return with_etag(self.get_paginated_response(results), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        since = read_generation()
+        response = super().retrieve(request, *args, **kwargs)
+        merge_pending([response.data], request.user, since)
+        return response
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data['possible_duplicates'] = self.possible_duplicates
+        return response
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        feedback = serializer.save(user=self.request.user)
+        # Flag likely duplicates on the same board so the client can offer a merge
+        self.possible_duplicates = find_duplicates(
+            feedback.board_id, feedback.title, feedback.description, exclude_id=feedback.id
+        )
+
+    @action(detail=True, methods=['get'])
+    def duplicates(self, request, pk=None):
+        feedback = self.get_object()
+        return Response(find_duplicates(
+            feedback.board_id, feedback.title, feedback.description, exclude_id=feedback.id
+        ))
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminOrModerator])
+    def merge(self, request, pk=None):
+        # Fold the feedback given as `duplicate` into this one
+        survivor = self.get_object()
+        duplicate_id = str(request.data.get('duplicate', ''))
+        if not duplicate_id.isdigit():
+            raise ValidationError({'duplicate': "Must be an integer id."})
+        try:
+            duplicate = Feedback.objects.get(id=int(duplicate_id))
+        except Feedback.DoesNotExist:
+            return Response({"error": "Feedback not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            merge_feedback(survivor, duplicate)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(survivor).data)
+
+    @action(detail=False, methods=['post'])
+    def bulk_update(self, request):
+        # {"action": "status" | "move" | "delete", "ids": [...], "status": ..., "board": ...}
+        # applied in one transaction; the response has a result per requested id
+        bulk_action = request.data.get('action')
+        if bulk_action not in bulk_actions.ACTIONS:
+            raise ValidationError({'action': f"Must be one of: {', '.join(bulk_actions.ACTIONS)}."})
+        if bulk_action in bulk_actions.MODERATOR_ACTIONS and not IsAdminOrModerator().has_permission(request, self):
+            raise PermissionDenied("Only admins and moderators can move or delete feedback in bulk.")
+
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids or not all(type(i) is int for i in ids):
+            raise ValidationError({'ids': "Must be a non-empty list of integer ids."})
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BULK_UPDATE_IDS:
+            raise ValidationError({'ids': f"At most {MAX_BULK_UPDATE_IDS} ids per request."})
+
+        boards = visible_boards(request.user)
+        value = None
+        if bulk_action == 'status':
+            value = request.data.get('status')
+            statuses = dict(Feedback.STATUS_CHOICES)
+            if value not in statuses:
+                raise ValidationError({'status': f"Must be one of: {', '.join(statuses)}."})
+        elif bulk_action == 'move':
+            value = request.data.get('board')
+            if type(value) is not int or not boards.filter(id=value).exists():
+                raise ValidationError({'board': "Must be the id of an existing board."})
+
+        results = bulk_actions.apply(Feedback.objects.filter(board__in=boards), ids, bulk_action, value)
+        return Response({'results': {str(feedback_id): result for feedback_id, result in results.items()}})
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        # Ranked full-text search over titles, descriptions and comments, paged by number
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': "A search query is required."})
+
+        board_id = request.query_params.get('board')
+        if board_id is not None and not board_id.isdigit():
+            raise ValidationError({'board': "Must be an integer id."})
+
+        page = request.query_params.get('page', '1')
+        page_size = request.query_params.get('page_size', str(SEARCH_PAGE_SIZE))
+        if not page.isdigit() or int(page) < 1:
+            raise ValidationError({'page': "Must be a positive integer."})
+        if not page_size.isdigit() or not 1 <= int(page_size) <= MAX_SEARCH_PAGE_SIZE:
+            raise ValidationError({'page_size': f"Must be between 1 and {MAX_SEARCH_PAGE_SIZE}."})
+        page, page_size = int(page), int(page_size)
+
+        # One extra hit tells us whether there is a next page without a COUNT
+        hits = search_feedbacks(query, board_id=board_id and int(board_id),
+                                limit=page_size + 1, offset=(page - 1) * page_size)
+        has_next = len(hits) > page_size
+        hits = hits[:page_size]
+
+        feedbacks = self.get_queryset().in_bulk([feedback_id for feedback_id, _ in hits])
+        results = []
+        for feedback_id, score in hits:
+            if feedback_id in feedbacks:
+                results.append({**self.get_serializer(feedbacks[feedback_id]).data, 'rank': score})
+
+        return Response({
+            'page': page,
+            'next': page + 1 if has_next else None,
+            'previous': page - 1 if page > 1 else None,
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        # Takes the same filters as the list. Rows come from a values() server-side
+        # iterator and are streamed as they are read, so memory stays flat.
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .order_by('-created_at', 'id')
+            .values(*FEEDBACK_EXPORT_FIELDS, board_name=F('board__name'), username=F('user__username'))
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        fmt = request.accepted_renderer.format
+        if fmt == 'csv':
+            lines = csv_lines(rows, [*FEEDBACK_EXPORT_FIELDS, 'board_name', 'username'])
+        else:
+            lines = ndjson_lines(rows)
+
+        return export_response(request, lines, f'feedbacks.{fmt}')
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 def toggle_upvote(request, feedback_id):
     try:
+        # With a write-behind buffer configured the vote is written by its next flush
+        buffer = get_upvote_buffer()
+        since = buffer and buffer.generation()
         feedback = Feedback.objects.get(id=feedback_id)
         user = request.user  
 
-        result = feedback.toggle_upvote(user)
+        result = buffer.toggle(feedback, user, since) if buffer else feedback.toggle_upvote(user)
         return Response(result, status=status.HTTP_200_OK)
     
     except Feedback.DoesNotExist:
@@ -135,14 +533,37 @@ def toggle_upvote(request, feedback_id):
 
 
 class CommentViewSet(ModelViewSet):
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('user')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filter_comment_list(queryset, self.request.query_params)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        names = parse_fields(request.query_params, COMMENT_FIELDS)
+        rows = compact_values(self.filter_queryset(self.get_queryset()), COMMENT_FIELDS, names)
+        return Response(compact_rows(rows, COMMENT_FIELDS, names))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
         
+def board_events_unavailable(request, board_id):
+    # Under WSGI a stream would tie up a worker thread for as long as the tab stays open
+    return JsonResponse({"detail": EVENTS_NEED_ASGI}, status=501)
+
+@require_GET
+def metrics_view(request):
+    # Prometheus scrape target. Plain Django rather than DRF: scrapers use METRICS_TOKEN, not user tokens
+    expected = f'Bearer {settings.METRICS_TOKEN}'
+    if settings.METRICS_TOKEN and not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_users(request):
@@ -150,28 +571,54 @@ def get_users(request):
     user = request.user
     if not hasattr(user, 'userprofile') or user.userprofile.role not in ['admin', 'moderator']:
         return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
-    
-    users_data = []
-    users = User.objects.all().prefetch_related('userprofile')
-    
-    for user in users:
-        user_data = {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'name': f"{user.first_name} {user.last_name}".strip() or user.username,
-            'created_at': user.date_joined,
-        }
-        
-        if hasattr(user, 'userprofile'):
-            user_data.update({
-                'role': user.userprofile.role.lower(),
-            })
-        else:
-            user_data.update({
-                'role': 'contributor',
-            })
-        
-        users_data.append(user_data)
-    
-    return Response(users_data)
\ No newline at end of file
+
+    # One query per page: users joined to their profiles, projected with values()
+    # and annotated with activity counts, paged by keyset rather than loaded whole
+    users = filter_user_directory(User.objects.all(), request.query_params).values(
+        *USER_DIRECTORY_FIELDS,
+        role=Coalesce(F('userprofile__role'), Value('contributor')),
+        **UserProfile.activity_counters(),
+    )
+    paginator = UserDirectoryPagination()
+    page = paginator.paginate_queryset(users, request)
+    # New dicts: the paginator reads the next/previous cursor from the page rows themselves
+    results = [directory_entry(row) for row in page]
+    return paginator.get_paginated_response(results)
+
+def directory_entry(row):
+    entry = {key: value for key, value in row.items() if key not in ('first_name', 'last_name', 'date_joined')}
+    entry['name'] = f"{row['first_name']} {row['last_name']}".strip() or row['username']
+    entry['created_at'] = row['date_joined']
+    return entry
+
+@api_view(['POST'])
+@permission_classes([IsAdminOrModerator])
+@parser_classes([MultiPartParser])
+def bulk_import(request):
+    # Upload an NDJSON or CSV file as `file`; records are written in chunked bulk inserts
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "Upload a file in the 'file' field."}, status=status.HTTP_400_BAD_REQUEST)
+
+    fmt = request.data.get('format') or ('csv' if upload.name.endswith('.csv') else 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return Response({"error": "format must be 'ndjson' or 'csv'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    result = import_records(
+        upload,
+        fmt=fmt,
+        create_users=request.data.get('create_users') in ('1', 'true', 'True'),
+    )
+    return Response(result, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrModerator])
+@renderer_classes([NDJSONRenderer, CSVRenderer])
+def bulk_export(request):
+    # Streams boards, feedbacks, comments and upvotes without loading a board into memory
+    fmt = request.accepted_renderer.format
+    board_ids = None
+    if request.query_params.get('board'):
+        board_ids = parse_id_list(request.query_params['board'], 'board')
+
+    return export_response(request, export_lines(fmt, board_ids), f'feedback-export.{fmt}')
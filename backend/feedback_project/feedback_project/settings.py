@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +50,7 @@ CORS_ALLOWED_ORIGINS = ['http://localhost:5173'] # Add the frontend URL here
 
 
 MIDDLEWARE = [
+    'feedback_app.middleware.request_metrics',  # first, so it times everything below
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -57,10 +59,12 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    
+    'feedback_app.middleware.async_read_path',
 ]
 
 ROOT_URLCONF = 'feedback_project.urls'
+# Used instead of ROOT_URLCONF for requests served under ASGI (see feedback_app/async_views.py)
+ASYNC_ROOT_URLCONF = 'feedback_project.urls_async'
 
 TEMPLATES = [
     {
@@ -84,13 +88,152 @@ WSGI_APPLICATION = 'feedback_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE=postgres switches to PostgreSQL (needs psycopg; see the POSTGRES_* variables below). The default is
+# SQLite. SQLITE_WAL=1 puts it in WAL mode, so readers don't block the single writer and commits skip a full
+# fsync. WAL is a property of the database file and stays on after the first connection, so it is opt-in
+# rather than applied to the checked-in dev database by every manage.py run.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+SQLITE_WAL = os.environ.get('SQLITE_WAL', '0') == '1'
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'feedback'),
+            'USER': os.environ.get('POSTGRES_USER', 'feedback'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('POSTGRES_POOL_MAX_SIZE'):
+        # psycopg's pool (needs psycopg[pool]); Django requires CONN_MAX_AGE = 0 alongside it
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ['POSTGRES_POOL_MAX_SIZE']),
+            'timeout': int(os.environ.get('POSTGRES_POOL_TIMEOUT', 10)),
+        }
+    else:
+        # Persistent per-worker connections, checked before reuse so a dropped one isn't handed out
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    if os.environ.get('POSTGRES_PGBOUNCER'):
+        # Transaction-mode PgBouncer can't keep the server-side cursors .iterator() opens
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Take the write lock at BEGIN so concurrent writers (e.g. upvotes) wait
+                # on the busy timeout instead of failing when upgrading a read lock.
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20)),  # seconds, sets busy_timeout
+                'init_command': (
+                    # synchronous=NORMAL is only crash-safe together with WAL
+                    ('PRAGMA journal_mode=WAL;PRAGMA synchronous=NORMAL;' if SQLITE_WAL else '')
+                    + 'PRAGMA cache_size=-20000;'  # 20 MB page cache per connection
+                    'PRAGMA temp_store=MEMORY'
+                ),
+            },
+            'TEST': {
+                # A file rather than shared-cache memory, so the concurrency tests get real locking
+                'NAME': BASE_DIR / 'test_db.sqlite3',
+            },
+        }
+    }
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Board stats default to a per-process LRU; set BOARD_STATS_REDIS_URL to share them between workers.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'board_stats': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'board-stats',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'auth_tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth-tokens',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+if os.environ.get('BOARD_STATS_REDIS_URL'):
+    CACHES['board_stats'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['BOARD_STATS_REDIS_URL'],
     }
+
+BOARD_STATS_CACHE_TTL = int(os.environ.get('BOARD_STATS_CACHE_TTL', 300))  # seconds
+
+# ETags and 304s (feedback_app/conditional.py) rely on version tokens in the board_stats cache.
+# None sends them only when that cache is shared between workers (Redis); set CONDITIONAL_GET=1
+# for a single-process server with the local-memory cache, or 0 to turn them off.
+CONDITIONAL_GET = (
+    os.environ['CONDITIONAL_GET'].lower() in ('1', 'true', 'yes') if os.environ.get('CONDITIONAL_GET') else None
+)
+
+# Hot ranking (feedback_app/ranking.py). 'log' scores never go stale; 'gravity' decays with
+# wall-clock time and needs `manage.py recompute_hot_scores` run periodically.
+
+RANKING = {
+    'ALGORITHM': os.environ.get('RANKING_ALGORITHM', 'log'),
+    'COMMENT_WEIGHT': 0.5,  # points per comment; an upvote is 1
+    'DECAY_SECONDS': 45000,  # 'log': a tenfold increase in points equals 12.5 hours of recency
+    'GRAVITY': 1.8,  # 'gravity': exponent on age in hours
 }
 
+# Resolved auth tokens (feedback_app/authentication.py). Entries are dropped on logout and role
+# changes; with a per-process cache other workers see those after at most this many seconds.
+if os.environ.get('AUTH_TOKEN_REDIS_URL'):
+    CACHES['auth_tokens'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['AUTH_TOKEN_REDIS_URL'],
+    }
+
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 60))  # seconds
+
+
+# Live board events (feedback_app/realtime.py), streamed at /api/boards/<id>/events/. Streaming needs
+# an ASGI server (uvicorn feedback_project.asgi:application); under WSGI the endpoint answers 501 and
+# clients poll. The local broker only reaches clients connected to the same process; use Redis with
+# several workers. Streams are opened with stream tokens valid for REALTIME_STREAM_TOKEN_MAX_AGE seconds.
+
+REALTIME_REDIS_URL = os.environ.get('REALTIME_REDIS_URL')
+REALTIME_BROKER = (
+    'feedback_app.realtime.RedisBroker' if REALTIME_REDIS_URL else 'feedback_app.realtime.LocalBroker'
+)
+REALTIME_STREAM_TOKEN_MAX_AGE = int(os.environ.get('REALTIME_STREAM_TOKEN_MAX_AGE', 60))  # seconds
+
+
+# Write-behind upvotes (feedback_app/upvote_buffer.py). Off unless UPVOTE_WRITE_BEHIND is set: toggles
+# are then buffered per process and written every UPVOTE_FLUSH_INTERVAL_MS, or sooner once
+# UPVOTE_FLUSH_MAX_PENDING votes are waiting. A crash loses at most one interval of votes.
+
+UPVOTE_BUFFER = (
+    'feedback_app.upvote_buffer.LocalUpvoteBuffer' if os.environ.get('UPVOTE_WRITE_BEHIND') else None
+)
+UPVOTE_FLUSH_INTERVAL_MS = int(os.environ.get('UPVOTE_FLUSH_INTERVAL_MS', 200))
+UPVOTE_FLUSH_MAX_PENDING = int(os.environ.get('UPVOTE_FLUSH_MAX_PENDING', 1000))
+
+
+# Request metrics (feedback_app/metrics.py), served in the Prometheus format at /metrics.
+# With METRICS_TOKEN set, scrapers must send "Authorization: Bearer <token>".
+# SLOW_REQUEST_MS logs slower requests with their SLOW_REQUEST_QUERIES slowest queries.
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+SLOW_REQUEST_MS = int(os.environ['SLOW_REQUEST_MS']) if os.environ.get('SLOW_REQUEST_MS') else None
+SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 3))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -131,7 +274,7 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [ # we are telling django to use token for authentication
-        'rest_framework.authentication.TokenAuthentication',  # token are used for authentication
+        'feedback_app.authentication.CachedTokenAuthentication',  # token are used for authentication, cached per token
     ],
     'DEFAULT_PERMISSION_CLASSES': [#only authenticated users will be allowed to access the api
         'rest_framework.permissions.IsAuthenticated', #we can use AllowAny to allow all users to access the api
@@ -0,0 +1,21 @@
+"""
+URL configuration for requests served under ASGI.
+
+The hot read endpoints resolve to the coroutine views in
+feedback_app.async_views first; everything else falls through to the
+regular urlpatterns.
+"""
+from django.urls import path
+
+from feedback_app import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+# Named like the router routes they shadow, so request metrics use the same labels under ASGI
+urlpatterns = [
+    path('api/boards/', async_views.board_list, name='board-list'),
+    path('api/boards/<int:pk>/get_stats/', async_views.board_stats, name='board-get-stats'),
+    path('api/feedbacks/', async_views.feedback_list, name='feedback-list'),
+    path('api/comments/', async_views.comment_list, name='comment-list'),
+    # Streaming only works under ASGI, so the sync urlpatterns route this path to a 501
+    path('api/boards/<int:board_id>/events/', async_views.board_events, name='board-events'),
+] + sync_urlpatterns
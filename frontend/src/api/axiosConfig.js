@@ -1,7 +1,7 @@
 import axios from "axios";
 import { logoutUser } from "./auth";
 
-const API_BASE_URL = "http://localhost:8000/api/";
+export const API_BASE_URL = "http://localhost:8000/api/";
 
 const axiosInstance = axios.create({
   baseURL: API_BASE_URL,
@@ -0,0 +1,96 @@
+import axiosInstance, { API_BASE_URL } from "./axiosConfig";
+
+const EVENT_TYPES = [
+  "feedback.created", "feedback.updated", "feedback.deleted", "feedback.upvotes",
+  "comment.created", "comment.deleted", "resync",
+];
+const RECONNECT_DELAY_MS = 3000;
+const POLL_INTERVAL_MS = 30000;
+
+// Live changes to a board over server-sent events. EventSource can't set headers, so each
+// connection uses a short-lived stream token for this board instead of the API token. Servers
+// without ASGI answer the token request with 501; then a "resync" is sent every
+// POLL_INTERVAL_MS so the board refetches. Returns a function that stops either.
+export const subscribeToBoard = (boardId, onEvent) => {
+  let source = null;
+  let timer = null;
+  let stopped = false;
+  let connectedBefore = false;
+
+  const connect = async () => {
+    let token;
+    try {
+      const response = await axiosInstance.post(`boards/${boardId}/events_token/`);
+      token = response.data.token;
+    } catch (err) {
+      if (stopped) return;
+      if (err.response?.status === 501) {
+        timer = setInterval(() => onEvent({ type: "resync" }), POLL_INTERVAL_MS);
+      } else {
+        timer = setTimeout(connect, RECONNECT_DELAY_MS);
+      }
+      return;
+    }
+    if (stopped) return;
+
+    source = new EventSource(
+      `${API_BASE_URL}boards/${boardId}/events/?stream_token=${encodeURIComponent(token)}`
+    );
+    EVENT_TYPES.forEach((type) =>
+      source.addEventListener(type, (message) => onEvent(JSON.parse(message.data)))
+    );
+    source.addEventListener("ready", () => {
+      // Events sent while we were disconnected are lost, so refetch after a reconnect
+      if (connectedBefore) onEvent({ type: "resync" });
+      connectedBefore = true;
+    });
+    source.onerror = () => {
+      // EventSource would retry with the same, soon expired, token; reconnect with a new one
+      source.close();
+      if (!stopped) timer = setTimeout(connect, RECONNECT_DELAY_MS);
+    };
+  };
+
+  connect();
+  return () => {
+    stopped = true;
+    clearTimeout(timer);
+    clearInterval(timer);
+    if (source) source.close();
+  };
+};
+
+// Applies one event to a list of feedbacks. Events for our own writes arrive too,
+// so inserts are skipped when the item is already present.
+export const applyBoardEvent = (feedbacks, event) => {
+  switch (event.type) {
+    case "feedback.created":
+      if (feedbacks.some((feedback) => feedback.id === event.feedback.id)) return feedbacks;
+      return [{ ...event.feedback, comments: [] }, ...feedbacks];
+    case "feedback.updated":
+      return feedbacks.map((feedback) =>
+        feedback.id === event.id ? { ...feedback, ...event.changes } : feedback
+      );
+    case "feedback.deleted":
+      return feedbacks.filter((feedback) => feedback.id !== event.id);
+    case "feedback.upvotes":
+      // has_upvoted is per user, so only the count is taken from the event
+      return feedbacks.map((feedback) =>
+        feedback.id === event.id ? { ...feedback, upvote_count: event.upvote_count } : feedback
+      );
+    case "comment.created":
+      return feedbacks.map((feedback) => {
+        if (feedback.id !== event.comment.feedback) return feedback;
+        if (feedback.comments?.some((comment) => comment.id === event.comment.id)) return feedback;
+        return { ...feedback, comments: [...(feedback.comments || []), event.comment] };
+      });
+    case "comment.deleted":
+      return feedbacks.map((feedback) =>
+        feedback.id === event.feedback
+          ? { ...feedback, comments: (feedback.comments || []).filter((comment) => comment.id !== event.id) }
+          : feedback
+      );
+    default:
+      return feedbacks;
+  }
+};
@@ -0,0 +1,39 @@
+import axiosInstance from "./axiosConfig";
+
+// One page of the cursor-paginated feedback list: { results, next, previous }.
+// Pass the page's `next` or `previous` URL as `cursorUrl` to move through the list.
+export const fetchFeedbackPage = async (params = {}, cursorUrl = null) => {
+  const response = cursorUrl
+    ? await axiosInstance.get(cursorUrl)
+    : await axiosInstance.get("feedbacks/", { params });
+  return response.data;
+};
+
+// Appends a page to the items already shown, skipping any that arrived meanwhile (live events, local moves).
+export const appendPage = (items, results) => {
+  const shown = new Set(items.map((item) => item.id));
+  return [...items, ...results.filter((item) => !shown.has(item.id))];
+};
+
+// Latest comments for many feedbacks on a board, batched to the server's per-request id limit.
+export const fetchLatestComments = async (boardId, feedbackIds, limit = 50) => {
+  const batchSize = 200;
+  const commentsByFeedback = {};
+
+  for (let start = 0; start < feedbackIds.length; start += batchSize) {
+    const ids = feedbackIds.slice(start, start + batchSize);
+    const response = await axiosInstance.get(`boards/${boardId}/comments/`, {
+      params: { feedback__in: ids.join(","), limit },
+    });
+    Object.assign(commentsByFeedback, response.data);
+  }
+
+  return commentsByFeedback;
+};
+
+// Status changes, board moves or deletions for many feedbacks in one request.
+// Resolves to { results: { [id]: "updated" | "unchanged" | "deleted" | "not_found" } }.
+export const bulkUpdateFeedbacks = async (action, ids, fields = {}) => {
+  const response = await axiosInstance.post("feedbacks/bulk_update/", { action, ids, ...fields });
+  return response.data;
+};
@@ -2,7 +2,7 @@ import React, { useEffect, useState, useMemo } from "react";
 import { getUserProfile } from "../../api/auth";
 import axiosInstance from "../../api/axiosConfig";
 import { MessageSquare, ThumbsUp, Activity, ListChecks, TrendingUp, Users, Clock} from "lucide-react";
-import { PieChart, Pie, Tooltip, ResponsiveContainer, Cell, Legend} from "recharts";
+import { PieChart, Pie, Tooltip, ResponsiveContainer, Cell, Legend, LineChart, Line, XAxis, YAxis, CartesianGrid} from "recharts";
 
 const COLORS = ["#0088FE", "#00C49F", "#FFBB28"];
 const INITIAL_STATS = {
@@ -141,6 +141,48 @@ const StatusChart = ({ feedbacksByStatus }) => {
   );
 };
 
+const ACTIVITY_LINES = [
+  { key: "new_feedbacks", name: "New feedback", color: "#0088FE" },
+  { key: "upvotes", name: "Upvotes", color: "#00C49F" },
+  { key: "comments", name: "Comments", color: "#FFBB28" },
+  { key: "status_changes", name: "Status changes", color: "#8884d8" }
+];
+
+const ActivityChart = ({ series, bucket, onBucketChange }) => (
+  <div className="bg-white rounded-xl shadow-sm p-6 mb-6">
+    <div className="flex items-center justify-between mb-4">
+      <h3 className="text-lg font-semibold text-gray-800">Activity</h3>
+      <select
+        className="p-1.5 border border-gray-200 rounded-lg bg-white text-sm focus:outline-none focus:ring-2 focus:ring-blue-500"
+        value={bucket}
+        onChange={onBucketChange}
+      >
+        <option value="day">Daily</option>
+        <option value="week">Weekly</option>
+      </select>
+    </div>
+
+    {series.length > 0 ? (
+      <ResponsiveContainer width="100%" height={260}>
+        <LineChart data={series}>
+          <CartesianGrid strokeDasharray="3 3" stroke="#f0f0f0" />
+          <XAxis dataKey="date" fontSize={12} />
+          <YAxis allowDecimals={false} fontSize={12} />
+          <Tooltip />
+          <Legend />
+          {ACTIVITY_LINES.map(line => (
+            <Line key={line.key} type="monotone" dataKey={line.key} name={line.name} stroke={line.color} dot={false} />
+          ))}
+        </LineChart>
+      </ResponsiveContainer>
+    ) : (
+      <div className="flex items-center justify-center h-64 bg-gray-50 rounded-lg text-center text-gray-500">
+        No activity yet
+      </div>
+    )}
+  </div>
+);
+
 const Dashboard = () => {
   const [user, setUser] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
@@ -148,6 +190,8 @@ const Dashboard = () => {
   const [selectedBoardId, setSelectedBoardId] = useState(null);
   const [boards, setBoards] = useState([]);
   const [statusFilter, setStatusFilter] = useState("all");
+  const [activity, setActivity] = useState([]);
+  const [bucket, setBucket] = useState("day");
 
   const fetchDashboardData = async () => {
     try {
@@ -163,7 +207,7 @@ const Dashboard = () => {
       if (boardsRes.data?.length > 0) {
         const boardId = boardsRes.data[0].id;
         setSelectedBoardId(boardId);
-        await updateData(boardId, statusFilter);
+        await updateData(boardId, statusFilter, bucket);
       }
     } 
     catch (error) {
@@ -174,11 +218,15 @@ const Dashboard = () => {
     }
   };
 
-  const updateData = async (boardId, status) => {
+  const updateData = async (boardId, status, activityBucket) => {
     try {
       setIsLoading(true);
-      const statsRes = await axiosInstance.get(`/boards/${boardId}/get_stats/`);
+      const [statsRes, activityRes] = await Promise.all([
+        axiosInstance.get(`/boards/${boardId}/get_stats/`),
+        axiosInstance.get(`/boards/${boardId}/timeseries/`, { params: { bucket: activityBucket } })
+      ]);
       setStats(statsRes.data);
+      setActivity(activityRes.data.series);
     } catch (error) {
       console.error("Error updating data:", error);
     } finally {
@@ -189,13 +237,19 @@ const Dashboard = () => {
   const handleStatusFilterChange = (e) => {
     const status = e.target.value;
     setStatusFilter(status);
-    updateData(selectedBoardId, status);
+    updateData(selectedBoardId, status, bucket);
   };
 
   const handleBoardChange = (e) => {
     const boardId = e.target.value;
     setSelectedBoardId(boardId);
-    updateData(boardId, statusFilter);
+    updateData(boardId, statusFilter, bucket);
+  };
+
+  const handleBucketChange = (e) => {
+    const activityBucket = e.target.value;
+    setBucket(activityBucket);
+    updateData(selectedBoardId, statusFilter, activityBucket);
   };
 
   const statCardData = useMemo(() => [
@@ -262,6 +316,8 @@ const Dashboard = () => {
           ))}
         </div>
         
+        <ActivityChart series={activity} bucket={bucket} onBucketChange={handleBucketChange} />
+
         <div className="grid grid-cols-1 lg:grid-cols-3 gap-6">
           <div className="lg:col-span-2">
             <div className="bg-white rounded-xl shadow-sm p-6">
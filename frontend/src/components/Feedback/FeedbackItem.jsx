@@ -140,17 +140,12 @@ const FeedbackItem = ({
       const response = await axiosInstance.post(`feedbacks/${localFeedback.id}/toggle_upvote/`);
 
       if (response?.data) {
-        // Ensure upvoted_by is always an array
-        const upvotedBy = Array.isArray(response.data.upvoted_by) 
-          ? response.data.upvoted_by 
-          : [];
-        
         console.log("Toggle Upvote Response:", response.data);
         
         setLocalFeedback(prev => ({
           ...prev,
-          upvoted_by: upvotedBy,
-          upvote_count: response.data.upvote_count || upvotedBy.length
+          has_upvoted: response.data.has_upvoted,
+          upvote_count: response.data.upvote_count
         }));
         
         onToggleUpvote(localFeedback.id, response.data);
@@ -192,28 +187,16 @@ const FeedbackItem = ({
     return <div className="bg-white rounded-xl shadow-lg p-6">Loading feedback...</div>;
   }
 
-  // FIX: Better handling of upvote count
-  // First ensure we have an array of upvoted_by
-  const upvotedBy = Array.isArray(localFeedback.upvoted_by) 
-    ? localFeedback.upvoted_by 
-    : [];
-  
-  // Use upvote_count if available, otherwise fall back to array length
-  const upvotedByCount = localFeedback.upvote_count !== undefined 
-    ? localFeedback.upvote_count 
-    : upvotedBy.length;
+  const upvotedByCount = localFeedback.upvote_count || 0;
 
-  // Fix 7: More reliable upvote check
-  const isUpvotedByCurrentUser = currentUser 
-    ? upvotedBy.some(id => String(id) === String(currentUser.id)) 
-    : false;
+  // The server reports the caller's own vote state; it never sends the voter list
+  const isUpvotedByCurrentUser = currentUser ? Boolean(localFeedback.has_upvoted) : false;
   
   // Log upvote data for debugging
   useEffect(() => {
     console.log("Upvote data:", {
       upvote_count: localFeedback.upvote_count,
-      upvoted_by: localFeedback.upvoted_by,
-      calculated_count: upvotedByCount
+      has_upvoted: localFeedback.has_upvoted
     });
   }, [localFeedback]);
   
@@ -1,13 +1,34 @@
 import React, { useEffect, useState, useCallback } from "react";
-import axiosInstance from "../../api/axiosConfig";
+import { appendPage, fetchFeedbackPage, fetchLatestComments } from "../../api/feedbacks";
+import { applyBoardEvent, subscribeToBoard } from "../../api/boardEvents";
 import FeedbackForm from "./FeedbackForm";
 import FeedbackItem from "./FeedbackItem";
 import LoadingState from "../common/LoadingState";
 import ErrorState from "../common/ErrorState";
 
+// Adds the latest comments of every feedback with comments, loaded in one batched request
+const withLatestComments = async (boardId, feedbacks) => {
+  const idsWithComments = feedbacks
+    .filter(feedback => feedback.comment_count > 0)
+    .map(feedback => feedback.id);
+  let commentsByFeedback = {};
+  try {
+    commentsByFeedback = await fetchLatestComments(boardId, idsWithComments);
+  } catch (error) {
+    console.error(`Error fetching comments for board ${boardId}:`, error);
+  }
+  return feedbacks.map(feedback => ({
+    ...feedback,
+    comments: commentsByFeedback[feedback.id] || [],
+  }));
+};
+
+// Shows the board a page at a time; "Load more" follows the list's cursor.
 const FeedbackSystem = ({ boardId, currentUser }) => {
   const [feedbacks, setFeedbacks] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
 
   const fetchBoardFeedbacks = useCallback(async () => {
@@ -15,26 +36,9 @@ const FeedbackSystem = ({ boardId, currentUser }) => {
     
     setLoading(true);
     try {
-      const response = await axiosInstance.get(`feedbacks/`);
-      const filteredFeedbacks = response.data.filter(feedback => feedback.board === parseInt(boardId, 10));
-      
-      // Fetch comments for feedbacks with comments but no loaded comment data
-      const feedbacksWithComments = await Promise.all(
-        filteredFeedbacks.map(async (feedback) => {
-          if (feedback.comment_count > 0 && (!feedback.comments || feedback.comments.length === 0)) {
-            try {
-              const commentsResponse = await axiosInstance.get(`comments/?feedback=${feedback.id}`);
-              return { ...feedback, comments: commentsResponse.data };
-            } catch (error) {
-              console.error(`Error fetching comments for feedback ${feedback.id}:`, error);
-              return { ...feedback, comments: [] };
-            }
-          }
-          return feedback;
-        })
-      );
-      
-      setFeedbacks(feedbacksWithComments);
+      const page = await fetchFeedbackPage({ board: boardId });
+      setFeedbacks(await withLatestComments(boardId, page.results));
+      setNextUrl(page.next);
       setError(null);
     } catch (error) {
       console.error("Error fetching feedbacks:", error);
@@ -44,12 +48,38 @@ const FeedbackSystem = ({ boardId, currentUser }) => {
     }
   }, [boardId]);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await fetchFeedbackPage({}, nextUrl);
+      const pageWithComments = await withLatestComments(boardId, page.results);
+      setFeedbacks(prev => appendPage(prev, pageWithComments));
+      setNextUrl(page.next);
+    } catch (error) {
+      console.error("Error fetching more feedbacks:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     if (boardId) {
       fetchBoardFeedbacks();
     }
   }, [boardId, fetchBoardFeedbacks]);
 
+  // Apply other users' changes as they happen; reload if the stream fell behind
+  useEffect(() => {
+    if (!boardId) return undefined;
+    return subscribeToBoard(boardId, (event) => {
+      if (event.type === "resync") {
+        fetchBoardFeedbacks();
+      } else {
+        setFeedbacks(prev => applyBoardEvent(prev, event));
+      }
+    });
+  }, [boardId, fetchBoardFeedbacks]);
+
   const updateFeedbackById = useCallback((feedbackId, updateFn) => {
     setFeedbacks(prev => prev.map(feedback => 
       feedback.id === feedbackId ? updateFn(feedback) : feedback
@@ -153,6 +183,17 @@ const FeedbackSystem = ({ boardId, currentUser }) => {
               onDeleteComment={handleDeleteComment}
             />
           ))}
+          {nextUrl && (
+            <div className="text-center">
+              <button
+                className="px-4 py-2 rounded bg-blue-600 text-white hover:bg-blue-700 disabled:opacity-50"
+                onClick={loadMore}
+                disabled={loadingMore}
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
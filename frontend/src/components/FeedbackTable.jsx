@@ -1,9 +1,14 @@
 import React, { useEffect, useState } from "react";
 import axiosInstance from "../api/axiosConfig";
+import { fetchFeedbackPage } from "../api/feedbacks";
 
+// Only the columns the table shows
+const TABLE_FIELDS = "id,title,board,status,created_at";
+
+// Filtered and cursor-paginated on the server; pages are appended with "Load more".
 const FeedbackTable = () => {
   const [feedbacks, setFeedbacks] = useState([]);
-  const [filteredFeedbacks, setFilteredFeedbacks] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
   const [boards, setBoards] = useState([]);
   const [selectedBoard, setSelectedBoard] = useState(""); 
   const [selectedStatus, setSelectedStatus] = useState("");
@@ -15,23 +20,14 @@ const FeedbackTable = () => {
   });
   const [presetRange, setPresetRange] = useState("");
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState(null);
 
   useEffect(() => {
-    Promise.all([
-      axiosInstance.get("feedbacks/"),
-      axiosInstance.get("boards/"),
-    ])
-      .then(([feedbackRes, boardRes]) => {
-        setFeedbacks(feedbackRes.data);
-        setFilteredFeedbacks(feedbackRes.data);
-        setBoards(boardRes.data); 
-        setIsLoading(false);
-      })
-      .catch(() => {
-        setError("Failed to load data");
-        setIsLoading(false);
-      });
+    axiosInstance
+      .get("boards/")
+      .then((boardRes) => setBoards(boardRes.data))
+      .catch(() => setError("Failed to load data"));
   }, []);
 
   const calculatePresetDateRange = (preset) => {
@@ -81,45 +77,70 @@ const FeedbackTable = () => {
     }
   }, [presetRange]);
 
-  useEffect(() => {
-    let filtered = feedbacks;
-    if (selectedBoard) {
-      filtered = filtered.filter((f) => {
-        return f.board === Number(selectedBoard);
-      });
-    }
-
-    if (selectedStatus) {
-      filtered = filtered.filter((f) => f.status === selectedStatus);
-    }
+  // The list and the export take the same filters
+  const filterParams = () => {
+    const params = {};
+    if (selectedBoard) params.board = selectedBoard;
+    if (selectedStatus) params.status = selectedStatus;
     if (dateFilterType === "specific" && selectedDate) {
-      filtered = filtered.filter((f) => {
-        const feedbackDate = new Date(f.created_at).toISOString().split("T")[0];
-        return feedbackDate === selectedDate;
-      });
+      params.created_after = selectedDate;
+      params.created_before = selectedDate;
     } else if (dateFilterType === "range" || (dateFilterType === "preset" && presetRange)) {
-      const { startDate, endDate } = dateRange;
-      
-      if (startDate && endDate) {
-        filtered = filtered.filter((f) => {
-          const feedbackDate = new Date(f.created_at).toISOString().split("T")[0];
-          return feedbackDate >= startDate && feedbackDate <= endDate;
-        });
-      } else if (startDate) {
-        filtered = filtered.filter((f) => {
-          const feedbackDate = new Date(f.created_at).toISOString().split("T")[0];
-          return feedbackDate >= startDate;
-        });
-      } else if (endDate) {
-        filtered = filtered.filter((f) => {
-          const feedbackDate = new Date(f.created_at).toISOString().split("T")[0];
-          return feedbackDate <= endDate;
-        });
-      }
+      if (dateRange.startDate) params.created_after = dateRange.startDate;
+      if (dateRange.endDate) params.created_before = dateRange.endDate;
     }
+    return params;
+  };
+
+  useEffect(() => {
+    // A slower response for filters the user has already changed must not replace the current page
+    let cancelled = false;
+    setIsLoading(true);
+    fetchFeedbackPage({ ...filterParams(), fields: TABLE_FIELDS })
+      .then((page) => {
+        if (cancelled) return;
+        setFeedbacks(page.results);
+        setNextUrl(page.next);
+        setError(null);
+      })
+      .catch(() => {
+        if (!cancelled) setError("Failed to load data");
+      })
+      .finally(() => {
+        if (!cancelled) setIsLoading(false);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [selectedBoard, selectedStatus, dateFilterType, selectedDate, dateRange, presetRange]);
 
-    setFilteredFeedbacks(filtered);
-  }, [selectedBoard, selectedStatus, dateFilterType, selectedDate, dateRange, presetRange, feedbacks]);
+  const loadMore = () => {
+    setIsLoadingMore(true);
+    fetchFeedbackPage({}, nextUrl)
+      .then((page) => {
+        setFeedbacks((prevFeedbacks) => [...prevFeedbacks, ...page.results]);
+        setNextUrl(page.next);
+      })
+      .catch(() => setError("Failed to load more feedbacks"))
+      .finally(() => setIsLoadingMore(false));
+  };
+
+  // Export runs on the server with the same filters, streamed as CSV
+  const handleExport = async () => {
+    const params = { ...filterParams(), format: "csv" };
+    try {
+      const response = await axiosInstance.get("feedbacks/export/", { params, responseType: "blob" });
+      const url = URL.createObjectURL(response.data);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = "feedbacks.csv";
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error("Error exporting feedbacks:", error);
+      alert("Failed to export feedbacks. Please try again.");
+    }
+  };
 
   const handleDateFilterTypeChange = (type) => {
     setDateFilterType(type);
@@ -170,6 +191,14 @@ const FeedbackTable = () => {
                 <option value="Completed">Completed</option>
               </select>
             </div>
+            <div className="flex items-end">
+              <button
+                className="bg-blue-600 hover:bg-blue-700 text-white px-4 py-2 rounded"
+                onClick={handleExport}
+              >
+                Export CSV
+              </button>
+            </div>
           </div>
 
           <div className="mb-4">
@@ -287,7 +316,7 @@ const FeedbackTable = () => {
                 </tr>
               </thead>
               <tbody>
-                {filteredFeedbacks.map((item) => (
+                {feedbacks.map((item) => (
                   <tr key={item.id} className="hover:bg-gray-50">
                     <td className="px-6 py-4">{item.title}</td>
                     <td className="px-6 py-4">
@@ -299,9 +328,20 @@ const FeedbackTable = () => {
                 ))}
               </tbody>
             </table>
-            {filteredFeedbacks.length === 0 && (
+            {feedbacks.length === 0 && (
               <div className="text-center py-4">No feedbacks found</div>
             )}
+            {nextUrl && (
+              <div className="text-center py-4">
+                <button
+                  className="px-4 py-2 rounded bg-blue-600 text-white hover:bg-blue-700 disabled:opacity-50"
+                  onClick={loadMore}
+                  disabled={isLoadingMore}
+                >
+                  {isLoadingMore ? "Loading..." : "Load more"}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -1,5 +1,7 @@
 import React, { useEffect, useState } from "react";
 import axiosInstance from "../api/axiosConfig";
+import { appendPage, bulkUpdateFeedbacks, fetchFeedbackPage } from "../api/feedbacks";
+import { applyBoardEvent, subscribeToBoard } from "../api/boardEvents";
 import { useDrag, useDrop, DndProvider } from "react-dnd";
 import { HTML5Backend } from "react-dnd-html5-backend";
 import ErrorState from "./common/ErrorState";
@@ -7,6 +9,9 @@ import LoadingState from "./common/LoadingState";
 import { ChevronDown } from "lucide-react";
 
 const ITEM_TYPE = "feedback";
+const STATUSES = ["Open", "In Progress", "Completed"];
+// Cards only show the title and column, so skip descriptions and user objects
+const CARD_FIELDS = "id,title,status";
 
 const FeedbackCard = ({ feedback, moveFeedback }) => {
   const [{ isDragging }, drag] = useDrag({
@@ -53,7 +58,7 @@ const FeedbackCard = ({ feedback, moveFeedback }) => {
   );
 };
 
-const StatusColumn = ({ status, feedbacks, moveFeedback }) => {
+const StatusColumn = ({ status, feedbacks, moveFeedback, hasMore, onLoadMore, isLoadingMore }) => {
   const [{ isOver }, drop] = useDrop({
     accept: ITEM_TYPE,
     drop: (item) => moveFeedback(item.id, status),
@@ -76,7 +81,7 @@ const StatusColumn = ({ status, feedbacks, moveFeedback }) => {
       <div className="flex items-center justify-between mb-4">
         <h3 className="text-lg font-semibold text-gray-900">{status}</h3>
         <span className="px-2 py-1 bg-white rounded-full text-sm text-gray-600 shadow-sm">
-          {filteredFeedbacks.length}
+          {filteredFeedbacks.length}{hasMore ? "+" : ""}
         </span>
       </div>
       
@@ -93,6 +98,15 @@ const StatusColumn = ({ status, feedbacks, moveFeedback }) => {
             Drop items here
           </div>
         )}
+        {hasMore && (
+          <button
+            className="w-full px-4 py-2 rounded bg-white text-blue-600 shadow-sm hover:bg-blue-50 disabled:opacity-50"
+            onClick={onLoadMore}
+            disabled={isLoadingMore}
+          >
+            {isLoadingMore ? "Loading..." : "Load more"}
+          </button>
+        )}
       </div>
     </div>
   );
@@ -136,8 +150,11 @@ const BoardSelector = ({ boards, selectedBoard, onBoardChange }) => {
   );
 };
 
+// Each column loads its own first page by status; "Load more" follows that column's cursor.
 const KanbanBoard = () => {
   const [feedbacks, setFeedbacks] = useState([]);
+  const [nextUrls, setNextUrls] = useState({});
+  const [loadingMore, setLoadingMore] = useState(null);
   const [boards, setBoards] = useState([]);
   const [selectedBoard, setSelectedBoard] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
@@ -159,18 +176,15 @@ const KanbanBoard = () => {
       });
   }, []);
 
-
-
-
-  const fetchBoardFeedbacks =(async () => {
+  const fetchBoardFeedbacks = async () => {
     if (selectedBoard) {
       try {
         setIsLoading(true);
-        console.log(`Fetching all feedbacks and filtering for board ${selectedBoard.id}`);
-        const response = await axiosInstance.get(`feedbacks/`);
-        const filteredFeedbacks = response.data.filter(feedback => feedback.board === parseInt(selectedBoard.id, 10));
-        console.log('Filtered feedbacks with comments:', filteredFeedbacks);
-        setFeedbacks(filteredFeedbacks);
+        const pages = await Promise.all(
+          STATUSES.map((status) => fetchFeedbackPage({ board: selectedBoard.id, status, fields: CARD_FIELDS }))
+        );
+        setFeedbacks(pages.flatMap((page) => page.results));
+        setNextUrls(Object.fromEntries(STATUSES.map((status, i) => [status, pages[i].next])));
         setError(null);
       } catch (error) {
         console.error("Error fetching feedbacks:", error);
@@ -178,14 +192,38 @@ const KanbanBoard = () => {
       } finally {
         setIsLoading(false);
       }
-  }});
+    }
+  };
 
+  const loadMore = async (status) => {
+    setLoadingMore(status);
+    try {
+      const page = await fetchFeedbackPage({}, nextUrls[status]);
+      setFeedbacks((prevFeedbacks) => appendPage(prevFeedbacks, page.results));
+      setNextUrls((prevUrls) => ({ ...prevUrls, [status]: page.next }));
+    } catch (error) {
+      console.error("Error fetching more feedbacks:", error);
+    } finally {
+      setLoadingMore(null);
+    }
+  };
 
   useEffect(() => {
     if (selectedBoard) {
       fetchBoardFeedbacks();
     }
   }, [selectedBoard]);
+
+  useEffect(() => {
+    if (!selectedBoard) return undefined;
+    return subscribeToBoard(selectedBoard.id, (event) => {
+      if (event.type === "resync") {
+        fetchBoardFeedbacks();
+      } else {
+        setFeedbacks((prevFeedbacks) => applyBoardEvent(prevFeedbacks, event));
+      }
+    });
+  }, [selectedBoard]);
   
 
   const handleBoardChange = (board) => {
@@ -199,7 +237,10 @@ const KanbanBoard = () => {
       )
     );
 
-    axiosInstance.patch(`feedbacks/${id}/`, { status: newStatus });
+    bulkUpdateFeedbacks("status", [id], { status: newStatus }).catch((err) => {
+      console.error("Failed to move feedback:", err);
+      fetchBoardFeedbacks();
+    });
   };
 
   if (isLoading) {
@@ -226,12 +267,15 @@ const KanbanBoard = () => {
           />
           
           <div className="flex flex-col md:flex-row gap-6">
-            {["Open", "In Progress", "Completed"].map((status) => (
+            {STATUSES.map((status) => (
               <StatusColumn
                 key={status}
                 status={status}
                 feedbacks={feedbacks}
                 moveFeedback={moveFeedback}
+                hasMore={Boolean(nextUrls[status])}
+                onLoadMore={() => loadMore(status)}
+                isLoadingMore={loadingMore === status}
               />
             ))}
           </div>
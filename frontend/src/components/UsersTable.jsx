@@ -1,71 +1,64 @@
 import React, { useEffect, useState } from "react";
 import axiosInstance from "../api/axiosConfig";
 
+const ROLES = ["admin", "moderator", "contributor"];
+const SEARCH_DELAY_MS = 300;
+
+// The directory is filtered and cursor-paginated on the server; pages are appended with "Load more".
 const UsersTable = () => {
   const [users, setUsers] = useState([]);
-  const [filteredUsers, setFilteredUsers] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
   const [searchTerm, setSearchTerm] = useState("");
-  const [sortField, setSortField] = useState("name");
-  const [sortDirection, setSortDirection] = useState("asc");
+  const [username, setUsername] = useState("");
+  const [roleFilter, setRoleFilter] = useState("");
+  const [joinedAfter, setJoinedAfter] = useState("");
+  const [joinedBefore, setJoinedBefore] = useState("");
+  const [ordering, setOrdering] = useState("username");
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState(null);
-  const [roleFilter, setRoleFilter] = useState("");
 
+  // Wait for typing to pause before querying the username prefix
   useEffect(() => {
+    const timer = setTimeout(() => setUsername(searchTerm.trim()), SEARCH_DELAY_MS);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  useEffect(() => {
+    const params = { ordering };
+    if (username) params.username = username;
+    if (roleFilter) params.role = roleFilter;
+    if (joinedAfter) params.joined_after = joinedAfter;
+    if (joinedBefore) params.joined_before = joinedBefore;
+
+    setIsLoading(true);
     axiosInstance
-      .get("users/")
+      .get("users/", { params })
       .then((response) => {
-        console.log(" Users API Response:", response.data);
-        setUsers(response.data);
-        setFilteredUsers(response.data);
-        setIsLoading(false);
+        setUsers(response.data.results);
+        setNextUrl(response.data.next);
+        setError(null);
       })
       .catch((err) => {
         console.error("Error fetching users:", err);
         setError("Failed to load users data");
-        setIsLoading(false);
-      });
-  }, []);
-
-  useEffect(() => {
-    let filtered = users;
-
-    if (searchTerm) {
-      const term = searchTerm.toLowerCase();
-      filtered = filtered.filter(
-        (user) =>
-          user.name?.toLowerCase().includes(term) ||
-          user.email?.toLowerCase().includes(term) ||
-          user.username?.toLowerCase().includes(term)
-      );
-    }
-
-    if (roleFilter) {
-      filtered = filtered.filter((user) => user.role === roleFilter);
-    }
-
-    // Sort users
-    filtered = [...filtered].sort((a, b) => {
-      const fieldA = a[sortField]?.toLowerCase() || "";
-      const fieldB = b[sortField]?.toLowerCase() || "";
-
-      if (sortDirection === "asc") {
-        return fieldA.localeCompare(fieldB);
-      } else {
-        return fieldB.localeCompare(fieldA);
-      }
-    });
-
-    setFilteredUsers(filtered);
-  }, [users, searchTerm, sortField, sortDirection, roleFilter]);
+      })
+      .finally(() => setIsLoading(false));
+  }, [username, roleFilter, joinedAfter, joinedBefore, ordering]);
 
-  const handleSort = (field) => {
-    if (field === sortField) {
-      setSortDirection(sortDirection === "asc" ? "desc" : "asc");
-    } else {
-      setSortField(field);
-      setSortDirection("asc");
-    }
+  const loadMore = () => {
+    setIsLoadingMore(true);
+    axiosInstance
+      .get(nextUrl)
+      .then((response) => {
+        setUsers((prevUsers) => [...prevUsers, ...response.data.results]);
+        setNextUrl(response.data.next);
+      })
+      .catch((err) => {
+        console.error("Error fetching more users:", err);
+        setError("Failed to load more users");
+      })
+      .finally(() => setIsLoadingMore(false));
   };
 
   const formatDate = (dateString) => {
@@ -73,9 +66,6 @@ const UsersTable = () => {
     return new Date(dateString).toLocaleDateString();
   };
 
-  // Get all unique roles for the filter dropdown
-  const uniqueRoles = [...new Set(users.map((user) => user.role))].filter(Boolean);
-
   return (
     <div className="p-8">
       <div className="max-w-6xl mx-auto bg-white rounded-xl shadow-lg">
@@ -83,7 +73,7 @@ const UsersTable = () => {
           <h2 className="text-2xl font-bold text-blue-600 mb-4">Users</h2>
 
           <div className="flex flex-wrap gap-4 mb-4">
-            {/* Search Input */}
+            {/* Username prefix */}
             <div className="flex-grow max-w-md">
               <label className="block text-sm font-medium text-gray-700 mb-1">
                 Search Users
@@ -91,7 +81,7 @@ const UsersTable = () => {
               <input
                 type="text"
                 className="w-full border p-2 rounded"
-                placeholder="Search by name, email, or username"
+                placeholder="Username starts with..."
                 value={searchTerm}
                 onChange={(e) => setSearchTerm(e.target.value)}
               />
@@ -108,13 +98,51 @@ const UsersTable = () => {
                 onChange={(e) => setRoleFilter(e.target.value)}
               >
                 <option value="">All Roles</option>
-                {uniqueRoles.map((role) => (
+                {ROLES.map((role) => (
                   <option key={role} value={role}>
                     {role}
                   </option>
                 ))}
               </select>
             </div>
+
+            {/* Join date range */}
+            <div>
+              <label className="block text-sm font-medium text-gray-700 mb-1">
+                Joined After
+              </label>
+              <input
+                type="date"
+                className="border p-2 rounded"
+                value={joinedAfter}
+                onChange={(e) => setJoinedAfter(e.target.value)}
+              />
+            </div>
+            <div>
+              <label className="block text-sm font-medium text-gray-700 mb-1">
+                Joined Before
+              </label>
+              <input
+                type="date"
+                className="border p-2 rounded"
+                value={joinedBefore}
+                onChange={(e) => setJoinedBefore(e.target.value)}
+              />
+            </div>
+
+            <div>
+              <label className="block text-sm font-medium text-gray-700 mb-1">
+                Sort
+              </label>
+              <select
+                className="border p-2 rounded w-40"
+                value={ordering}
+                onChange={(e) => setOrdering(e.target.value)}
+              >
+                <option value="username">Username</option>
+                <option value="joined">Newest first</option>
+              </select>
+            </div>
           </div>
         </div>
 
@@ -127,58 +155,25 @@ const UsersTable = () => {
             <table className="w-full">
               <thead>
                 <tr className="bg-gray-50 border-b">
-                  <th 
-                    className="px-6 py-4 text-left cursor-pointer hover:bg-gray-100"
-                    onClick={() => handleSort("name")}
-                  >
-                    <div className="flex items-center">
-                      Name
-                      {sortField === "username" && (
-                        <span className="ml-1">
-                          {sortDirection === "asc" ? "↑" : "↓"}
-                        </span>
-                      )}
-                    </div>
-                  </th>
-                  <th 
-                    className="px-6 py-4 text-left cursor-pointer hover:bg-gray-100"
-                    onClick={() => handleSort("email")}
-                  >
-                    <div className="flex items-center">
-                      Email
-                      {sortField === "email" && (
-                        <span className="ml-1">
-                          {sortDirection === "asc" ? "↑" : "↓"}
-                        </span>
-                      )}
-                    </div>
-                  </th>
-                
-                  <th 
-                    className="px-6 py-4 text-left cursor-pointer hover:bg-gray-100"
-                    onClick={() => handleSort("role")}
-                  >
-                    <div className="flex items-center">
-                      Role
-                      {sortField === "role" && (
-                        <span className="ml-1">
-                          {sortDirection === "asc" ? "↑" : "↓"}
-                        </span>
-                      )}
-                    </div>
-                  </th>
+                  <th className="px-6 py-4 text-left">Name</th>
+                  <th className="px-6 py-4 text-left">Email</th>
+                  <th className="px-6 py-4 text-left">Role</th>
+                  <th className="px-6 py-4 text-right">Feedback</th>
+                  <th className="px-6 py-4 text-right">Comments</th>
+                  <th className="px-6 py-4 text-right">Upvotes Given</th>
                   <th className="px-6 py-4 text-left">Joined Date</th>
-                
                 </tr>
               </thead>
               <tbody>
-                {filteredUsers.length > 0 ? (
-                  filteredUsers.map((user) => (
+                {users.length > 0 ? (
+                  users.map((user) => (
                     <tr key={user.id} className="hover:bg-gray-50">
                       <td className="px-6 py-4">
-                        <div className="flex items-center">
-                          
+                        <div className="flex flex-col">
                           <span>{user.username || "N/A"}</span>
+                          {user.name !== user.username && (
+                            <span className="text-xs text-gray-500">{user.name}</span>
+                          )}
                         </div>
                       </td>
                       <td className="px-6 py-4">{user.email || "N/A"}</td>
@@ -187,26 +182,35 @@ const UsersTable = () => {
                           {user.role || "User"}
                         </span>
                       </td>
+                      <td className="px-6 py-4 text-right">{user.feedback_count}</td>
+                      <td className="px-6 py-4 text-right">{user.comment_count}</td>
+                      <td className="px-6 py-4 text-right">{user.upvotes_given}</td>
                       <td className="px-6 py-4 text-sm text-gray-900">
                         {formatDate(user.created_at)}
                       </td>
-                      
                     </tr>
                   ))
                 ) : (
                   <tr>
-                    <td colSpan="6" className="text-center py-4">
+                    <td colSpan="7" className="text-center py-4">
                       No users found
                     </td>
                   </tr>
                 )}
               </tbody>
             </table>
-            {filteredUsers.length > 0 && (
-              <div className="px-6 py-3 text-sm text-gray-500">
-                Showing {filteredUsers.length} of {users.length} users
-              </div>
-            )}
+            <div className="px-6 py-3 flex items-center justify-between text-sm text-gray-500">
+              <span>Showing {users.length} users</span>
+              {nextUrl && (
+                <button
+                  className="px-4 py-2 rounded bg-blue-600 text-white hover:bg-blue-700 disabled:opacity-50"
+                  onClick={loadMore}
+                  disabled={isLoadingMore}
+                >
+                  {isLoadingMore ? "Loading..." : "Load more"}
+                </button>
+              )}
+            </div>
           </div>
         )}
       </div>
@@ -214,4 +218,4 @@ const UsersTable = () => {
   );
 };
 
-export default UsersTable;
\ No newline at end of file
+export default UsersTable;